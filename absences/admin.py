@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import StudentAbsence, TeacherAbsence
+from .models import (
+    StudentAbsence,
+    StudentAttendanceRollup,
+    TeacherAbsence,
+    TeacherAttendanceRollup
+)
 
 admin.site.register(StudentAbsence)
 admin.site.register(TeacherAbsence)
+admin.site.register(StudentAttendanceRollup)
+admin.site.register(TeacherAttendanceRollup)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from absences.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily attendance rollups from the absences'
+
+    def handle(self, *args, **options):
+        students, teachers = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'{students} student and {teachers} teacher rollup rows'))
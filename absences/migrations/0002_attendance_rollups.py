@@ -0,0 +1,75 @@
+# Generated by Django 4.2.9 on 2026-10-17 13:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_rollups(apps, schema_editor):
+    StudentAbsence = apps.get_model('absences', 'StudentAbsence')
+    TeacherAbsence = apps.get_model('absences', 'TeacherAbsence')
+    StudentAttendanceRollup = apps.get_model('absences', 'StudentAttendanceRollup')
+    TeacherAttendanceRollup = apps.get_model('absences', 'TeacherAttendanceRollup')
+
+    StudentAttendanceRollup.objects.bulk_create([
+        StudentAttendanceRollup(
+            date=row['date'],
+            school_class_id=row['student__student_class_id'],
+            gender=row['student__gender'],
+            sequence_id=row['sequence_id'],
+            absences=row['absences']
+        ) for row in StudentAbsence.objects.values(
+            'date', 'sequence_id', 'student__student_class_id', 'student__gender'
+        ).annotate(absences=Count('id')).order_by()
+    ], batch_size=500)
+    TeacherAttendanceRollup.objects.bulk_create([
+        TeacherAttendanceRollup(
+            date=row['date'],
+            department_id=row['teacher__department_id'],
+            absences=row['absences']
+        ) for row in TeacherAbsence.objects.values(
+            'date', 'teacher__department_id'
+        ).annotate(absences=Count('id')).order_by()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classes', '0002_schoolclass_level'),
+        ('sequences', '0002_sequence_weight'),
+        ('departments', '0001_initial'),
+        ('absences', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='departments.department')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('gender', models.CharField(max_length=20)),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('school_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='classes.schoolclass')),
+                ('sequence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sequences.sequence')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='teacherattendancerollup',
+            constraint=models.UniqueConstraint(fields=('date', 'department'), name='unique_teacher_attendance_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentattendancerollup',
+            constraint=models.UniqueConstraint(fields=('date', 'school_class', 'gender', 'sequence'), name='unique_student_attendance_rollup'),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from classes.models import SchoolClass
+from departments.models import Department
 from students.models import Student
 from sequences.models import Sequence
 from teachers.models import Teacher
@@ -29,3 +31,41 @@ class TeacherAbsence(models.Model):
 
     def __str__(self):
         return f'{self.teacher.name} on {self.date}'
+
+
+class StudentAttendanceRollup(models.Model):
+    '''
+    Number of student absences per day, class, gender and sequence,
+    kept up to date as absences are written (see absences.rollups)
+    '''
+    date = models.DateField()
+    school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE)
+    gender = models.CharField(max_length=20)
+    sequence = models.ForeignKey(Sequence, on_delete=models.CASCADE)
+    absences = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.school_class} {self.gender} on {self.date}: {self.absences}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'school_class', 'gender', 'sequence'],
+                name='unique_student_attendance_rollup')
+        ]
+
+
+class TeacherAttendanceRollup(models.Model):
+    '''Number of teacher absences per day and department'''
+    date = models.DateField()
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    absences = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.department} on {self.date}: {self.absences}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'department'], name='unique_teacher_attendance_rollup')
+        ]
@@ -0,0 +1,163 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncWeek
+
+from .models import (
+    StudentAbsence,
+    StudentAttendanceRollup,
+    TeacherAbsence,
+    TeacherAttendanceRollup
+)
+
+INTERVALS = ('day', 'week', 'sequence')
+
+
+def add_to_rollup(model, change, **keys):
+    '''Adds change (positive or negative) to the absences of the rollup row for keys'''
+    rows = model.objects.filter(**keys)
+    if change < 0:
+        rows.update(absences=Greatest(F('absences') + change, 0))
+        # Days without absences have no rows, as after a rebuild
+        rows.filter(absences=0).delete()
+        return
+
+    if rows.update(absences=F('absences') + change):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(absences=change, **keys)
+    except IntegrityError:
+        # Created by a concurrent request in the meantime
+        rows.update(absences=F('absences') + change)
+
+
+def record_student_absence(absence, change):
+    '''
+    Counts a student absence in the rollups, in the student's current
+    class and gender. move_student_absences keeps them there when the
+    student changes class or gender.
+    '''
+    add_to_rollup(
+        StudentAttendanceRollup, change,
+        date=absence.date,
+        school_class_id=absence.student.student_class_id,
+        gender=absence.student.gender,
+        sequence_id=absence.sequence_id
+    )
+
+
+def record_teacher_absence(absence, change):
+    add_to_rollup(
+        TeacherAttendanceRollup, change,
+        date=absence.date,
+        department_id=absence.teacher.department_id
+    )
+
+
+def move_student_absences(student, old_class_id, old_gender):
+    '''Moves the absences of a student out of their old class and gender rollups'''
+    counts = student.absences.values('date', 'sequence_id').annotate(
+        total=Count('id')).order_by()
+    for count in counts:
+        keys = {'date': count['date'], 'sequence_id': count['sequence_id']}
+        add_to_rollup(
+            StudentAttendanceRollup, -count['total'],
+            school_class_id=old_class_id, gender=old_gender, **keys)
+        add_to_rollup(
+            StudentAttendanceRollup, count['total'],
+            school_class_id=student.student_class_id, gender=student.gender, **keys)
+
+
+def move_teacher_absences(teacher, old_department_id):
+    '''Moves the absences of a teacher out of their old department rollups'''
+    counts = teacher.absences.values('date').annotate(total=Count('id')).order_by()
+    for count in counts:
+        add_to_rollup(
+            TeacherAttendanceRollup, -count['total'],
+            date=count['date'], department_id=old_department_id)
+        add_to_rollup(
+            TeacherAttendanceRollup, count['total'],
+            date=count['date'], department_id=teacher.department_id)
+
+
+def rebuild_rollups():
+    '''
+    Recomputes both rollup tables from the absences, with one grouped
+    query each. Returns the number of (student, teacher) rollup rows.
+    '''
+    student_rows = StudentAbsence.objects.values(
+        'date', 'sequence_id', 'student__student_class_id', 'student__gender'
+    ).annotate(absences=Count('id')).order_by()
+    teacher_rows = TeacherAbsence.objects.values(
+        'date', 'teacher__department_id'
+    ).annotate(absences=Count('id')).order_by()
+
+    with transaction.atomic():
+        StudentAttendanceRollup.objects.all().delete()
+        TeacherAttendanceRollup.objects.all().delete()
+        students = StudentAttendanceRollup.objects.bulk_create([
+            StudentAttendanceRollup(
+                date=row['date'],
+                school_class_id=row['student__student_class_id'],
+                gender=row['student__gender'],
+                sequence_id=row['sequence_id'],
+                absences=row['absences']
+            ) for row in student_rows
+        ], batch_size=500)
+        teachers = TeacherAttendanceRollup.objects.bulk_create([
+            TeacherAttendanceRollup(
+                date=row['date'],
+                department_id=row['teacher__department_id'],
+                absences=row['absences']
+            ) for row in teacher_rows
+        ], batch_size=500)
+    return len(students), len(teachers)
+
+
+def student_attendance_series(rollups, interval):
+    '''
+    Sums student rollup rows per day, week (starting on Monday) or
+    sequence. Returns [{period, male, female, total}] in time order.
+    '''
+    totals = {
+        'male': Sum('absences', filter=Q(gender='Male'), default=0),
+        'female': Sum('absences', filter=Q(gender='Female'), default=0),
+        'total': Sum('absences', default=0),
+    }
+    if interval == 'sequence':
+        rows = rollups.values('sequence_id', 'sequence__short_name').annotate(
+            **totals).order_by('sequence_id')
+        return [
+            {
+                'period': row['sequence__short_name'],
+                'sequence_id': row['sequence_id'],
+                'male': row['male'],
+                'female': row['female'],
+                'total': row['total'],
+            } for row in rows
+        ]
+
+    if interval == 'week':
+        rollups = rollups.annotate(period=TruncWeek('date'))
+    else:
+        rollups = rollups.annotate(period=F('date'))
+    rows = rollups.values('period').annotate(**totals).order_by('period')
+    return [
+        {
+            'period': row['period'].isoformat(),
+            'male': row['male'],
+            'female': row['female'],
+            'total': row['total'],
+        } for row in rows
+    ]
+
+
+def teacher_attendance_series(rollups, interval):
+    '''Sums teacher rollup rows per day or week. Returns [{period, total}].'''
+    if interval == 'week':
+        rollups = rollups.annotate(period=TruncWeek('date'))
+    else:
+        rollups = rollups.annotate(period=F('date'))
+    rows = rollups.values('period').annotate(
+        total=Sum('absences', default=0)).order_by('period')
+    return [{'period': row['period'].isoformat(), 'total': row['total']} for row in rows]
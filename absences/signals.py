@@ -0,0 +1,64 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from students.models import Student
+from teachers.models import Teacher
+from .models import StudentAbsence, TeacherAbsence
+from .rollups import (
+    move_student_absences,
+    move_teacher_absences,
+    record_student_absence,
+    record_teacher_absence
+)
+
+
+@receiver(post_save, sender=StudentAbsence)
+def count_student_absence(sender, instance, created, **kwargs):
+    if created:
+        record_student_absence(instance, 1)
+
+
+@receiver(post_delete, sender=StudentAbsence)
+def uncount_student_absence(sender, instance, **kwargs):
+    record_student_absence(instance, -1)
+
+
+@receiver(post_save, sender=TeacherAbsence)
+def count_teacher_absence(sender, instance, created, **kwargs):
+    if created:
+        record_teacher_absence(instance, 1)
+
+
+@receiver(post_delete, sender=TeacherAbsence)
+def uncount_teacher_absence(sender, instance, **kwargs):
+    record_teacher_absence(instance, -1)
+
+
+@receiver(pre_save, sender=Student)
+def remember_student_rollup_keys(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_rollup_keys = Student.objects.filter(
+            pk=instance.pk).values_list('student_class_id', 'gender').first()
+
+
+@receiver(post_save, sender=Student)
+def move_student_rollups(sender, instance, created, **kwargs):
+    old_keys = getattr(instance, '_old_rollup_keys', None)
+    if created or old_keys in (None, (instance.student_class_id, instance.gender)):
+        return
+    move_student_absences(instance, *old_keys)
+
+
+@receiver(pre_save, sender=Teacher)
+def remember_teacher_department(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_department_id = Teacher.objects.filter(
+            pk=instance.pk).values_list('department_id', flat=True).first()
+
+
+@receiver(post_save, sender=Teacher)
+def move_teacher_rollups(sender, instance, created, **kwargs):
+    old_department_id = getattr(instance, '_old_department_id', None)
+    if created or old_department_id in (None, instance.department_id):
+        return
+    move_teacher_absences(instance, old_department_id)
@@ -12,4 +12,6 @@ urlpatterns = [
 
     path('create_or_update_teachers_absences/<int:teacher_id>/',
          views.create_or_update_teachers_absences),
+    path('get_student_attendance_series/', views.get_student_attendance_series),
+    path('get_teacher_attendance_series/', views.get_teacher_attendance_series),
 ]
@@ -1,3 +1,4 @@
+from django.utils.dateparse import parse_date
 from rest_framework import status
 from rest_framework.decorators import (
     api_view,
@@ -8,12 +9,20 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from knox.auth import TokenAuthentication
 from accounts.permissions import IsAdminUser, IsSuperuser
+from classes.models import SchoolClass
+from departments.models import Department
 from sequences.models import Sequence
-from students.models import Student
+from students.models import Student, find_student
 from teachers.models import Teacher
 from terms.models import Term
 from years.models import Year
-from .models import StudentAbsence, TeacherAbsence
+from .models import (
+    StudentAbsence,
+    StudentAttendanceRollup,
+    TeacherAbsence,
+    TeacherAttendanceRollup
+)
+from .rollups import INTERVALS, student_attendance_series, teacher_attendance_series
 from .serializers import CreateOrUpdateAbsentSerializer, TeacherCreateOrUpdateAbsentSerializer
 
 
@@ -48,7 +57,7 @@ def create_or_update_students_absences(request):
             not_absent = student_info['is_absent'] == "false"
 
             try:
-                student = Student.objects.get(student_id=student_id)
+                student = find_student(student_id, year_id=sequence.term.year_id)
             except Student.DoesNotExist:
                 msg = 'Student not found'
                 return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
@@ -79,15 +88,15 @@ def create_or_update_students_absences(request):
 def get_total_sequence_absences(request, student_id, sequence_id):
 
     try:
-        student = Student.objects.get(student_id=student_id)
-    except Student.DoesNotExist:
-        msg = 'Student not found'
+        sequence = Sequence.objects.select_related('term').get(pk=sequence_id)
+    except Sequence.DoesNotExist:
+        msg = 'Sequence not found'
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
     try:
-        sequence = Sequence.objects.get(pk=sequence_id)
-    except Sequence.DoesNotExist:
-        msg = 'Sequence not found'
+        student = find_student(student_id, year_id=sequence.term.year_id)
+    except Student.DoesNotExist:
+        msg = 'Student not found'
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
     absences = StudentAbsence.objects.filter(
@@ -116,7 +125,7 @@ def get_total_term_absences(request, student_id, term_id):
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id, year_id=term.year_id)
     except Student.DoesNotExist:
         msg = 'Student not found'
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
@@ -170,3 +179,99 @@ def create_or_update_teachers_absences(request, teacher_id):
         return Response(status=status.HTTP_200_OK)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def filter_rollup_dates(rollups, request):
+    '''Applies the optional ?start= and ?end= dates (YYYY-MM-DD), both included'''
+    for param, lookup in (('start', 'date__gte'), ('end', 'date__lte')):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                date = parse_date(value)
+            except ValueError:
+                date = None
+            if date is None:
+                raise ValueError(f'{param} must be a date (YYYY-MM-DD).')
+            rollups = rollups.filter(**{lookup: date})
+    return rollups
+
+
+@api_view(http_method_names=('GET', ))
+@authentication_classes((TokenAuthentication, ))
+@permission_classes((IsAuthenticated, IsAdminUser))
+def get_student_attendance_series(request):
+    '''
+    Student absences per ?interval=day (default), week or sequence, read
+    from the daily rollups. Limited to ?year_id= (the active year by
+    default) and optionally ?class_id=, ?start= and ?end=
+    '''
+    interval = request.query_params.get('interval', 'day')
+    if interval not in INTERVALS:
+        msg = [f'interval must be one of {", ".join(INTERVALS)}.']
+        return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    year_id = request.query_params.get('year_id')
+    try:
+        year = Year.objects.get(pk=year_id) if year_id else Year.objects.get(is_active=True)
+    except (Year.DoesNotExist, ValueError):
+        msg = ['Year not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    rollups = StudentAttendanceRollup.objects.filter(sequence__term__year=year)
+
+    class_id = request.query_params.get('class_id')
+    if class_id:
+        try:
+            school_class = SchoolClass.objects.get(pk=class_id, year=year)
+        except (SchoolClass.DoesNotExist, ValueError):
+            msg = ['Class not found']
+            return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+        rollups = rollups.filter(school_class=school_class)
+
+    try:
+        rollups = filter_rollup_dates(rollups, request)
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {
+        'year': year.name,
+        'interval': interval,
+        'series': student_attendance_series(rollups, interval),
+    }
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=('GET', ))
+@authentication_classes((TokenAuthentication, ))
+@permission_classes((IsAuthenticated, IsAdminUser))
+def get_teacher_attendance_series(request):
+    '''
+    Teacher absences per ?interval=day (default) or week, read from the
+    daily rollups, optionally for ?department_id= between ?start= and ?end=
+    '''
+    interval = request.query_params.get('interval', 'day')
+    if interval not in ('day', 'week'):
+        msg = ['interval must be one of day, week.']
+        return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    rollups = TeacherAttendanceRollup.objects.all()
+
+    department_id = request.query_params.get('department_id')
+    if department_id:
+        try:
+            department = Department.objects.get(pk=department_id)
+        except (Department.DoesNotExist, ValueError):
+            msg = ['Department not found.']
+            return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+        rollups = rollups.filter(department=department)
+
+    try:
+        rollups = filter_rollup_dates(rollups, request)
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {
+        'interval': interval,
+        'series': teacher_attendance_series(rollups, interval),
+    }
+    return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:53
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=accounts.models.upload_location),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.9 on 2026-10-17 13:02
+
+import re
+
+from django.db import migrations, models
+
+
+def national(phone):
+    if not phone:
+        return '', ''
+    number = phone.as_national
+    return number, re.sub(r'\D', '', number)
+
+
+def fill_phone_columns(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = []
+    for user in User.objects.only('phone').iterator(chunk_size=2000):
+        user.phone_national, user.phone_digits = national(user.phone)
+        users.append(user)
+    User.objects.bulk_update(users, ['phone_national', 'phone_digits'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone_national',
+            field=models.CharField(blank=True, editable=False, max_length=30),
+        ),
+        migrations.RunPython(fill_phone_columns, migrations.RunPython.noop),
+    ]
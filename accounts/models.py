@@ -5,12 +5,15 @@ from django.db import models
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.dispatch import receiver
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.utils.text import slugify
 
 
 from phonenumber_field.modelfields import PhoneNumberField
 
+from jobs.media import queue_media_delete
+from .phones import phone_columns
+
 GENDER = (
     ('Male', 'Male'),
     ('Female', 'Female')
@@ -26,10 +29,14 @@ class User(AbstractUser):
         "unique": _("A user with that phone number already exists."),
         "required": _("A valid phone number is required."),
     })
+    # Kept in sync with phone by set_phone_columns
+    phone_national = models.CharField(max_length=30, blank=True, editable=False)
+    phone_digits = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
     address = models.CharField(max_length=100, null=True, blank=True)
     gender = models.CharField(choices=GENDER, max_length=6)
     date_of_birth = models.DateField(null=True, blank=True)
     image = models.ImageField(upload_to=upload_location, blank=True, null=True)
+    thumbnail = models.ImageField(upload_to=upload_location, blank=True, null=True)
     name = models.CharField(_("name"), max_length=180)
     email = models.EmailField(_("email address"), unique=True)
     is_admin = models.BooleanField(default=False)
@@ -61,12 +68,22 @@ class User(AbstractUser):
     def __str__(self):
         return self.name if self.name else str(self.phone.as_national)
 
+    def set_phone_columns(self):
+        self.phone_national, self.phone_digits = phone_columns(self.phone)
+
     @property
     def get_image_url(self):
         if self.image:
             return self.image.url
         return None
 
+    @property
+    def get_thumbnail_url(self):
+        '''Pictures stored before thumbnails existed fall back to the image'''
+        if self.thumbnail:
+            return self.thumbnail.url
+        return self.get_image_url
+
     def get_age(self):
         if self.date_of_birth:
             year_of_birth = self.date_of_birth.year
@@ -75,10 +92,16 @@ class User(AbstractUser):
         return None
 
 
+@receiver(pre_save, sender=User)
+def set_phone_columns(sender, instance, **kwargs):
+    # Teachers are saved with sender=Teacher, see teachers.models
+    instance.set_phone_columns()
+
+
 @receiver(post_delete, sender=User)
 def deleted_user_image(sender, instance, **kwargs):
-    if instance.image and instance.is_admin:
-        instance.image.delete()
+    if instance.is_admin:
+        queue_media_delete(instance.image.name, instance.thumbnail.name)
 
 
 @receiver(post_save, sender=User)
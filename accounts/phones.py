@@ -0,0 +1,12 @@
+import re
+
+
+def phone_columns(phone):
+    '''
+    Returns (national format, national digits) of a phone number, which
+    are stored next to it so lists and searches need not parse it again.
+    '''
+    if not phone:
+        return '', ''
+    national = phone.as_national
+    return national, re.sub(r'\D', '', national)
@@ -11,6 +11,7 @@ from .models import User
 class GetAdminUserSerializer(serializers.ModelSerializer):
     phone = serializers.SerializerMethodField('get_phone')
     image = serializers.SerializerMethodField('get_image_url')
+    thumbnail = serializers.SerializerMethodField('get_thumbnail_url')
     age = serializers.SerializerMethodField('get_age')
 
     class Meta:
@@ -22,6 +23,7 @@ class GetAdminUserSerializer(serializers.ModelSerializer):
             'name',
             'gender',
             'image',
+            'thumbnail',
             'created_at',
             'is_admin',
             'special_role',
@@ -38,11 +40,14 @@ class GetAdminUserSerializer(serializers.ModelSerializer):
         return admin_user.get_age()
 
     def get_phone(self, admin_user):
-        return str(admin_user.phone.as_national)
+        return admin_user.phone_national
 
     def get_image_url(self, admin_user):
         return admin_user.get_image_url
 
+    def get_thumbnail_url(self, admin_user):
+        return admin_user.get_thumbnail_url
+
 
 class CreateAdminUserSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(
@@ -2,8 +2,6 @@ from django.contrib.auth import login as django_login
 from django.utils.translation import gettext as _
 from django.utils.text import slugify
 
-from cloudinary import api as cloudinary_api
-
 from rest_framework import status
 from rest_framework.decorators import (
     api_view,
@@ -23,6 +21,7 @@ from knox.views import (
     LogoutAllView as KnoxLogoutAllView
 )
 
+from jobs.media import queue_media_upload
 from .models import User
 from .permissions import IsAdminUser, IsSuperuser
 from .serializers import (
@@ -42,10 +41,16 @@ from .serializers import (
 def create_admin_user(request):
     serializer = CreateAdminUserSerializer(data=request.data)
     if serializer.is_valid():
+        # Pictures are normalised and stored by the media worker
+        image = serializer.validated_data.pop('image', None)
         user = serializer.save()
         user.slug = slugify(f'{user.pk}-{user.name}')
         user.save()
+        if image:
+            queue_media_upload(user, 'image', image)
         response_data = GetAdminUserSerializer(user, many=False).data
+        if image:
+            response_data['image_pending'] = True
         return Response(response_data, status=status.HTTP_201_CREATED)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -215,19 +220,12 @@ def change_admin_image(request, admin_id):
     else:
         serializer = ChangeAdminImageSerializer(data=request.data)
         if serializer.is_valid():
-            old_image = admin.image
-            admin.image = serializer.validated_data['image']
-            admin.save()
-
-            if old_image:
-                # Delete old picture from server if exists
-                cloudinary_api.delete_resources(
-                    [old_image.name],
-                    resource_type="image",
-                    type="upload"
-                )
+            # Uploaded by the media worker, which then deletes the old picture
+            queue_media_upload(admin, 'image', serializer.validated_data['image'])
 
-            return Response(GetAdminUserSerializer(admin).data, status=status.HTTP_200_OK)
+            response_data = GetAdminUserSerializer(admin).data
+            response_data['image_pending'] = True
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -19,6 +19,7 @@ from .serializers import (
     UpdateSchoolClassInfoSerializer
 )
 from .models import SchoolClass
+from students.models import find_student
 from students.serializers import GetStudentSerializer, Student
 
 
@@ -262,9 +263,9 @@ def assign_class_prefect(request, class_id, student_id):
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
     try:
-        student = Student.objects.get(student_id=student_id)
-    except Teacher.DoesNotExist:
-        msg = ["Class master not found."]
+        student = find_student(student_id, year_id=school_class.year_id)
+    except Student.DoesNotExist:
+        msg = ["Student not found."]
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
     if not school_class.year.is_active:
@@ -0,0 +1,86 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+# Longest side of stored pictures and of their thumbnails, in pixels
+MAX_SIZE = 1024
+THUMBNAIL_SIZE = 256
+QUALITY = 82
+THUMBNAIL_QUALITY = 75
+WORKERS = min(4, os.cpu_count() or 1)
+
+# Pillow releases the GIL while decoding, resizing and encoding
+executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='images')
+
+
+def output_format():
+    '''WebP when Pillow was built with it, JPEG otherwise'''
+    return 'WEBP' if features.check('webp') else 'JPEG'
+
+
+def output_name(name, image_format, suffix=''):
+    '''Replaces the image extension of a file name, e.g. a.jpg -> a-thumb.webp'''
+    root, extension = os.path.splitext(name)
+    if extension.lower() not in Image.registered_extensions():
+        root = name
+    return f'{root}{suffix}.{"webp" if image_format == "WEBP" else "jpg"}'
+
+
+def encode(image, image_format, quality):
+    '''Encodes without the metadata (EXIF, GPS, ICC) of the original'''
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.mode else None)
+        image = background
+
+    output = BytesIO()
+    options = {'method': 4} if image_format == 'WEBP' else {'optimize': True}
+    image.save(output, image_format, quality=quality, **options)
+    return output.getvalue()
+
+
+def normalise_image(content, image_format=None):
+    '''
+    Downscales a picture to MAX_SIZE, applies its EXIF orientation and
+    re-encodes it without metadata. Returns (image bytes, thumbnail
+    bytes, format).
+    '''
+    image_format = image_format or output_format()
+
+    with Image.open(BytesIO(content)) as image:
+        # JPEG can be decoded straight at a reduced scale, much faster for phone photos
+        image.draft('RGB', (MAX_SIZE, MAX_SIZE))
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        image.thumbnail((MAX_SIZE, MAX_SIZE), Image.LANCZOS)
+        thumbnail = image.copy()
+        thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+
+        return (
+            encode(image, image_format, QUALITY),
+            encode(thumbnail, image_format, THUMBNAIL_QUALITY),
+            image_format
+        )
+
+
+def normalise_images(contents):
+    '''
+    Normalises several pictures in the thread pool. Returns one result per
+    content, the exception raised when a picture could not be processed.
+    '''
+    image_format = output_format()
+    futures = [executor.submit(normalise_image, content, image_format) for content in contents]
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as error:
+            results.append(error)
+    return results
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.media import run_media_jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs the queued media uploads and deletes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true', help='Run the due jobs and exit')
+        parser.add_argument(
+            '--batch', type=int, default=100, help='Jobs claimed at a time')
+        parser.add_argument(
+            '--sleep', type=float, default=5, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_media_jobs(limit=options['batch'])
+            if count:
+                self.stdout.write(f'{count} media jobs run')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
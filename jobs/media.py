@@ -0,0 +1,212 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .images import normalise_images, output_name
+from .models import MediaJob
+from .signals import media_uploaded
+
+MAX_ATTEMPTS = 5
+# Running jobs not finished after this long belong to a worker that stopped
+RUNNING_LEASE = timedelta(minutes=15)
+# Cloudinary accepts up to 100 public ids per delete_resources call
+DELETE_BATCH_SIZE = 100
+
+
+def queue_media_delete(*names):
+    '''Queues the deletion of stored files, blank names are ignored'''
+    MediaJob.objects.bulk_create([
+        MediaJob(action='delete', name=name) for name in names if name
+    ])
+
+
+def unused_media_names(model, columns, names, exclude_pk=None):
+    '''
+    Returns the names, blank ones left out, that no row of model (other
+    than exclude_pk) points at in any of the columns.
+    '''
+    names = [name for name in names if name]
+    if not names:
+        return []
+
+    in_use = models.Q()
+    for column in columns:
+        in_use |= models.Q(**{f'{column}__in': names})
+    rows = model.objects.filter(in_use)
+    if exclude_pk is not None:
+        rows = rows.exclude(pk=exclude_pk)
+    used = {name for row in rows.values_list(*columns) for name in row}
+    return [name for name in names if name not in used]
+
+
+def queue_media_upload(instance, field_name, file):
+    '''
+    Queues the upload of a file for a file field of a saved instance.
+    The field keeps its current file until the upload is done; the
+    replaced file is then queued for deletion.
+    '''
+    field = instance._meta.get_field(field_name)
+    return MediaJob.objects.create(
+        action='upload',
+        name=field.generate_filename(instance, file.name),
+        content=file.read(),
+        model=instance._meta.label,
+        object_id=instance.pk,
+        field=field_name
+    )
+
+
+def delete_files(names):
+    '''Deletes stored files, in batches when the storage is Cloudinary'''
+    try:
+        from cloudinary import api as cloudinary_api
+        from cloudinary_storage.storage import MediaCloudinaryStorage
+    except ImportError:
+        MediaCloudinaryStorage = None
+
+    if MediaCloudinaryStorage and isinstance(default_storage, MediaCloudinaryStorage):
+        for start in range(0, len(names), DELETE_BATCH_SIZE):
+            cloudinary_api.delete_resources(
+                names[start:start + DELETE_BATCH_SIZE],
+                resource_type="image",
+                type="upload"
+            )
+    else:
+        for name in names:
+            default_storage.delete(name)
+
+
+def thumbnail_field_name(model, field_name):
+    '''The thumbnail field kept next to an image field, None when there is none'''
+    if field_name == 'image' and any(field.name == 'thumbnail' for field in model._meta.fields):
+        return 'thumbnail'
+    return None
+
+
+def upload_file(job, normalised=None):
+    '''
+    Stores the content of an upload job and points the target field at it.
+    normalised is (image, thumbnail, format) from normalise_images, in
+    which case the thumbnail is stored too.
+    '''
+    model = apps.get_model(job.model)
+    field = model._meta.get_field(job.field)
+    thumbnail_field = thumbnail_field_name(model, job.field) if normalised else None
+    columns = [job.field] + ([thumbnail_field] if thumbnail_field else [])
+    old_names = model.objects.filter(pk=job.object_id).values_list(*columns).first() or []
+
+    values = {}
+    if normalised:
+        content, thumbnail, image_format = normalised
+        values[job.field] = field.storage.save(
+            output_name(job.name, image_format), ContentFile(content))
+        if thumbnail_field:
+            values[thumbnail_field] = field.storage.save(
+                output_name(job.name, image_format, '-thumb'), ContentFile(thumbnail))
+    else:
+        values[job.field] = field.storage.save(job.name, ContentFile(bytes(job.content)))
+    names = list(values.values())
+
+    if any(model_field.name == 'updated_at' for model_field in model._meta.fields):
+        values['updated_at'] = timezone.now()
+    updated = model.objects.filter(pk=job.object_id).update(**values)
+
+    if not updated:
+        # The object was deleted in the meantime
+        queue_media_delete(*names)
+    else:
+        queue_media_delete(*unused_media_names(model, columns, old_names, exclude_pk=job.object_id))
+        media_uploaded.send(sender=model, object_id=job.object_id, fields=columns)
+
+
+def is_image_job(job):
+    '''Uploads to image fields are normalised before being stored'''
+    model = apps.get_model(job.model)
+    return isinstance(model._meta.get_field(job.field), models.ImageField)
+
+
+def claim_jobs(limit):
+    '''
+    Marks up to limit due jobs as running and returns them. Jobs left
+    running past the lease are claimed again, each time counting as a
+    failed attempt.
+    '''
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = MediaJob.objects.filter(
+            models.Q(status='pending', run_after__lte=now)
+            | models.Q(status='running', updated_at__lt=now - RUNNING_LEASE))
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        jobs = list(jobs[:limit])
+
+        for job in jobs:
+            if job.status == 'running':
+                job.attempts += 1
+                job.last_error = 'The worker stopped before the job was done'
+            job.status = 'failed' if job.attempts >= MAX_ATTEMPTS else 'running'
+            job.updated_at = now
+        MediaJob.objects.bulk_update(jobs, ['status', 'attempts', 'last_error', 'updated_at'])
+    return [job for job in jobs if job.status == 'running']
+
+
+def finish_jobs(jobs, error=None):
+    '''Marks jobs done, or schedules a retry with a growing delay'''
+    now = timezone.now()
+    for job in jobs:
+        if error is None:
+            job.status = 'done'
+            job.content = None
+            job.last_error = ''
+        else:
+            job.attempts += 1
+            job.last_error = str(error)
+            job.status = 'failed' if job.attempts >= MAX_ATTEMPTS else 'pending'
+            job.run_after = now + timedelta(seconds=30 * 2 ** job.attempts)
+        job.updated_at = now
+
+    MediaJob.objects.bulk_update(
+        jobs, ['status', 'content', 'attempts', 'last_error', 'run_after', 'updated_at'])
+
+
+def run_media_jobs(limit=100):
+    '''
+    Runs one batch of due jobs. Deletes are sent together, uploads one at
+    a time once their pictures are normalised. Returns the number of jobs
+    run.
+    '''
+    jobs = claim_jobs(limit)
+
+    deletes = [job for job in jobs if job.action == 'delete']
+    if deletes:
+        try:
+            delete_files([job.name for job in deletes])
+        except Exception as error:
+            finish_jobs(deletes, error)
+        else:
+            finish_jobs(deletes)
+
+    uploads = [job for job in jobs if job.action == 'upload']
+    # Pictures are downscaled and re-encoded together in the thread pool
+    images = [job for job in uploads if is_image_job(job)]
+    normalised = dict(zip(
+        [job.pk for job in images],
+        normalise_images([bytes(job.content) for job in images])
+    ))
+
+    for job in uploads:
+        result = normalised.get(job.pk)
+        try:
+            if isinstance(result, Exception):
+                raise result
+            upload_file(job, result)
+        except Exception as error:
+            finish_jobs([job], error)
+        else:
+            finish_jobs([job])
+
+    return len(jobs)
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('upload', 'Upload'), ('delete', 'Delete')], max_length=10)),
+                ('name', models.CharField(max_length=255)),
+                ('content', models.BinaryField(blank=True, null=True)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('object_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('field', models.CharField(blank=True, max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['run_after', 'pk'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='media_job_queue')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+actions = (
+    ('upload', 'Upload'),
+    ('delete', 'Delete'),
+)
+
+statuses = (
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+)
+
+
+class MediaJob(models.Model):
+    '''
+    A media upload or delete run by the run_media_jobs worker instead of
+    inside the request. Uploads keep the file content until they are done
+    and then save the stored name on the field of the target object.
+    '''
+    action = models.CharField(max_length=10, choices=actions)
+    name = models.CharField(max_length=255)
+    content = models.BinaryField(null=True, blank=True)
+    model = models.CharField(max_length=100, blank=True)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)
+    field = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=10, choices=statuses, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.action} {self.name} ({self.status})'
+
+    class Meta:
+        ordering = ['run_after', 'pk']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='media_job_queue'),
+        ]
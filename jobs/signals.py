@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent once an upload job has pointed a file field at its new file with
+# an UPDATE, which does not send post_save. Receivers get object_id and
+# fields, sender is the model.
+media_uploaded = Signal()
@@ -1,3 +1,5 @@
 from django.contrib import admin
-from .models import Mark
+from .models import GradeBoundary, GradingScheme, Mark
 admin.site.register(Mark)
+admin.site.register(GradingScheme)
+admin.site.register(GradeBoundary)
@@ -0,0 +1,115 @@
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.db import transaction
+
+from others.cache import bump_versions, get_versions
+# Schemes grade the marks of a subject level
+from subjects.models import levels  # noqa: F401
+
+GRADING_VERSION = 'grading_schemes'
+MAX_SCORE = 20
+NOT_GRADED = ('N/A', 'N/A')
+
+# Used for a level until a grading scheme is saved for it
+DEFAULT_BOUNDARIES = (
+    (Decimal('0'), 'F', 'Very Poor'),
+    (Decimal('5'), 'E', 'Poor'),
+    (Decimal('8'), 'D', 'Below Average'),
+    (Decimal('10'), 'C', 'Average'),
+    # Scores are stored to three decimals, so only exactly 10 is "Average"
+    (Decimal('10.001'), 'C', 'Good'),
+    (Decimal('13'), 'B', 'Very Good'),
+    (Decimal('18'), 'A', 'Excellent'),
+)
+
+
+class CompiledGradingScheme:
+    '''
+    Grading boundaries compiled into a sorted array of minimum scores.
+    A score is graded with a binary search instead of a linear scan.
+    '''
+
+    def __init__(self, boundaries, version=None):
+        boundaries = sorted(boundaries, key=lambda boundary: boundary[0])
+        self.min_scores = [float(min_score) for min_score, _, _ in boundaries]
+        self.grades = [(grade, remark) for _, grade, remark in boundaries]
+        self.version = version
+
+    def grade(self, score):
+        '''Returns (grade, remark) for a single score'''
+        if score is None:
+            return NOT_GRADED
+
+        score = float(score)
+        if not self.min_scores or score < self.min_scores[0] or score > MAX_SCORE:
+            return NOT_GRADED
+        return self.grades[bisect_right(self.min_scores, score) - 1]
+
+    def grade_many(self, scores):
+        '''Returns a list of (grade, remark), one for each score'''
+        grade = self.grade
+        return [grade(score) for score in scores]
+
+    def histogram(self, scores):
+        '''
+        Counts the scores falling in each grade. Returns a list of
+        {min_score, grade, remark, count} from the lowest grade up. Bands
+        sharing a grade, like the two C bands of the default scheme, are
+        counted as one, with their remarks joined.
+        '''
+        counts = [0] * len(self.min_scores)
+        min_scores = self.min_scores
+        for score in scores:
+            if min_scores and min_scores[0] <= score <= MAX_SCORE:
+                counts[bisect_right(min_scores, score) - 1] += 1
+
+        histogram = []
+        for min_score, (grade, remark), count in zip(min_scores, self.grades, counts):
+            if histogram and histogram[-1]['grade'] == grade:
+                histogram[-1]['remark'] += f' / {remark}'
+                histogram[-1]['count'] += count
+            else:
+                histogram.append(
+                    {'min_score': min_score, 'grade': grade, 'remark': remark, 'count': count})
+        return histogram
+
+
+_compiled_schemes = {}
+
+
+def grading_schemes_changed():
+    '''Makes every process recompile its schemes once the transaction commits'''
+    transaction.on_commit(lambda: bump_versions(GRADING_VERSION))
+
+
+def get_grading_scheme(level):
+    '''
+    Returns the compiled grading scheme of a level (Ordinary/Advanced).
+    Compiled schemes are kept in memory and only recompiled after
+    grading_schemes_changed(), checked with a cache read instead of a
+    query.
+    '''
+    # marks.models imports this module for the levels
+    from .models import GradingScheme
+
+    version = get_versions(GRADING_VERSION)[GRADING_VERSION]
+
+    compiled = _compiled_schemes.get(level)
+    if compiled is not None and compiled.version == version:
+        return compiled
+
+    scheme = GradingScheme.objects.filter(level=level).first()
+    if scheme is None:
+        boundaries = DEFAULT_BOUNDARIES
+    else:
+        boundaries = scheme.boundaries.values_list('min_score', 'grade', 'remark')
+    compiled = CompiledGradingScheme(boundaries, version=version)
+
+    _compiled_schemes[level] = compiled
+    return compiled
+
+
+def grade_many(scores, level='Ordinary'):
+    '''Grades a batch of scores with the scheme of the given level'''
+    return get_grading_scheme(level).grade_many(scores)
@@ -0,0 +1,223 @@
+import codecs
+import csv
+import math
+import zipfile
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from students.models import Student
+from .grading import get_grading_scheme
+from .models import Mark
+from .signals import mark_sheet_saved
+
+
+class MarkSheetError:
+    '''A problem found on one row of a submitted mark sheet'''
+
+    def __init__(self, row, message, status_code):
+        self.row = row
+        self.message = message
+        self.status_code = status_code
+
+    def as_dict(self):
+        return {'row': self.row, 'message': self.message}
+
+
+def parse_score(score):
+    '''Returns the score rounded to 3 decimals, None for a blank score
+    and raises ValueError for anything that is not a valid score.'''
+    if score == '':
+        return None
+
+    try:
+        value = float(score)
+    except (ValueError, TypeError):
+        raise ValueError(f'"{score}" is not a valid score...')
+
+    if not math.isfinite(value) or value < 0 or value > 20:
+        raise ValueError(f'{score} is not a valid score. Mark range (0 to 20)')
+
+    return Decimal(str(round(value, 3)))
+
+
+SHEET_COLUMNS = ('student_id', 'score')
+
+
+def normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def read_csv_rows(file):
+    '''Yields the rows of an uploaded CSV file one at a time'''
+    lines = codecs.iterdecode(file, 'utf-8-sig')
+    yield from csv.reader(lines)
+
+
+def read_xlsx_rows(file):
+    '''Yields the rows of the first sheet of an uploaded XLSX file'''
+    from openpyxl import load_workbook
+
+    # read_only parses the sheet lazily instead of loading it all
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError):
+        raise ValueError('The file is not a valid XLSX workbook.')
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_mark_sheet_file(file):
+    '''
+    Reads an uploaded CSV/XLSX mark sheet lazily. The first row must name
+    the student_id and score columns. Yields (row_number, student_id,
+    score) like the rows expected by parse_mark_sheet.
+    Raises ValueError when the file can not be read.
+    '''
+    if file.name.lower().endswith('.xlsx'):
+        rows = read_xlsx_rows(file)
+    else:
+        rows = read_csv_rows(file)
+
+    try:
+        header = [normalize_header(value) for value in next(rows, [])]
+        missing = [column for column in SHEET_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(
+                f'The first row must name the {" and ".join(missing)} column(s).')
+
+        student_id_column = header.index('student_id')
+        score_column = header.index('score')
+
+        for row, values in enumerate(rows, start=2):
+            values = list(values)
+            if not any(value not in (None, '') for value in values):
+                continue
+
+            values += [None] * (len(header) - len(values))
+            student_id = str(values[student_id_column] or '').strip()
+            score = values[score_column]
+            score = '' if score is None else str(score).strip()
+            yield row, student_id, score
+    except (UnicodeDecodeError, csv.Error) as error:
+        raise ValueError(f'The file could not be read: {error}')
+
+
+def parse_mark_sheet(rows, students=None):
+    '''
+    Validates a whole mark sheet before anything is written.
+    rows is an iterable of (row_number, student_id, score), and students
+    limits the students the sheet may contain (all of them by default).
+    Returns ({student_pk: score or None}, [MarkSheetError]).
+    A blank score (None) means the mark has to be deleted.
+    '''
+    parsed = []
+    errors = []
+    for row, student_id, score in rows:
+        try:
+            value = parse_score(score)
+        except ValueError as error:
+            errors.append(MarkSheetError(
+                row, str(error), status.HTTP_403_FORBIDDEN))
+            continue
+        parsed.append((row, student_id, value))
+
+    # Resolve every student id of the sheet in one query
+    student_ids = {student_id for _, student_id, _ in parsed}
+    if students is None:
+        students = Student.objects.all()
+    students = dict(students.filter(
+        student_id__in=student_ids).values_list('student_id', 'pk'))
+
+    scores = {}
+    for row, student_id, value in parsed:
+        if student_id not in students:
+            # Blank scores for unknown students are simply ignored
+            if value is not None:
+                errors.append(MarkSheetError(
+                    row, 'Student not found', status.HTTP_404_NOT_FOUND))
+            continue
+        # When a student appears twice, the last row wins
+        scores[students[student_id]] = value
+
+    errors.sort(key=lambda error: error.row)
+    return scores, errors
+
+
+def save_mark_sheet(scores, subject, sequence, teacher, competency):
+    '''
+    Writes a parsed mark sheet in one transaction.
+    Blank scores delete the existing mark, the other ones are
+    updated or created with bulk queries.
+    '''
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    grades = dict(zip(
+        scores, get_grading_scheme(subject.level).grade_many(scores.values())))
+
+    with transaction.atomic():
+        existing_marks = {
+            mark.student_id: mark for mark in Mark.objects.filter(
+                subject=subject, sequence=sequence, student_id__in=scores.keys())
+        }
+
+        to_delete = [
+            existing_marks[student_pk].pk for student_pk, score in scores.items()
+            if score is None and student_pk in existing_marks
+        ]
+        if to_delete:
+            # mark_sheet_saved below refreshes the results of these students too
+            Mark.objects.filter(pk__in=to_delete).delete()
+
+        for student_pk, score in scores.items():
+            if score is None:
+                continue
+
+            grade, remark = grades[student_pk]
+            mark = existing_marks.get(student_pk)
+
+            if mark:
+                '''Update happens here'''
+                mark.score = score
+                mark.grade = grade
+                mark.remark = remark
+                mark.teacher = teacher
+                mark.competency = competency
+                mark.updated_at = now
+                to_update.append(mark)
+            else:
+                '''Creation occurs here'''
+                to_create.append(Mark(
+                    subject=subject,
+                    student_id=student_pk,
+                    sequence=sequence,
+                    teacher=teacher,
+                    score=score,
+                    grade=grade,
+                    remark=remark,
+                    competency=competency
+                ))
+
+        if to_update:
+            Mark.objects.bulk_update(
+                to_update,
+                ['score', 'grade', 'remark', 'teacher',
+                    'competency', 'updated_at'],
+                batch_size=500
+            )
+        if to_create:
+            Mark.objects.bulk_create(to_create, batch_size=500)
+
+        mark_sheet_saved.send(
+            sender=Mark,
+            student_ids=list(scores.keys()),
+            subject=subject,
+            sequence=sequence
+        )
+
+    return to_create, to_update
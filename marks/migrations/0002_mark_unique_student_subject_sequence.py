@@ -0,0 +1,37 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def delete_duplicate_marks(apps, schema_editor):
+    # Mark sheets used to create a new mark instead of updating the old one,
+    # keep the latest mark of each student, subject and sequence
+    Mark = apps.get_model('marks', 'Mark')
+
+    duplicates = Mark.objects.values('student_id', 'subject_id', 'sequence_id').annotate(
+        count=Count('id')).filter(count__gt=1).order_by()
+
+    to_delete = []
+    for key in duplicates:
+        del key['count']
+        to_delete += list(Mark.objects.filter(**key).order_by(
+            '-updated_at', '-pk').values_list('pk', flat=True)[1:])
+
+    for start in range(0, len(to_delete), 500):
+        Mark.objects.filter(pk__in=to_delete[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_marks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mark',
+            constraint=models.UniqueConstraint(fields=('student', 'subject', 'sequence'), name='unique_student_subject_sequence_mark'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:33
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marks', '0002_mark_unique_student_subject_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingScheme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('Ordinary', 'Ordinary'), ('Advanced', 'Advanced')], max_length=15, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GradeBoundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_score', models.DecimalField(decimal_places=3, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(20)])),
+                ('grade', models.CharField(max_length=10)),
+                ('remark', models.CharField(max_length=30)),
+                ('scheme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='boundaries', to='marks.gradingscheme')),
+            ],
+            options={
+                'ordering': ['min_score'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gradeboundary',
+            constraint=models.UniqueConstraint(fields=('scheme', 'min_score'), name='unique_scheme_min_score'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.core.validators import MaxValueValidator, MinValueValidator
 from teachers.models import Teacher
 from students.models import Student
 from subjects.models import Subject
 from sequences.models import Sequence
+from .grading import grading_schemes_changed, levels
 
 
 class Mark(models.Model):
@@ -29,3 +32,51 @@ class Mark(models.Model):
         subject = self.subject.name
         string = f'{student}: {self.score} on 20 in {student_class} {subject}'
         return string
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'subject', 'sequence'],
+                name='unique_student_subject_sequence_mark'
+            )
+        ]
+
+
+class GradingScheme(models.Model):
+    level = models.CharField(max_length=15, choices=levels, unique=True)
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.level} level)'
+
+
+class GradeBoundary(models.Model):
+    '''A grade starts at min_score and ends at the next boundary'''
+    scheme = models.ForeignKey(
+        GradingScheme, on_delete=models.CASCADE, related_name="boundaries")
+    min_score = models.DecimalField(max_digits=5, decimal_places=3, validators=[
+                                    MinValueValidator(0), MaxValueValidator(20)])
+    grade = models.CharField(max_length=10)
+    remark = models.CharField(max_length=30)
+
+    def __str__(self):
+        return f'{self.grade} from {self.min_score} ({self.scheme.level})'
+
+    class Meta:
+        ordering = ['min_score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scheme', 'min_score'],
+                name='unique_scheme_min_score'
+            )
+        ]
+
+
+@receiver(post_save, sender=GradingScheme)
+@receiver(post_delete, sender=GradingScheme)
+@receiver(post_save, sender=GradeBoundary)
+@receiver(post_delete, sender=GradeBoundary)
+def reload_grading_schemes(sender, **kwargs):
+    grading_schemes_changed()
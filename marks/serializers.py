@@ -1,6 +1,7 @@
+from decimal import Decimal
 from rest_framework import serializers
 
-from .models import Mark
+from .models import GradeBoundary, GradingScheme, Mark
 
 
 class GetMarkSerializer(serializers.ModelSerializer):
@@ -49,3 +50,53 @@ class CreateOrUpdateMarkSerializer(serializers.Serializer):
     # class_list = MarkListField(allow_empty=False)
     class_list = serializers.ListField(allow_empty=False)
     competency = serializers.CharField()
+
+
+class ImportMarksSerializer(serializers.Serializer):
+    '''file is a CSV or XLSX sheet with student_id and score columns'''
+    file = serializers.FileField()
+    competency = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_file(self, file):
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise serializers.ValidationError(
+                'Only .csv and .xlsx files can be imported.')
+        return file
+
+
+class GradeBoundarySerializer(serializers.ModelSerializer):
+    min_score = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=3,
+        min_value=Decimal(0),
+        max_value=Decimal(20),
+        coerce_to_string=False
+    )
+
+    class Meta:
+        model = GradeBoundary
+        fields = ('min_score', 'grade', 'remark')
+
+
+class GetGradingSchemeSerializer(serializers.ModelSerializer):
+    boundaries = GradeBoundarySerializer(many=True)
+
+    class Meta:
+        model = GradingScheme
+        fields = ('id', 'level', 'name', 'boundaries', 'updated_at')
+
+
+class SetGradingSchemeSerializer(serializers.Serializer):
+    '''boundaries e.g [{"min_score": 0, "grade": "F", "remark": "Very Poor"}, ...]'''
+    name = serializers.CharField(max_length=100)
+    boundaries = GradeBoundarySerializer(many=True, allow_empty=False)
+
+    def validate_boundaries(self, boundaries):
+        min_scores = [boundary['min_score'] for boundary in boundaries]
+        if len(set(min_scores)) != len(min_scores):
+            raise serializers.ValidationError(
+                'Two grades can not start at the same score.')
+        if min(min_scores) != 0:
+            raise serializers.ValidationError(
+                'The lowest grade must start at 0.')
+        return sorted(boundaries, key=lambda boundary: boundary['min_score'])
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent once a mark sheet has been written with bulk queries, which do
+# not send post_save. Receivers get student_ids, subject and sequence.
+mark_sheet_saved = Signal()
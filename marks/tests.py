@@ -1,3 +1,89 @@
+import datetime
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from classes.models import SchoolClass
+from sequences.models import Sequence
+from students.models import Student
+from subjects.models import Subject
+from terms.models import Term
+from years.models import Year
+from .mark_sheet import parse_mark_sheet, save_mark_sheet
+from .models import Mark
+
+
+class MarkSheetTests(TestCase):
+
+    def setUp(self):
+        year = Year.objects.create(name='2024/2025')
+        self.sequence = Sequence.objects.create(
+            name='Sequence 1', short_name='Seq1',
+            term=Term.objects.create(name='First Term', year=year))
+        self.subject = Subject.objects.create(
+            name='Mathematics', short_name='Maths', coefficient=4, level='Ordinary')
+        school_class = SchoolClass.objects.create(
+            name='Form 1', short_name='F1', year=year, level='Ordinary')
+        self.students = {
+            student_id: Student.objects.create(
+                name=f'Student {student_id}', student_class=school_class,
+                date_of_birth=datetime.date(2012, 1, 1), student_id=student_id,
+                gender='Female', parent_phone='+237677000000')
+            for student_id in ('FAS24A001', 'FAS24A002', 'FAS24A003')
+        }
+
+    def submit(self, rows):
+        scores, errors = parse_mark_sheet(rows)
+        self.assertEqual(errors, [])
+        return save_mark_sheet(scores, self.subject, self.sequence, None, 'Algebra')
+
+    def scores(self):
+        return dict(Mark.objects.filter(
+            subject=self.subject, sequence=self.sequence).values_list(
+            'student__student_id', 'score'))
+
+    def test_sheet_creates_updates_and_blanks_marks(self):
+        self.submit([(2, 'FAS24A001', '12'), (3, 'FAS24A002', '9.5')])
+        first_mark = Mark.objects.get(student=self.students['FAS24A001'])
+
+        created, updated = self.submit([
+            (2, 'FAS24A001', '14.25'), (3, 'FAS24A002', ''), (4, 'FAS24A003', '17')])
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(updated), 1)
+        self.assertEqual(self.scores(), {
+            'FAS24A001': Decimal('14.250'), 'FAS24A003': Decimal('17.000')})
+        # The mark is updated in place, not duplicated
+        mark = Mark.objects.get(student=self.students['FAS24A001'])
+        self.assertEqual(mark.pk, first_mark.pk)
+        self.assertEqual(mark.competency, 'Algebra')
+        self.assertTrue(mark.grade)
+
+    def test_last_row_of_a_student_wins(self):
+        self.submit([(2, 'FAS24A001', '12'), (3, 'FAS24A001', ''), (4, 'FAS24A001', '7')])
+        self.assertEqual(self.scores(), {'FAS24A001': Decimal('7.000')})
+
+        self.submit([(2, 'FAS24A001', '10'), (3, 'FAS24A001', '')])
+        self.assertEqual(self.scores(), {})
+
+    def test_errors_are_reported_by_row_before_anything_is_written(self):
+        scores, errors = parse_mark_sheet([
+            (2, 'FAS24A001', '12'),
+            (3, 'FAS24A002', '21'),
+            (4, 'FAS24A404', '10'),
+            (5, 'FAS24A404', ''),
+            (6, 'FAS24A003', 'abc'),
+        ])
+
+        self.assertEqual(
+            [(error.row, error.status_code) for error in errors], [(3, 403), (4, 404), (6, 403)])
+        self.assertEqual(scores, {self.students['FAS24A001'].pk: Decimal('12.0')})
+        self.assertFalse(Mark.objects.exists())
+
+    def test_students_outside_the_given_ones_are_not_found(self):
+        scores, errors = parse_mark_sheet(
+            [(2, 'FAS24A001', '12'), (3, 'FAS24A002', '13')],
+            students=Student.objects.filter(student_id='FAS24A001'))
+
+        self.assertEqual([(error.row, error.status_code) for error in errors], [(3, 404)])
+        self.assertEqual(list(scores), [self.students['FAS24A001'].pk])
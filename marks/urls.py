@@ -6,6 +6,10 @@ urlpatterns = [
     path('get_marks_for_student/<str:student_id>/', views.get_marks_for_student),
     path('create_or_update_mark/<int:class_id>/<int:subject_id>/',
          views.create_or_update_mark),
+    path('import_marks/<int:class_id>/<int:subject_id>/', views.import_marks),
     path('get_student_list_in_class_for_marks_input/<int:class_id>/<int:subject_id>/',
-         views.get_student_list_in_class_for_marks_input)
+         views.get_student_list_in_class_for_marks_input),
+    path('export_marks/<int:sequence_id>/', views.export_marks),
+    path('get_grading_schemes/', views.get_grading_schemes),
+    path('set_grading_scheme/<str:level>/', views.set_grading_scheme),
 ]
@@ -1,3 +1,9 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.text import slugify
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.decorators import (
     api_view,
@@ -7,18 +13,35 @@ from rest_framework.decorators import (
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from knox.auth import TokenAuthentication
+from accounts.permissions import IsAdminUser, IsSuperuser
 from classes.models import SchoolClass
+from others.exports import CHUNK_SIZE, export_response, parse_file_type
 from teachers.permissions import IsTeacher
 from teachers.models import Teacher
-from students.models import Student
+from students.models import Student, find_student
 from subjects.models import Subject
 from sequences.models import Sequence
-from .evaluate_grade_and_remark import evaluate_grade_and_remark
+from .grading import DEFAULT_BOUNDARIES, CompiledGradingScheme, levels
+from .mark_sheet import parse_mark_sheet, read_mark_sheet_file, save_mark_sheet
 from .serializers import (
     GetMarkSerializer,
-    CreateOrUpdateMarkSerializer
+    CreateOrUpdateMarkSerializer,
+    ImportMarksSerializer,
+    GetGradingSchemeSerializer,
+    SetGradingSchemeSerializer
 )
-from .models import Mark
+from .models import GradeBoundary, GradingScheme, Mark
+
+# Columns of the mark exports, read with values_list()
+EXPORT_HEADER = [
+    'Student ID', 'Name', 'Class', 'Subject', 'Coefficient', 'Score', 'Grade',
+    'Remark', 'Competency', 'Teacher'
+]
+EXPORT_COLUMNS = [
+    'student__student_id', 'student__name', 'student__student_class__name',
+    'subject__name', 'subject__coefficient', 'score', 'grade', 'remark',
+    'competency', 'teacher__name'
+]
 
 
 @api_view(http_method_names=['GET'])
@@ -26,12 +49,13 @@ from .models import Mark
 @permission_classes([IsAuthenticated])
 def get_marks_for_student(request, student_id):
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id)
     except Student.DoesNotExist:
         msg = ['Student not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
-    marks = student.mark_set.all()
+    # Marks of every year the student was enrolled in
+    marks = Mark.objects.filter(student__student_id=student.student_id)
     serializer = GetMarkSerializer(marks, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -87,67 +111,118 @@ def create_or_update_mark(request, class_id, subject_id):
         class_list = serializer.validated_data['class_list']
         competency = serializer.validated_data.get('competency', None)
 
-        for student_info in class_list:
-            student_id = student_info['student_id']
-            subject_score = student_info['score']
-
-            if subject_score == '':
-                mark = Mark.objects.filter(
-                    student__student_id=student_id, subject=subject, sequence=sequence)
-                if mark.exists():
-                    mark.last().delete()
-
-                continue
-
-            try:
-                float(subject_score)
-            except (ValueError, TypeError):
-                msg = [f'"{subject_score}" is not a valid score...']
-                return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
-
-            if float(subject_score) < 0 or float(subject_score) > 20:
-                msg = [
-                    f'{subject_score} is not a valid score. Mark range (0 to 20)']
-                return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
-
-            try:
-                student = Student.objects.get(student_id=student_id)
-            except Student.DoesNotExist:
-                msg = ['Student not found']
-                return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
-
-            grade, remark = evaluate_grade_and_remark(
-                score=float(subject_score))
-
-            try:
-                '''Update happens here'''
-                mark = Mark.objects.get(
-                    student=student, subject=subject, sequence=sequence)
-                mark.score = round(float(subject_score), 3)
-                mark.grade = grade
-                mark.remark = remark
-                mark.teacher = teacher
-                mark.competency = competency
-                mark.save()
-
-            except Mark.DoesNotExist:
-                '''Creation occurs here'''
-                Mark.objects.create(
-                    subject=subject,
-                    student=student,
-                    sequence=sequence,
-                    teacher=teacher,
-                    score=round(float(subject_score), 3),
-                    grade=grade,
-                    remark=remark,
-                    competency=competency
-                )
+        rows = (
+            (row, student_info.get('student_id'), student_info.get('score'))
+            for row, student_info in enumerate(class_list, start=1)
+        )
+        scores, errors = parse_mark_sheet(
+            rows, students=Student.objects.filter(student_class__year_id=school_class.year_id))
+
+        if errors:
+            # Nothing is written when any row of the sheet is invalid
+            error = errors[0]
+            return Response({'error': [error.message]}, status=error.status_code)
+
+        save_mark_sheet(scores, subject, sequence, teacher, competency)
 
         return Response(status=status.HTTP_201_CREATED)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(http_method_names=['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsTeacher])
+def import_marks(request, class_id, subject_id):
+    try:
+        subject = Subject.objects.get(pk=subject_id)
+    except Subject.DoesNotExist:
+        msg = ['Subject not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        school_class = SchoolClass.objects.get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ['Class not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    if not school_class.periods.filter(subject=subject).exists():
+        msg = ['The subject is not taught in this class']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    if not school_class.year.is_active:
+        msg = ['You can only fill marks for subjects in the active year.']
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        sequence = Sequence.objects.get(is_active=True)
+    except Sequence.DoesNotExist:
+        msg = ['There is no active sequence at this moment. Please contact the admin.']
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    if not sequence.term.year.is_active:
+        msg = ['You can only submit marks for an active year.']
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        teacher = Teacher.objects.get(pk=request.user.pk)
+    except Teacher.DoesNotExist:
+        msg = ['You are not authorized to take that action.']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    periods = school_class.periods.filter(teacher=teacher, subject=subject)
+    if not periods.exists():
+        msg = ['You are not assigned to this subject in this class']
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = ImportMarksSerializer(data=request.data)
+
+    if serializer.is_valid():
+        file = serializer.validated_data['file']
+        competency = serializer.validated_data.get('competency') or None
+
+        try:
+            scores, errors = parse_mark_sheet(
+                read_mark_sheet_file(file), students=school_class.student_set.all())
+        except ValueError as e:
+            return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if errors:
+            # Every invalid row is reported and nothing is written
+            response_data = {
+                'error': [f'Row {error.row}: {error.message}' for error in errors],
+                'rows': [error.as_dict() for error in errors]
+            }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = save_mark_sheet(
+            scores, subject, sequence, teacher, competency)
+
+        response_data = {
+            'created': len(created),
+            'updated': len(updated)
+        }
+        return Response(response_data, status=status.HTTP_201_CREATED)
+    else:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def roster_etag(students, marks, subject, sequence):
+    '''
+    ETag of a marks input roster from the latest update and the number of
+    its students and marks. Counts catch deletions, which leave no
+    updated_at behind.
+    '''
+    student_state = students.aggregate(last_update=Max('updated_at'), total=Count('id'))
+    mark_state = marks.aggregate(last_update=Max('updated_at'), total=Count('id'))
+    state = (
+        f"{subject.pk}:{sequence.pk}:"
+        f"{student_state['last_update']}:{student_state['total']}:"
+        f"{mark_state['last_update']}:{mark_state['total']}"
+    )
+    return quote_etag(hashlib.md5(state.encode()).hexdigest())
+
+
 @api_view(http_method_names=['GET'])
 @permission_classes([IsAuthenticated, IsTeacher])
 @authentication_classes([TokenAuthentication])
@@ -183,17 +258,22 @@ def get_student_list_in_class_for_marks_input(request, class_id, subject_id):
         return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
 
     students = school_class.student_set.all()
+    marks = Mark.objects.filter(
+        student__student_class=school_class, subject=subject, sequence=sequence)
+
+    # The roster only changes when its students or marks do
+    etag = roster_etag(students, marks, subject, sequence)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    student_marks = {
+        student_pk: (score, competency) for student_pk, score, competency in marks.values_list(
+            'student_id', 'score', 'competency')
+    }
 
     response_data = []
     for student in students:
-        mark = Mark.objects.filter(
-            student=student, subject=subject, sequence=sequence)
-        if mark:
-            score = mark[0].score
-            competency = mark[0].competency if mark[0].competency else ""
-        else:
-            score = ""
-            competency = ""
+        score, competency = student_marks.get(student.pk, ("", ""))
 
         data = {
             'name': student.name,
@@ -201,9 +281,134 @@ def get_student_list_in_class_for_marks_input(request, class_id, subject_id):
             'student_id': student.student_id,
             'gender': student.gender,
             'score': score,
-            'competency': competency
+            'competency': competency if competency else ""
         }
 
         response_data.append(data)
 
+    return Response(response_data, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def get_grading_schemes(request):
+    schemes = {
+        scheme.level: GetGradingSchemeSerializer(scheme).data
+        for scheme in GradingScheme.objects.prefetch_related('boundaries')
+    }
+
+    response_data = []
+    for level, _ in levels:
+        if level not in schemes:
+            # Levels without a saved scheme are graded with the default one
+            schemes[level] = {
+                'id': None,
+                'level': level,
+                'name': 'Default',
+                'boundaries': [
+                    {'min_score': min_score, 'grade': grade, 'remark': remark}
+                    for min_score, grade, remark in DEFAULT_BOUNDARIES
+                ],
+                'updated_at': None
+            }
+        response_data.append(schemes[level])
+
     return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['PUT'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsSuperuser])
+def set_grading_scheme(request, level):
+    if level not in dict(levels):
+        msg = [f'{level} is not a valid level.']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = SetGradingSchemeSerializer(data=request.data)
+
+    if serializer.is_valid():
+        name = serializer.validated_data['name']
+        boundaries = serializer.validated_data['boundaries']
+
+        with transaction.atomic():
+            scheme, _ = GradingScheme.objects.get_or_create(
+                level=level, defaults={'name': name})
+            scheme.boundaries.all().delete()
+            GradeBoundary.objects.bulk_create([
+                GradeBoundary(scheme=scheme, **boundary) for boundary in boundaries
+            ])
+            scheme.name = name
+            scheme.save()
+
+            # Regrade the marks of the active year with the new boundaries,
+            # the cached schemes only reload once this transaction commits
+            new_scheme = CompiledGradingScheme(
+                (boundary['min_score'], boundary['grade'], boundary['remark'])
+                for boundary in boundaries)
+            marks = list(Mark.objects.filter(
+                subject__level=level,
+                sequence__term__year__is_active=True
+            ).only('id', 'score'))
+            grades = new_scheme.grade_many(mark.score for mark in marks)
+            for mark, (grade, remark) in zip(marks, grades):
+                mark.grade = grade
+                mark.remark = remark
+            Mark.objects.bulk_update(marks, ['grade', 'remark'], batch_size=500)
+
+        scheme = GradingScheme.objects.prefetch_related(
+            'boundaries').get(pk=scheme.pk)
+        response_data = GetGradingSchemeSerializer(scheme).data
+        response_data['marks_regraded'] = len(marks)
+        return Response(response_data, status=status.HTTP_200_OK)
+    else:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_marks(request, sequence_id):
+    '''
+    Streams the marks of a sequence as CSV or XLSX (?file_type=), one row
+    per mark, for the whole school or ?class_id= and ?subject_id=
+    '''
+    try:
+        sequence = Sequence.objects.get(pk=sequence_id)
+    except Sequence.DoesNotExist:
+        msg = ['Sequence not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        file_type = parse_file_type(request.query_params.get('file_type'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    marks = Mark.objects.filter(sequence=sequence)
+    filename = [sequence.name]
+
+    class_id = request.query_params.get('class_id')
+    if class_id:
+        try:
+            school_class = SchoolClass.objects.get(pk=class_id)
+        except (SchoolClass.DoesNotExist, ValueError):
+            msg = ['Class not found']
+            return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+        marks = marks.filter(student__student_class=school_class)
+        filename.append(school_class.name)
+
+    subject_id = request.query_params.get('subject_id')
+    if subject_id:
+        try:
+            subject = Subject.objects.get(pk=subject_id)
+        except (Subject.DoesNotExist, ValueError):
+            msg = ['Subject not found']
+            return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+        marks = marks.filter(subject=subject)
+        filename.append(subject.name)
+
+    rows = marks.order_by(
+        'student__student_class__name', 'student__name', 'student_id', 'subject__name'
+    ).values_list(*EXPORT_COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    filename = slugify('-'.join(filename + ['marks']))
+    return export_response(file_type, filename, EXPORT_HEADER, rows)
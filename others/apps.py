@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class OthersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'others'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .cache import check_shared_cache
+        checks.register(check_shared_cache, checks.Tags.caches)
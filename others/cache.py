@@ -0,0 +1,153 @@
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+# A local memory cache is not shared, so a version bump only reaches the
+# process that made it. The others see the change once their entries,
+# versions included, expire after this many seconds.
+LOCAL_TIMEOUT = 60 * 2
+# How long a process may hold the recomputation lock of a key
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+MISSING = object()
+
+# A fixed set of locks shared by hashing the keys, so the number of
+# locks stays bounded however many keys are cached
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _locks_for(keys):
+    indexes = sorted({zlib.crc32(key.encode()) % len(_locks) for key in keys})
+    return [_locks[index] for index in indexes]
+
+
+def is_process_local():
+    '''True when every process has its own cache (locmem, the default)'''
+    return isinstance(caches['default'], LocMemCache)
+
+
+def cache_timeout(timeout):
+    '''Caps timeouts (None means forever) to LOCAL_TIMEOUT with a process local cache'''
+    if not is_process_local():
+        return timeout
+    return LOCAL_TIMEOUT if timeout is None else min(timeout, LOCAL_TIMEOUT)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    '''Warns when production runs on a cache that processes do not share'''
+    if settings.DEBUG or not is_process_local():
+        return []
+    return [checks.Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'Set CACHE_URL (e.g. redis://...) so that every process sees '
+            'invalidations at once. Otherwise cached data can be up to '
+            f'{LOCAL_TIMEOUT} seconds old.'
+        ),
+        id='others.W001',
+    )]
+
+
+def get_versions(*names):
+    '''
+    Returns {name: version} for the given version names. A version that
+    does not exist yet (or was evicted) starts from the current time so it
+    never matches the entries cached under an older version.
+    '''
+    keys = {name: f'version:{name}' for name in names}
+    versions = cache.get_many(keys.values())
+
+    result = {}
+    for name, key in keys.items():
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=cache_timeout(None))
+            versions[key] = cache.get(key)
+        result[name] = versions[key]
+    return result
+
+
+def bump_versions(*names):
+    '''Invalidates everything cached under the given version names'''
+    for name in set(names):
+        key = f'version:{name}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=cache_timeout(None))
+
+
+def get_or_compute_many(keys, compute, timeout=DEFAULT_TIMEOUT):
+    '''
+    Returns {key: value} for keys, computing the missing values with
+    compute(missing_keys) -> {key: value}. Concurrent misses on the same
+    keys are computed once: threads of a process wait on a lock, and other
+    processes wait on a lock entry added to the cache.
+    '''
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if not missing:
+        return values
+
+    locks = _locks_for(missing)
+    for lock in locks:
+        lock.acquire()
+    try:
+        values.update(cache.get_many(missing))
+        missing = [key for key in missing if key not in values]
+        if not missing:
+            return values
+
+        lock_key = f'lock:{zlib.crc32(":".join(missing).encode())}'
+        owns_lock = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+        if not owns_lock:
+            # Another process is computing them, wait for its result
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                values.update(cache.get_many(missing))
+                missing = [key for key in missing if key not in values]
+                if not missing:
+                    return values
+
+        try:
+            computed = compute(missing)
+            cache.set_many(computed, timeout=cache_timeout(timeout))
+            values.update(computed)
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+    finally:
+        for lock in locks:
+            lock.release()
+    return values
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT):
+    '''Single key version of get_or_compute_many. compute takes no arguments.'''
+    return get_or_compute_many([key], lambda missing: {key: compute()}, timeout)[key]
+
+
+def get_or_compute_versioned(name, compute, timeout=DEFAULT_TIMEOUT):
+    '''
+    Returns compute() cached under the current version of name. The value
+    is stored next to its version, so a hit is a single cache read;
+    after a bump the value is recomputed once, on the next read.
+    '''
+    version_key = f'version:{name}'
+    value_key = f'versioned:{name}'
+    values = cache.get_many([version_key, value_key])
+    version = values.get(version_key)
+    if version is not None and value_key in values and values[value_key][0] == version:
+        return values[value_key][1]
+
+    version = get_versions(name)[name]
+    value = get_or_compute(f'{name}:{version}', compute, timeout)
+    cache.set(value_key, (version, value), timeout=cache_timeout(timeout))
+    return value
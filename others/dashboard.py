@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Count, Q
+
+from absences.models import TeacherAbsence, StudentAbsence
+from accounts.models import User
+from classes.models import SchoolClass
+from students.models import Student
+from students.serializers import GetStudentSerializer
+from teachers.models import Teacher
+from years.models import Year
+
+from .cache import bump_versions, get_or_compute_versioned
+
+DASHBOARD_VERSION = 'dashboard'
+# Bumps cover the writes made through the app, the timeout catches the
+# rest (shell, admin bulk actions) within a few minutes
+DASHBOARD_TIMEOUT = 60 * 10
+
+
+def dashboard_changed():
+    '''
+    Invalidates the dashboard snapshot once the transaction commits. It
+    is recomputed on the next read, so a burst of writes costs one
+    recomputation.
+    '''
+    transaction.on_commit(lambda: bump_versions(DASHBOARD_VERSION))
+
+
+def get_dashboard():
+    return get_or_compute_versioned(
+        DASHBOARD_VERSION, compute_dashboard, timeout=DASHBOARD_TIMEOUT)
+
+
+def compute_dashboard():
+    '''The dashboard data, computed from about eight aggregate queries'''
+    response_data = {}
+
+    # Admins
+    admins_count = User.objects.filter(is_admin=True).aggregate(
+        total=Count('id'),
+        males=Count('id', filter=Q(gender='Male')),
+        females=Count('id', filter=Q(gender='Female'))
+    )
+
+    try:
+        current_active_year = Year.objects.get(is_active=True)
+    except Year.DoesNotExist:
+        response_data["students"] = {'total': 0, 'gender': [
+            {'name': "Students", "male": 0, "female": 0}]}
+        response_data["admins"] = {'total': admins_count['total'], 'gender': [
+            {'name': "Admins", 'male': admins_count['males'], 'female': admins_count['females']}]}
+        response_data["teachers"] = {'total': 0, 'gender': [
+            {'name': "Teachers", "male": 0, "female": 0}]}
+        response_data["absences"] = [
+            {'name': 'Teachers', 'value': 0},
+            {'name': 'Students', 'value': 0},
+        ]
+        response_data["last_five_students_registered"] = []
+        response_data["classes"] = []
+        return response_data
+
+    # Students of current active year
+    students_count = Student.objects.filter(
+        student_class__year_id=current_active_year.id).aggregate(
+        total=Count('id'),
+        males=Count('id', filter=Q(gender='Male')),
+        females=Count('id', filter=Q(gender='Female'))
+    )
+
+    # Teachers
+    teachers_count = Teacher.objects.all().aggregate(
+        total=Count('id'),
+        males=Count('id', filter=Q(gender='Male')),
+        females=Count('id', filter=Q(gender='Female'))
+    )
+
+    # Absences
+    teacher_absences = TeacherAbsence.objects.filter(
+        period__school_class__year=current_active_year
+    ).aggregate(total=Count('id'))
+    student_absences = StudentAbsence.objects.filter(
+        student__student_class__year_id=current_active_year.id).aggregate(total=Count('id'))
+    absences_count = [
+        {'name': 'Teachers', 'value': teacher_absences['total']},
+        {'name': 'Students', 'value': student_absences['total']}
+    ]
+
+    # Last Five registered students
+    last_five_students = Student.objects.filter(
+        student_class__year_id=current_active_year.id).order_by('-id')[:5]
+    serializer = GetStudentSerializer(last_five_students, many=True)
+
+    # Classes(of active year) and total students count and male and female students count
+    classes_data = SchoolClass.objects.filter(year_id=current_active_year.id).annotate(
+        total=Count('student'),
+        males=Count('student', filter=Q(student__gender='Male')),
+        females=Count('student', filter=Q(student__gender='Female')),
+    ).values('id', 'short_name', 'males', 'females', 'total')
+
+    # Response Data
+    response_data["students"] = {'total': students_count['total'], 'gender': [
+        {'name': "Students", 'male': students_count['males'], 'female': students_count['females']}]}
+
+    response_data["admins"] = {'total': admins_count['total'], 'gender': [
+        {'name': "Admins", 'male': admins_count['males'], 'female': admins_count['females']}]}
+
+    response_data["teachers"] = {'total': teachers_count['total'], 'gender': [
+        {'name': "Teachers", 'male': teachers_count['males'], 'female': teachers_count['females']}]}
+
+    response_data["absences"] = absences_count
+    response_data["last_five_students_registered"] = list(serializer.data)
+    response_data["classes"] = list(classes_data)
+
+    return response_data
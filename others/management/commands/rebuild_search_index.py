@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from others.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the search index of students, teachers and admins'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'{count} documents indexed'))
@@ -0,0 +1,99 @@
+import re
+
+from django.db import migrations, OperationalError
+
+FTS_TABLE = 'others_searchdocument_fts'
+
+CREATE_FTS = [
+    f'''CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, keywords,
+        content='others_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )''',
+    f'''CREATE TRIGGER others_searchdocument_ai AFTER INSERT ON others_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords)
+        VALUES (new.id, new.title, new.keywords);
+    END''',
+    f'''CREATE TRIGGER others_searchdocument_ad AFTER DELETE ON others_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords)
+        VALUES ('delete', old.id, old.title, old.keywords);
+    END''',
+    f'''CREATE TRIGGER others_searchdocument_au AFTER UPDATE ON others_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords)
+        VALUES ('delete', old.id, old.title, old.keywords);
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords)
+        VALUES (new.id, new.title, new.keywords);
+    END''',
+]
+
+DROP_FTS = [
+    'DROP TRIGGER IF EXISTS others_searchdocument_ai',
+    'DROP TRIGGER IF EXISTS others_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS others_searchdocument_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def create_fts_table(apps, schema_editor):
+    # Other databases, and SQLite builds without FTS5, search with icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_check USING fts5(value)')
+            cursor.execute('DROP TABLE temp.fts5_check')
+    except OperationalError:
+        return
+    for statement in CREATE_FTS:
+        schema_editor.execute(statement)
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_FTS:
+            schema_editor.execute(statement)
+
+
+def phone_keywords(phone):
+    if not phone:
+        return []
+    return [re.sub(r'\D', '', phone.as_national), re.sub(r'\D', '', phone.as_e164)]
+
+
+def index_existing(apps, schema_editor):
+    SearchDocument = apps.get_model('others', 'SearchDocument')
+    Student = apps.get_model('students', 'Student')
+    Teacher = apps.get_model('teachers', 'Teacher')
+    User = apps.get_model('accounts', 'User')
+
+    documents = [
+        SearchDocument(type='student', object_id=pk, title=name, keywords=student_id or '')
+        for pk, name, student_id in Student.objects.values_list('pk', 'name', 'student_id').iterator()
+    ]
+    documents += [
+        SearchDocument(type='teacher', object_id=pk, title=name,
+                       keywords=' '.join(phone_keywords(phone)))
+        for pk, name, phone in Teacher.objects.values_list('pk', 'name', 'phone').iterator()
+    ]
+    documents += [
+        SearchDocument(type='admin', object_id=pk, title=name,
+                       keywords=' '.join(phone_keywords(phone)))
+        for pk, name, phone in User.objects.filter(
+            is_admin=True).values_list('pk', 'name', 'phone').iterator()
+    ]
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('others', '0001_initial'),
+        ('accounts', '0002_user_thumbnail'),
+        ('students', '0003_student_thumbnail'),
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations, models, OperationalError
+
+FTS_TABLE = 'others_searchdocument_fts'
+
+# Same table as in 0002, plus prefix indexes for the suggestions
+CREATE_FTS = [
+    f'''CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, keywords,
+        content='others_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='1 2 3'
+    )''',
+    f'''CREATE TRIGGER others_searchdocument_ai AFTER INSERT ON others_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords)
+        VALUES (new.id, new.title, new.keywords);
+    END''',
+    f'''CREATE TRIGGER others_searchdocument_ad AFTER DELETE ON others_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords)
+        VALUES ('delete', old.id, old.title, old.keywords);
+    END''',
+    f'''CREATE TRIGGER others_searchdocument_au AFTER UPDATE OF title, keywords ON others_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords)
+        VALUES ('delete', old.id, old.title, old.keywords);
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords)
+        VALUES (new.id, new.title, new.keywords);
+    END''',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    'DROP TRIGGER IF EXISTS others_searchdocument_ai',
+    'DROP TRIGGER IF EXISTS others_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS others_searchdocument_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def drop_fts_table(apps, schema_editor):
+    # Adding a column rebuilds the table on SQLite, which drops its triggers
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_FTS:
+            schema_editor.execute(statement)
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_check USING fts5(value)')
+            cursor.execute('DROP TABLE temp.fts5_check')
+    except OperationalError:
+        return
+    for statement in CREATE_FTS:
+        schema_editor.execute(statement)
+
+
+def fill_details(apps, schema_editor):
+    SearchDocument = apps.get_model('others', 'SearchDocument')
+    Student = apps.get_model('students', 'Student')
+    User = apps.get_model('accounts', 'User')
+
+    documents = []
+    student_ids = dict(Student.objects.values_list('pk', 'student_id'))
+    phones = dict(User.objects.values_list('pk', 'phone'))
+    for document in SearchDocument.objects.all().iterator():
+        if document.type == 'student':
+            document.detail = student_ids.get(document.object_id) or ''
+        else:
+            phone = phones.get(document.object_id)
+            document.detail = phone.as_national if phone else ''
+        documents.append(document)
+    SearchDocument.objects.bulk_update(documents, ['detail'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('others', '0002_search_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_table, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='searchdocument',
+            name='detail',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.RunPython(fill_details, migrations.RunPython.noop),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def index_phone_digits(apps, schema_editor):
+    '''Students are also found by their own and their parent's phone numbers'''
+    SearchDocument = apps.get_model('others', 'SearchDocument')
+    Student = apps.get_model('students', 'Student')
+    User = apps.get_model('accounts', 'User')
+
+    students = {
+        pk: (student_id, phone_digits, parent_phone_digits)
+        for pk, student_id, phone_digits, parent_phone_digits in Student.objects.values_list(
+            'pk', 'student_id', 'phone_digits', 'parent_phone_digits').iterator()
+    }
+    users = {
+        pk: (phone_digits, phone_national)
+        for pk, phone_digits, phone_national in User.objects.values_list(
+            'pk', 'phone_digits', 'phone_national').iterator()
+    }
+
+    documents = []
+    for document in SearchDocument.objects.all().iterator():
+        if document.type == 'student':
+            keywords = students.get(document.object_id, ())
+            document.keywords = ' '.join(keyword for keyword in keywords if keyword)
+        else:
+            document.keywords, document.detail = users.get(document.object_id, ('', ''))
+        documents.append(document)
+    SearchDocument.objects.bulk_update(documents, ['keywords', 'detail'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('others', '0003_search_prefix_index'),
+        ('accounts', '0003_user_phone_columns'),
+        ('students', '0004_student_phone_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_phone_digits, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,30 @@
 from django.db import models
 
-# Create your models here.
+TYPES = (
+    ('student', 'Student'),
+    ('teacher', 'Teacher'),
+    ('admin', 'Admin'),
+)
+
+
+class SearchDocument(models.Model):
+    '''
+    A searchable student, teacher or admin. On SQLite the rows are
+    mirrored by triggers into the others_searchdocument_fts FTS5 table.
+    '''
+    type = models.CharField(max_length=10, choices=TYPES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=180)
+    keywords = models.CharField(max_length=255, blank=True)
+    # Shown next to the title in search suggestions
+    detail = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.type} {self.object_id}: {self.title}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['type', 'object_id'], name='unique_search_document')
+        ]
@@ -0,0 +1,234 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import phonenumbers
+from django.conf import settings
+from django.db import connection, models, transaction
+
+from .cache import bump_versions, get_versions
+from .models import SearchDocument
+
+FTS_TABLE = 'others_searchdocument_fts'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+# bm25 weights of the title (names) and keywords (IDs, phone numbers) columns
+TITLE_WEIGHT = 10.0
+KEYWORDS_WEIGHT = 5.0
+
+SUGGEST_LIMIT = 8
+MAX_SUGGEST_LIMIT = 20
+# Suggestions are picked among the most recent documents matching the
+# prefixes, which keeps a keystroke cheap however common the prefix is
+SUGGEST_CANDIDATES = 200
+INDEX_VERSION = 'search_index'
+# Phone numbers are indexed by their national digits
+COUNTRY_CODE = str(phonenumbers.country_code_for_region(settings.PHONENUMBER_DEFAULT_REGION))
+
+_has_fts = None
+
+
+def has_fts():
+    '''True when the FTS5 table exists, i.e. on SQLite with FTS5 compiled in'''
+    global _has_fts
+    if _has_fts is None:
+        _has_fts = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+    return _has_fts
+
+
+def student_document(student):
+    keywords = [student.student_id, student.phone_digits, student.parent_phone_digits]
+    return SearchDocument(
+        type='student', object_id=student.pk, title=student.name,
+        keywords=' '.join(keyword for keyword in keywords if keyword),
+        detail=student.student_id or '')
+
+
+def user_document(type, user):
+    return SearchDocument(
+        type=type, object_id=user.pk, title=user.name,
+        keywords=user.phone_digits, detail=user.phone_national)
+
+
+def index_documents(documents):
+    '''Inserts or updates documents, the triggers update the FTS table'''
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['type', 'object_id'],
+        update_fields=['title', 'keywords', 'detail', 'updated_at']
+    )
+    index_changed()
+
+
+def index_changed():
+    '''Invalidates the cached suggestions once the transaction commits'''
+    transaction.on_commit(lambda: bump_versions(INDEX_VERSION))
+
+
+def index_students(students):
+    index_documents([student_document(student) for student in students])
+
+
+def rebuild_index():
+    '''
+    Recreates every document from the students (their latest enrolment),
+    teachers and admins, then rebuilds the FTS table. Returns the number
+    of documents.
+    '''
+    from accounts.models import User
+    from students.models import Student
+    from teachers.models import Teacher
+
+    user_fields = ('pk', 'name', 'phone_digits', 'phone_national')
+    documents = [student_document(student) for student in Student.objects.filter(
+        next_enrolment__isnull=True).only(
+        'pk', 'name', 'student_id', 'phone_digits', 'parent_phone_digits').iterator(chunk_size=2000)]
+    documents += [user_document('teacher', teacher) for teacher in Teacher.objects.only(
+        *user_fields).iterator(chunk_size=2000)]
+    documents += [user_document('admin', user) for user in User.objects.filter(
+        is_admin=True).only(*user_fields).iterator(chunk_size=2000)]
+
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.bulk_create(documents, batch_size=500)
+        if has_fts():
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        index_changed()
+    return len(documents)
+
+
+def remove_documents(type, *object_ids):
+    SearchDocument.objects.filter(type=type, object_id__in=object_ids).delete()
+    index_changed()
+
+
+def normalise_query(query):
+    '''
+    A query that looks like a phone number ('6 77 12 34 56', '+237 677-12')
+    becomes its national digits, other queries are left as they are.
+    '''
+    if not re.fullmatch(r'[\d\s+\-.()]*\d[\d\s+\-.()]*', query):
+        return query
+    digits = re.sub(r'\D', '', query)
+    if digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    return digits
+
+
+def match_expression(query):
+    '''
+    Turns user input into an FTS5 query: every word must match the start
+    of a word of the document. Returns None when there is no word.
+    '''
+    words = re.findall(r'\w+', normalise_query(query).lower())
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_documents(query, types=None, limit=DEFAULT_LIMIT, offset=0):
+    '''
+    Returns [(type, object_id)] for the documents matching query, best
+    match first. Falls back to icontains when there is no FTS table.
+    '''
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    limit = min(limit, MAX_LIMIT)
+
+    if not has_fts():
+        query = normalise_query(query)
+        documents = SearchDocument.objects.filter(
+            models.Q(title__icontains=query) | models.Q(keywords__icontains=query))
+        if types:
+            documents = documents.filter(type__in=types)
+        return list(documents.order_by('title', 'pk').values_list(
+            'type', 'object_id')[offset:offset + limit])
+
+    # Only the page of best matches is joined to the documents
+    sql = (
+        f'SELECT rowid, bm25({FTS_TABLE}, {TITLE_WEIGHT}, {KEYWORDS_WEIGHT}) AS score '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [expression]
+    if types:
+        sql += (
+            f' AND rowid IN (SELECT id FROM {SearchDocument._meta.db_table}'
+            f' WHERE type IN ({", ".join(["%s"] * len(types))}))'
+        )
+        params += list(types)
+    sql = (
+        f'SELECT d.type, d.object_id FROM ({sql} ORDER BY score, rowid LIMIT %s OFFSET %s) m '
+        f'JOIN {SearchDocument._meta.db_table} d ON d.id = m.rowid ORDER BY m.score, m.rowid'
+    )
+    params += [limit, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def suggest(query, types=None, limit=SUGGEST_LIMIT):
+    '''
+    Returns up to limit {type, id, label} dicts for a search box. id is
+    what the matching get endpoint takes: the student ID for students
+    and the pk for teachers and admins. Results are cached in process
+    until the index changes.
+    '''
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    version = get_versions(INDEX_VERSION)[INDEX_VERSION]
+    return _suggest(version, expression, tuple(sorted(types or [])), min(limit, MAX_SUGGEST_LIMIT))
+
+
+@lru_cache(maxsize=2048)
+def _suggest(version, expression, types, limit):
+    table = SearchDocument._meta.db_table
+    if has_fts():
+        sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        params = [expression]
+        if types:
+            sql += f' AND rowid IN (SELECT id FROM {table} WHERE type IN ({", ".join(["%s"] * len(types))}))'
+            params += list(types)
+        sql = (
+            f'SELECT d.type, d.object_id, d.title, d.detail FROM ('
+            f'{sql} ORDER BY rowid DESC LIMIT %s) m JOIN {table} d ON d.id = m.rowid'
+        )
+        params.append(SUGGEST_CANDIDATES)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            candidates = cursor.fetchall()
+    else:
+        words = [word.strip('"*') for word in expression.split()]
+        documents = SearchDocument.objects.all()
+        for word in words:
+            documents = documents.filter(
+                models.Q(title__icontains=word) | models.Q(keywords__icontains=word))
+        if types:
+            documents = documents.filter(type__in=types)
+        candidates = list(documents.order_by('-pk').values_list(
+            'type', 'object_id', 'title', 'detail')[:SUGGEST_CANDIDATES])
+
+    # Titles starting with the first word come first, then the shortest
+    first_word = expression.split()[0].strip('"*')
+    candidates.sort(key=lambda row: (
+        not normalise(row[2]).startswith(first_word), len(row[2])))
+
+    return [
+        {
+            'type': type,
+            'id': detail if type == 'student' else object_id,
+            'label': f'{title} ({detail})' if detail else title,
+        } for type, object_id, title, detail in candidates[:limit]
+    ]
+
+
+def normalise(text):
+    '''Lower case without accents, as the unicode61 tokenizer sees it'''
+    return ''.join(
+        char for char in unicodedata.normalize('NFKD', text.lower())
+        if not unicodedata.combining(char))
@@ -0,0 +1,128 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from absences.models import StudentAbsence, TeacherAbsence
+from accounts.models import User
+from classes.models import SchoolClass
+from jobs.signals import media_uploaded
+from marks.models import Mark
+from marks.signals import mark_sheet_saved
+from students.models import Student
+from teachers.models import Teacher
+from years.models import Year
+from .cache import bump_versions
+from .dashboard import dashboard_changed
+from .search import index_documents, remove_documents, student_document, user_document
+from .statistics import class_version_name, slice_version_name
+
+
+@receiver(post_save, sender=Mark)
+@receiver(post_delete, sender=Mark)
+def invalidate_mark_statistics(sender, instance, **kwargs):
+    if Mark.student.is_cached(instance):
+        class_id = instance.student.student_class_id
+    else:
+        class_id = Student.objects.filter(
+            pk=instance.student_id).values_list('student_class_id', flat=True).first()
+
+    if class_id is not None:
+        bump_versions(slice_version_name(
+            class_id, instance.subject_id, instance.sequence_id))
+
+
+@receiver(mark_sheet_saved, sender=Mark)
+def invalidate_mark_sheet_statistics(sender, student_ids, subject, sequence, **kwargs):
+    class_ids = Student.objects.filter(pk__in=student_ids).values_list(
+        'student_class_id', flat=True).distinct()
+    bump_versions(*[
+        slice_version_name(class_id, subject.pk, sequence.pk) for class_id in class_ids
+    ])
+
+
+@receiver(pre_save, sender=Student)
+def remember_student_class(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_student_class_id = Student.objects.filter(
+            pk=instance.pk).values_list('student_class_id', flat=True).first()
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_statistics(sender, instance, **kwargs):
+    # Names, genders and images of a class appear in its statistics
+    class_ids = {instance.student_class_id}
+    old_class_id = getattr(instance, '_old_student_class_id', None)
+    if old_class_id is not None:
+        class_ids.add(old_class_id)
+    bump_versions(*[class_version_name(class_id) for class_id in class_ids])
+
+
+@receiver(media_uploaded, sender=Student)
+def invalidate_student_image(sender, object_id, **kwargs):
+    # Pictures are set with an UPDATE by the media worker
+    class_id = Student.objects.filter(
+        pk=object_id).values_list('student_class_id', flat=True).first()
+    if class_id is not None:
+        bump_versions(class_version_name(class_id))
+    dashboard_changed()
+
+
+# Dashboard snapshot, bulk writes call dashboard_changed themselves
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=SchoolClass)
+@receiver(post_delete, sender=SchoolClass)
+@receiver(post_save, sender=Year)
+@receiver(post_delete, sender=Year)
+@receiver(post_save, sender=StudentAbsence)
+@receiver(post_delete, sender=StudentAbsence)
+@receiver(post_save, sender=TeacherAbsence)
+@receiver(post_delete, sender=TeacherAbsence)
+def invalidate_dashboard(sender, update_fields=None, **kwargs):
+    # Logging in only saves last_login, which the dashboard does not show
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    dashboard_changed()
+
+
+# Search index, bulk creates of students call index_students themselves.
+# Only the latest enrolment of a student is indexed.
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, **kwargs):
+    if not Student.objects.filter(previous_enrolment_id=instance.pk).exists():
+        index_documents([student_document(instance)])
+
+
+@receiver(post_save, sender=Teacher)
+def index_teacher(sender, instance, **kwargs):
+    index_documents([user_document('teacher', instance)])
+
+
+@receiver(post_save, sender=User)
+def index_admin(sender, instance, **kwargs):
+    if instance.is_admin:
+        index_documents([user_document('admin', instance)])
+    else:
+        remove_documents('admin', instance.pk)
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    remove_documents('student', instance.pk)
+    previous = Student.objects.filter(pk=instance.previous_enrolment_id).first()
+    if previous is not None:
+        index_documents([student_document(previous)])
+
+
+@receiver(post_delete, sender=Teacher)
+def unindex_teacher(sender, instance, **kwargs):
+    remove_documents('teacher', instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def unindex_admin(sender, instance, **kwargs):
+    remove_documents('admin', instance.pk)
@@ -0,0 +1,295 @@
+import statistics as stats
+from array import array
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Avg, Count, F, FloatField, Q, Window
+from django.db.models.functions import Cast, RowNumber
+
+from marks.grading import get_grading_scheme
+from marks.models import Mark
+from .cache import get_or_compute_many, get_versions
+
+DEFAULT_PASS_MARK = Decimal(10)
+TOP_COUNT = 3
+
+
+def parse_pass_mark(value):
+    '''Parses the pass_mark query param. Raises ValueError when invalid.'''
+    if value in (None, ''):
+        return DEFAULT_PASS_MARK
+
+    try:
+        pass_mark = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f'"{value}" is not a valid pass mark.')
+
+    if not pass_mark.is_finite() or pass_mark < 0 or pass_mark > 20:
+        raise ValueError(f'{value} is not a valid pass mark. Mark range (0 to 20)')
+    return pass_mark
+
+
+def percentage(part, total):
+    return round((part / total) * 100, 2) if total > 0 else None
+
+
+def student_score(mark):
+    return {
+        'id': mark.student.pk,
+        'name': mark.student.name,
+        'score': mark.score,
+        'gender': mark.student.gender,
+        'student_id': mark.student.student_id,
+        'image': mark.student.get_image_url()
+    }
+
+
+def get_subjects_statistics(school_class, sequence, subjects, pass_mark=DEFAULT_PASS_MARK):
+    '''
+    Returns {subject_id: statistics} for the marks of a class in a
+    sequence. The counts and averages of every subject come from one
+    grouped conditional aggregate, and the best and last three students
+    of every subject from one window query.
+    '''
+    subject_ids = [subject.pk for subject in subjects]
+    marks = Mark.objects.filter(
+        student__student_class=school_class,
+        subject_id__in=subject_ids,
+        sequence=sequence
+    )
+
+    passed = Q(score__gte=pass_mark)
+    male = Q(student__gender='Male')
+    female = Q(student__gender='Female')
+    totals = {
+        row['subject_id']: row for row in marks.values('subject_id').annotate(
+            total_students=Count('id'),
+            total_male_students=Count('id', filter=male),
+            total_female_students=Count('id', filter=female),
+            pass_students=Count('id', filter=passed),
+            male_pass_students=Count('id', filter=passed & male),
+            female_pass_students=Count('id', filter=passed & female),
+            average_score=Avg('score'),
+        ).order_by()
+    }
+
+    # Number the marks of each subject from both ends, keep the first three of each
+    ranked = marks.select_related('student').annotate(
+        best_rank=Window(
+            RowNumber(), partition_by=F('subject_id'),
+            order_by=[F('score').desc(), F('student__name').asc()]),
+        last_rank=Window(
+            RowNumber(), partition_by=F('subject_id'),
+            order_by=[F('score').asc(), F('student__name').asc()]),
+    ).filter(Q(best_rank__lte=TOP_COUNT) | Q(last_rank__lte=TOP_COUNT))
+
+    best_students = {subject_id: [] for subject_id in subject_ids}
+    last_students = {subject_id: [] for subject_id in subject_ids}
+    for mark in ranked:
+        if mark.best_rank <= TOP_COUNT:
+            best_students[mark.subject_id].append(mark)
+        if mark.last_rank <= TOP_COUNT:
+            last_students[mark.subject_id].append(mark)
+
+    statistics = {}
+    for subject in subjects:
+        counts = totals.get(subject.pk, {})
+        total_students = counts.get('total_students', 0)
+        total_male_students = counts.get('total_male_students', 0)
+        total_female_students = counts.get('total_female_students', 0)
+        pass_students = counts.get('pass_students', 0)
+        male_pass_students = counts.get('male_pass_students', 0)
+        female_pass_students = counts.get('female_pass_students', 0)
+
+        pass_percentage = percentage(pass_students, total_students)
+        male_pass_percentage = percentage(
+            male_pass_students, total_male_students)
+        female_pass_percentage = percentage(
+            female_pass_students, total_female_students)
+
+        average_score = counts.get('average_score')
+        best = sorted(best_students[subject.pk], key=lambda m: m.best_rank)
+        # The last three are listed from the highest score, like the best three
+        last = sorted(last_students[subject.pk],
+                      key=lambda m: (-m.score, m.student.name))
+
+        statistics[subject.pk] = {
+            'subject': subject.short_name,
+            'class_obj': school_class.name,
+            'sequence': sequence.short_name,
+            'pass_mark': float(pass_mark),
+            'enrolment': {
+                'total_students': total_students,
+                'total_male_students': total_male_students,
+                'total_female_students': total_female_students,
+            },
+            'passes': {
+                'pass_students': pass_students,
+                'male_pass_students': male_pass_students,
+                'female_pass_students': female_pass_students,
+            },
+            'pass_percentages': {
+                'pass_percentage': pass_percentage,
+                'male_pass_percentage': male_pass_percentage,
+                'female_pass_percentage': female_pass_percentage,
+            },
+            'fails': {
+                'fail_students': total_students - pass_students,
+                'male_fail_students': total_male_students - male_pass_students,
+                'female_fail_students': total_female_students - female_pass_students,
+            },
+            'fail_percentages': {
+                'fail_percentage': round(100 - pass_percentage, 2) if total_students > 0 else None,
+                'male_fail_percentage': round(100 - male_pass_percentage, 2) if total_male_students > 0 else None,
+                'female_fail_percentage': round(100 - female_pass_percentage, 2) if total_female_students > 0 else None,
+            },
+            'average_score': round(float(average_score), 2) if average_score is not None else None,
+            'best_three_students': [student_score(mark) for mark in best],
+            'last_three_students': [student_score(mark) for mark in last],
+        }
+    return statistics
+
+
+def class_version_name(class_id):
+    return f'statistics:{class_id}'
+
+
+def slice_version_name(class_id, subject_id, sequence_id):
+    return f'statistics:{class_id}:{subject_id}:{sequence_id}'
+
+
+def get_cached_subjects_statistics(school_class, sequence, subjects, pass_mark=DEFAULT_PASS_MARK):
+    '''
+    Cached get_subjects_statistics. Entries are keyed on (class, subject,
+    sequence, pass mark) and the versions of the class and of that slice,
+    which the signals in others.signals bump when its marks or students
+    change. Missing subjects are computed together, once.
+    '''
+    class_version = class_version_name(school_class.pk)
+    slice_versions = {
+        subject.pk: slice_version_name(school_class.pk, subject.pk, sequence.pk)
+        for subject in subjects
+    }
+    versions = get_versions(class_version, *slice_versions.values())
+
+    keys = {
+        f'{slice_versions[subject.pk]}:{float(pass_mark)}:'
+        f'{versions[class_version]}:{versions[slice_versions[subject.pk]]}': subject
+        for subject in subjects
+    }
+
+    def compute(missing):
+        statistics = get_subjects_statistics(
+            school_class, sequence, [keys[key] for key in missing], pass_mark)
+        return {key: statistics[keys[key].pk] for key in missing}
+
+    values = get_or_compute_many(list(keys), compute)
+
+    statistics = {}
+    for key, subject in keys.items():
+        # Names are not part of the key, take them from the current rows
+        statistics[subject.pk] = {
+            **values[key],
+            'subject': subject.short_name,
+            'class_obj': school_class.name,
+            'sequence': sequence.short_name,
+        }
+    return statistics
+
+
+def describe_scores(scores, level):
+    '''
+    Summarizes an array of scores: histogram by grade of the level,
+    mean, median, quartiles and standard deviation (population).
+    This is plain Python: the scores are held compactly in an array of
+    doubles, but sorting and the statistics module loop over them one
+    by one. That is fine for the marks of a class or a level; NumPy,
+    which would vectorize it, does not fit in the deployment size limit.
+    '''
+    count = len(scores)
+    histogram = get_grading_scheme(level).histogram(scores)
+    if not count:
+        return {
+            'count': 0, 'mean': None, 'median': None, 'minimum': None, 'maximum': None,
+            'quartiles': None, 'standard_deviation': None, 'histogram': histogram,
+        }
+
+    ordered = sorted(scores)
+    mean = stats.fmean(ordered)
+    if count > 1:
+        q1, q2, q3 = stats.quantiles(ordered, n=4, method='inclusive')
+    else:
+        q1 = q2 = q3 = ordered[0]
+
+    return {
+        'count': count,
+        'mean': round(mean, 2),
+        'median': round(q2, 2),
+        'minimum': ordered[0],
+        'maximum': ordered[-1],
+        'quartiles': {'q1': round(q1, 2), 'q2': round(q2, 2), 'q3': round(q3, 2)},
+        'standard_deviation': round(stats.pstdev(ordered, mean), 2),
+        'histogram': histogram,
+    }
+
+
+def z_score(value, mean, standard_deviation):
+    return round((value - mean) / standard_deviation, 2) if standard_deviation else 0.0
+
+
+def get_class_distribution(school_class, subject, sequence):
+    '''Distribution of a subject's marks in a class, with each student's z-score'''
+    rows = list(Mark.objects.filter(
+        student__student_class=school_class, subject=subject, sequence=sequence
+    ).annotate(value=Cast('score', FloatField())).values_list(
+        'student__student_id', 'student__name', 'value').order_by('-score', 'student__name'))
+
+    scores = array('d', (value for _, _, value in rows))
+    distribution = describe_scores(scores, subject.level)
+
+    if scores:
+        mean = stats.fmean(scores)
+        deviation = stats.pstdev(scores, mean)
+    distribution['z_scores'] = [
+        {
+            'student_id': student_id,
+            'name': name,
+            'score': value,
+            'z_score': z_score(value, mean, deviation),
+        } for student_id, name, value in rows
+    ]
+    return distribution
+
+
+def get_level_distribution(classes, subject, sequence):
+    '''
+    Distribution of a subject's marks across classes, with the z-score of
+    each class mean against the marks of all the classes.
+    '''
+    class_scores = {school_class.pk: array('d') for school_class in classes}
+    for class_id, value in Mark.objects.filter(
+            student__student_class__in=class_scores.keys(), subject=subject, sequence=sequence
+    ).annotate(value=Cast('score', FloatField())).values_list(
+            'student__student_class_id', 'value').order_by():
+        class_scores[class_id].append(value)
+
+    scores = array('d')
+    for values in class_scores.values():
+        scores.extend(values)
+    distribution = describe_scores(scores, subject.level)
+
+    if scores:
+        mean = stats.fmean(scores)
+        deviation = stats.pstdev(scores, mean)
+    distribution['classes'] = []
+    for school_class in classes:
+        values = class_scores[school_class.pk]
+        class_mean = stats.fmean(values) if values else None
+        distribution['classes'].append({
+            'id': school_class.pk,
+            'name': school_class.name,
+            'count': len(values),
+            'mean': round(class_mean, 2) if values else None,
+            'median': round(stats.median(values), 2) if values else None,
+            'z_score': z_score(class_mean, mean, deviation) if values else None,
+        })
+    return distribution
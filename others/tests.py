@@ -1,3 +1,41 @@
+import datetime
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from classes.models import SchoolClass
+from students.models import Student
+from years.models import Year
+from .search import match_expression, search_documents
+
+
+class PhoneSearchTests(TestCase):
+
+    def setUp(self):
+        school_class = SchoolClass.objects.create(
+            name='Form 1', short_name='F1',
+            year=Year.objects.create(name='2024/2025'), level='Ordinary')
+        self.student = Student.objects.create(
+            name='Ngono Marie', student_class=school_class,
+            date_of_birth=datetime.date(2012, 1, 1), student_id='FAS24001',
+            gender='Female', parent_phone='+237677123456')
+        Student.objects.create(
+            name='Abena Paul', student_class=school_class,
+            date_of_birth=datetime.date(2012, 1, 1), student_id='FAS24002',
+            gender='Male', parent_phone='+237699000000')
+
+    def test_phone_queries_become_national_digits(self):
+        for query in ['6 77 12 34 56', '677 12 34', '+237 6 77 12 34 56', '(237) 677-12.34']:
+            self.assertEqual(match_expression(query)[1:7], '677123')
+        self.assertEqual(match_expression('Ngono 2024'), '"ngono"* "2024"*')
+
+    def test_spaced_national_queries_find_the_student(self):
+        for query in ['6 77 12 34 56', '677 12 34', '+237 677 12 34 56']:
+            self.assertEqual(
+                search_documents(query), [('student', self.student.pk)], query)
+
+    def test_spaced_national_queries_without_fts(self):
+        with mock.patch('others.search.has_fts', return_value=False):
+            for query in ['6 77 12 34 56', '677 12 34', '+237 677 12 34 56']:
+                self.assertEqual(
+                    search_documents(query), [('student', self.student.pk)], query)
@@ -4,6 +4,13 @@ from . import views
 urlpatterns = [
     path('dashboard/', views.dashboard),
     path('search/', views.search),
+    path('search/suggest/', views.search_suggestions),
     path('get_class_statistics_for_a_subject/<int:class_id>/<int:subject_id>/<int:sequence_id>/',
          views.get_class_statistics_for_a_subject),
+    path('get_class_statistics_for_all_subjects/<int:class_id>/<int:sequence_id>/',
+         views.get_class_statistics_for_all_subjects),
+    path('get_class_mark_distribution/<int:class_id>/<int:subject_id>/<int:sequence_id>/',
+         views.get_class_mark_distribution),
+    path('get_level_mark_distribution/<str:level>/<int:subject_id>/<int:sequence_id>/',
+         views.get_level_mark_distribution),
 ]
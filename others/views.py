@@ -1,4 +1,3 @@
-from django.db.models import Count, Q, Avg
 from django.utils.translation import gettext as _
 
 from rest_framework import status
@@ -8,111 +7,86 @@ from rest_framework.response import Response
 
 from knox.auth import TokenAuthentication
 
-from absences.models import TeacherAbsence, StudentAbsence
 from accounts.permissions import IsAdminUser
 from accounts.serializers import GetAdminUserSerializer
 from accounts.models import User
-from classes.models import SchoolClass
-from marks.models import Mark
+from classes.models import SchoolClass, levels
 from sequences.models import Sequence
 from students.models import Student
 from subjects.models import Subject
 from teachers.models import Teacher
 from teachers.serializers import GetTeacherSerializer
-from years.models import Year
 
 from students.serializers import GetStudentSerializer
 
+from .dashboard import get_dashboard
+from .models import TYPES
+from .search import DEFAULT_LIMIT, SUGGEST_LIMIT, search_documents, suggest
+from .statistics import (
+    get_cached_subjects_statistics,
+    get_class_distribution,
+    get_level_distribution,
+    parse_pass_mark
+)
+
 
 @api_view(http_method_names=["GET"])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def dashboard(request):
-    response_data = {}
+    # A cached snapshot, invalidated by the signals in others.signals
+    return Response(get_dashboard(), status=status.HTTP_200_OK)
 
-    # Admins
-    admins_count = User.objects.filter(is_admin=True).aggregate(
-        total=Count('id'),
-        males=Count('id', filter=Q(gender='Male')),
-        females=Count('id', filter=Q(gender='Female'))
-    )
 
+@api_view(http_method_names=["GET"])
+@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+def get_class_statistics_for_a_subject(request, class_id, subject_id, sequence_id):
     try:
-        current_active_year = Year.objects.get(is_active=True)
-    except Year.DoesNotExist:
-        response_data["students"] = {'total': 0, 'gender': [
-            {'name': "Students", "male": 0, "female": 0}]}
-        response_data["admins"] = {'total': admins_count['total'], 'gender': [
-            {'name': "Admins", 'male': admins_count['males'], 'female': admins_count['females']}]}
-        response_data["teachers"] = {'total': 0, 'gender': [
-            {'name': "Teachers", "male": 0, "female": 0}]}
-        response_data["absences"] = [
-            {'name': 'Teachers', 'value': 0},
-            {'name': 'Students', 'value': 0},
-        ]
-        response_data["last_five_students_registered"] = []
-        response_data["classes"] = []
-        return Response(response_data, status=status.HTTP_200_OK)
-
-    # Students of current active year
-    students_count = Student.objects.filter(
-        student_class__year_id=current_active_year.id).aggregate(
-        total=Count('id'),
-        males=Count('id', filter=Q(gender='Male')),
-        females=Count('id', filter=Q(gender='Female'))
-    )
-
-    # Teachers
-    teachers_count = Teacher.objects.all().aggregate(
-        total=Count('id'),
-        males=Count('id', filter=Q(gender='Male')),
-        females=Count('id', filter=Q(gender='Female'))
-    )
-
-    # Absences
-    teacher_absences = TeacherAbsence.objects.filter(
-        period__school_class__year=current_active_year
-    ).aggregate(total=Count('id'))
-    student_absences = StudentAbsence.objects.filter(
-        student__student_class__year_id=current_active_year.id).aggregate(total=Count('id'))
-    absences_count = [
-        {'name': 'Teachers', 'value': teacher_absences['total']},
-        {'name': 'Students', 'value': student_absences['total']}
-    ]
-
-    # Last Five registered students
-    last_five_students = Student.objects.filter(
-        student_class__year_id=current_active_year.id).order_by('-id')[:5]
-    serializer = GetStudentSerializer(last_five_students, many=True)
-
-    # Classes(of active year) and total students count and male and female students count
-    classes_data = SchoolClass.objects.filter(year_id=current_active_year.id).annotate(
-        total=Count('student'),
-        males=Count('student', filter=Q(student__gender='Male')),
-        females=Count('student', filter=Q(student__gender='Female')),
-    ).values('id', 'short_name', 'males', 'females', 'total')
-
-    # Response Data
-    response_data["students"] = {'total': students_count['total'], 'gender': [
-        {'name': "Students", 'male': students_count['males'], 'female': students_count['females']}]}
-
-    response_data["admins"] = {'total': admins_count['total'], 'gender': [
-        {'name': "Admins", 'male': admins_count['males'], 'female': admins_count['females']}]}
-
-    response_data["teachers"] = {'total': teachers_count['total'], 'gender': [
-        {'name': "Teachers", 'male': teachers_count['males'], 'female': teachers_count['females']}]}
-
-    response_data["absences"] = absences_count
-    response_data["last_five_students_registered"] = serializer.data
-    response_data["classes"] = list(classes_data)
+        pass_mark = parse_pass_mark(request.GET.get('pass_mark'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
 
-    return Response(response_data, status=status.HTTP_200_OK)
+    # Get the sequence
+    try:
+        sequence_obj = Sequence.objects.get(id=sequence_id)
+    except Sequence.DoesNotExist:
+        error = ["Sequence not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    # Get the class
+    try:
+        class_obj = SchoolClass.objects.get(id=class_id)
+    except SchoolClass.DoesNotExist:
+        error = ["Class not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    # Get the subject
+    try:
+        subject_obj = Subject.objects.get(id=subject_id)
+    except Subject.DoesNotExist:
+        error = ["Subject not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    # Check to see if the subject is offered in the said class
+    if not class_obj.periods.filter(subject=subject_obj).exists():
+        msg = ['The subject is not taught in this class']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    statistics = get_cached_subjects_statistics(
+        class_obj, sequence_obj, [subject_obj], pass_mark)
+    return Response(statistics[subject_obj.pk], status=status.HTTP_200_OK)
 
 
 @api_view(http_method_names=["GET"])
 @permission_classes([IsAuthenticated])
 @authentication_classes([TokenAuthentication])
-def get_class_statistics_for_a_subject(request, class_id, subject_id, sequence_id):
+def get_class_statistics_for_all_subjects(request, class_id, sequence_id):
+    try:
+        pass_mark = parse_pass_mark(request.GET.get('pass_mark'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
     # Get the sequence
     try:
         sequence_obj = Sequence.objects.get(id=sequence_id)
@@ -127,154 +101,175 @@ def get_class_statistics_for_a_subject(request, class_id, subject_id, sequence_i
         error = ["Class not found"]
         return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
 
-    # Get the subject
+    # Subjects taught in the class
+    subjects = list(Subject.objects.filter(
+        periods__school_class=class_obj).distinct().order_by('name'))
+
+    statistics = get_cached_subjects_statistics(
+        class_obj, sequence_obj, subjects, pass_mark)
+
+    response_data = {
+        'class_obj': class_obj.name,
+        'sequence': sequence_obj.short_name,
+        'pass_mark': float(pass_mark),
+        'subjects': [statistics[subject.pk] for subject in subjects],
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=["GET"])
+@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+def get_class_mark_distribution(request, class_id, subject_id, sequence_id):
+    try:
+        sequence_obj = Sequence.objects.get(id=sequence_id)
+    except Sequence.DoesNotExist:
+        error = ["Sequence not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        class_obj = SchoolClass.objects.get(id=class_id)
+    except SchoolClass.DoesNotExist:
+        error = ["Class not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
     try:
         subject_obj = Subject.objects.get(id=subject_id)
     except Subject.DoesNotExist:
         error = ["Subject not found"]
         return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
 
-    # Check to see if the subject is offered in the said class
     if not class_obj.periods.filter(subject=subject_obj).exists():
         msg = ['The subject is not taught in this class']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
-    # Get Marks for students that offer the subject in that class for the given sequence
-    marks = Mark.objects.filter(
-        student__student_class=class_obj,
-        subject=subject_obj,
-        sequence=sequence_obj
-    )
-
-    # Get total students that offer the subject i.e those with the marks
-    total_students = marks.values_list('student', flat=True).distinct().count()
-    # Get total male students
-    total_male_students = marks.filter(
-        student__gender='Male').distinct().count()
-    # Get total female students
-    total_female_students = marks.filter(
-        student__gender='Female').distinct().count()
-
-    # PASS AND PERCENTAGE PASS
-    pass_score = 10
-    # Get total students that had a score gte the pass_score
-    pass_students = marks.filter(score__gte=pass_score).distinct().count()
-    # Get the male students who passed
-    male_pass_students = marks.filter(
-        score__gte=pass_score, student__gender='Male').distinct().count()
-    # Get the female student who passed
-    female_pass_students = marks.filter(
-        score__gte=pass_score, student__gender='Female').distinct().count()
-
-    # Calculate the pass percentage
-    pass_percentage = round((pass_students / total_students)
-                            * 100, 2) if total_students > 0 else None
-    # Calculate the male pass percentage
-    male_pass_percentage = round(
-        (male_pass_students / total_male_students) * 100, 2) if total_male_students > 0 else None
-    # Calculate the female pass percentage
-    female_pass_percentage = round(
-        (female_pass_students / total_female_students) * 100, 2) if total_female_students > 0 else None
-
-    # FAIL AND PERCENTAGE FAIL
-    # Get total students that failed
-    fail_students = total_students - pass_students
-    # Get the male students who failed
-    male_fail_students = total_male_students - male_pass_students
-    # Get the female students who failed
-    female_fail_students = total_female_students - female_pass_students
-
-    # Calculate the fail percentage
-    fail_percentage = 100 - pass_percentage if total_students > 0 else None
-    # Calculate the male fail percentage
-    male_fail_percentage = 100 - male_pass_percentage if total_male_students > 0 else None
-    # Calculate the female fail percentage
-    female_fail_percentage = 100 - \
-        female_pass_percentage if total_female_students > 0 else None
-
-    # Calculate the average mark score of the class in the subject
-    average_score = marks.aggregate(
-        Avg('score'))['score__avg'] if marks.exists() else None
-
-    # Get best three students, ordering in descending order
-    best_three_students = [
-        {'id': m.student.pk,
-            'name': m.student.name,
-            'score': m.score,
-            'gender': m.student.gender,
-            'student_id': m.student.student_id,
-            'image': m.student.get_image_url()
-         } for m in marks.order_by('-score')[:3]
-    ]
-    # Get last three students, ordering in descending order
-    last_three_students = sorted([
-        {
-            'id': m.student.pk,
-            'name': m.student.name,
-            'score': m.score,
-            'gender': m.student.gender,
-            'student_id': m.student.student_id,
-            'image': m.student.get_image_url()
-        } for m in marks.order_by('score')[:3]
-    ], key=lambda obj: obj['score'], reverse=True)
-
-    # Response data
     response_data = {
         'subject': subject_obj.short_name,
         'class_obj': class_obj.name,
         'sequence': sequence_obj.short_name,
-        'enrolment': {
-            'total_students': total_students,
-            'total_male_students': total_male_students,
-            'total_female_students': total_female_students,
-        },
-        'passes': {
-            'pass_students': pass_students,
-            'male_pass_students': male_pass_students,
-            'female_pass_students': female_pass_students,
-        },
-        'pass_percentages': {
-            'pass_percentage': pass_percentage,
-            'male_pass_percentage': male_pass_percentage,
-            'female_pass_percentage': female_pass_percentage,
-        },
-        'fails': {
-            'fail_students': fail_students,
-            'male_fail_students': male_fail_students,
-            'female_fail_students': female_fail_students,
-        },
-        'fail_percentages': {
-            'fail_percentage': fail_percentage,
-            'male_fail_percentage': male_fail_percentage,
-            'female_fail_percentage': female_fail_percentage,
-        },
-        'average_score': round(float(average_score.to_eng_string()), 2) if average_score else None,
-        'best_three_students': best_three_students,
-        'last_three_students': last_three_students
+        **get_class_distribution(class_obj, subject_obj, sequence_obj)
     }
+    return Response(response_data, status=status.HTTP_200_OK)
 
+
+@api_view(http_method_names=["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@authentication_classes([TokenAuthentication])
+def get_level_mark_distribution(request, level, subject_id, sequence_id):
+    if level not in dict(levels):
+        msg = [f'{level} is not a valid level.']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        sequence_obj = Sequence.objects.select_related(
+            'term').get(id=sequence_id)
+    except Sequence.DoesNotExist:
+        error = ["Sequence not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        subject_obj = Subject.objects.get(id=subject_id)
+    except Subject.DoesNotExist:
+        error = ["Subject not found"]
+        return Response({"error": error}, status=status.HTTP_404_NOT_FOUND)
+
+    # Classes of the level, in the sequence's year, where the subject is taught
+    classes = SchoolClass.objects.filter(
+        level=level,
+        year_id=sequence_obj.term.year_id,
+        periods__subject=subject_obj
+    ).distinct().order_by('name')
+
+    response_data = {
+        'subject': subject_obj.short_name,
+        'level': level,
+        'sequence': sequence_obj.short_name,
+        **get_level_distribution(list(classes), subject_obj, sequence_obj)
+    }
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+def parse_search_types(types):
+    '''Parses the ?type= query param (comma separated), [] when missing'''
+    types = [name.strip() for name in (types or '').split(',') if name.strip()]
+    unknown = set(types) - {name for name, _ in TYPES}
+    if unknown:
+        raise ValueError(f'Unknown types: {", ".join(sorted(unknown))}')
+    return types
+
+
 @api_view(http_method_names=['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 @authentication_classes([TokenAuthentication])
 def search(request):
-    search = request.GET.get('query', None)
+    '''
+    Ranked search of students, teachers and admins by name, student ID
+    or phone number. ?type= limits the kinds of results (comma separated),
+    ?limit= (at most 50) and ?offset= page through them.
+    '''
+    query = request.GET.get('query', None)
     results = []
 
-    if search:
-        students = Student.objects.filter(
-            name__icontains=search) | Student.objects.filter(student_id__icontains=search)
-        teachers = Teacher.objects.filter(
-            name__icontains=search) | Teacher.objects.filter(phone__icontains=search)
-        admins = User.objects.filter(is_admin=True, name__icontains=search) | User.objects.filter(
-            is_admin=True, phone__icontains=search)
-
-        students_data = GetStudentSerializer(students, many=True).data
-        teachers_data = GetTeacherSerializer(teachers, many=True).data
-        admins_data = GetAdminUserSerializer(admins, many=True).data
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+        offset = int(request.GET.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError
+    except ValueError:
+        msg = ['limit and offset must be positive numbers.']
+        return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
 
-        results = list(students_data) + list(teachers_data) + list(admins_data)
+    try:
+        types = parse_search_types(request.GET.get('type'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    if query:
+        matches = search_documents(query, types, limit=limit, offset=offset)
+        ids = {name: [] for name, _ in TYPES}
+        for name, object_id in matches:
+            ids[name].append(object_id)
+
+        # Only the matched page is loaded and serialized
+        serialized = {}
+        for student in GetStudentSerializer(Student.objects.filter(
+                pk__in=ids['student']).select_related('student_class'), many=True).data:
+            serialized[('student', student['id'])] = student
+        for teacher in GetTeacherSerializer(Teacher.objects.filter(
+                pk__in=ids['teacher']).select_related('department'), many=True).data:
+            serialized[('teacher', teacher['id'])] = teacher
+        for admin in GetAdminUserSerializer(User.objects.filter(
+                pk__in=ids['admin'], is_admin=True), many=True).data:
+            serialized[('admin', admin['id'])] = admin
+
+        for name, object_id in matches:
+            data = serialized.get((name, object_id))
+            if data is not None:
+                results.append({**data, 'type': name})
 
     return Response(results, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def search_suggestions(request):
+    '''
+    Up to ?limit= (at most 20) {type, id, label} suggestions for the
+    search box, matching the start of the words of ?query=
+    '''
+    try:
+        limit = int(request.GET.get('limit', SUGGEST_LIMIT))
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        msg = ['limit must be a positive number.']
+        return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        types = parse_search_types(request.GET.get('type'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    suggestions = suggest(request.GET.get('query', ''), types, limit=limit)
+    return Response(suggestions, status=status.HTTP_200_OK)
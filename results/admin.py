@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import (
+    ClassRanking,
+    StudentRanking,
+    StudentSequenceResult,
+    StudentTermResult,
+    StudentYearResult,
+    SubjectTermResult,
+    SubjectYearResult
+)
+
+admin.site.register(StudentSequenceResult)
+admin.site.register(SubjectTermResult)
+admin.site.register(StudentTermResult)
+admin.site.register(SubjectYearResult)
+admin.site.register(StudentYearResult)
+admin.site.register(ClassRanking)
+admin.site.register(StudentRanking)
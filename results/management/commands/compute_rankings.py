@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sequences.models import Sequence
+from terms.models import Term
+from years.models import Year
+from results.rankings import compute_school_rankings
+
+
+class Command(BaseCommand):
+    help = 'Computes and stores class rankings for a sequence, term or year'
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument('--sequence', type=int, help='Sequence id')
+        group.add_argument('--term', type=int, help='Term id')
+        group.add_argument('--year', type=int, help='Year id')
+
+    def handle(self, *args, **options):
+        try:
+            if options['sequence']:
+                scope = {'sequence': Sequence.objects.select_related(
+                    'term').get(pk=options['sequence'])}
+            elif options['term']:
+                scope = {'term': Term.objects.get(pk=options['term'])}
+            else:
+                scope = {'year': Year.objects.get(pk=options['year'])}
+        except (Sequence.DoesNotExist, Term.DoesNotExist, Year.DoesNotExist):
+            raise CommandError('The given period does not exist.')
+
+        rankings = compute_school_rankings(**scope)
+        for ranking in rankings:
+            self.stdout.write(
+                f'{ranking.school_class.name}: {ranking.students_ranked} students ranked')
+        self.stdout.write(self.style.SUCCESS(
+            f'Ranked {len(rankings)} classes.'))
@@ -0,0 +1,73 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classes.models import SchoolClass
+from terms.models import Term
+from results.report_cards import (
+    collect_class_report_cards,
+    render_report_cards,
+    stream_zip
+)
+
+
+class Command(BaseCommand):
+    help = 'Renders the report cards of a term for some classes or the whole school'
+
+    def add_arguments(self, parser):
+        parser.add_argument('term', type=int, help='Term id')
+        parser.add_argument(
+            '--class', type=int, action='append', dest='classes',
+            help='Only this class (repeatable). Defaults to every class of the year')
+        parser.add_argument(
+            '--output', default='report_cards',
+            help='Directory to write the PDFs to, or a path ending in .zip')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Rendering processes, defaults to REPORT_CARD_WORKERS or the CPU count')
+
+    def handle(self, *args, **options):
+        try:
+            term = Term.objects.select_related('year').get(pk=options['term'])
+        except Term.DoesNotExist:
+            raise CommandError('Term not found.')
+
+        classes = SchoolClass.objects.filter(year_id=term.year_id)
+        if options['classes']:
+            classes = classes.filter(pk__in=options['classes'])
+        classes = list(classes.order_by('name'))
+
+        def cards():
+            for school_class in classes:
+                class_cards = collect_class_report_cards(school_class, term)
+                self.stdout.write(
+                    f'{school_class.name}: {len(class_cards)} report cards queued')
+                yield from class_cards
+
+        rendered = render_report_cards(cards(), workers=options['workers'])
+        output = options['output']
+        count = 0
+
+        if output.endswith('.zip'):
+            with open(output, 'wb') as archive:
+                for chunk in stream_zip(self.counted(rendered)):
+                    archive.write(chunk)
+            count = self.rendered
+        else:
+            for filename, content in rendered:
+                path = os.path.join(output, filename)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as pdf:
+                    pdf.write(content)
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {count} report cards to {output}.'))
+
+    def counted(self, rendered):
+        self.rendered = 0
+        for item in rendered:
+            self.rendered += 1
+            if self.rendered % 100 == 0:
+                self.stdout.write(f'{self.rendered} report cards rendered')
+            yield item
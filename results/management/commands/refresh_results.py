@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from results.utils import refresh_results
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored sequence, term and year results from the marks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sequence', type=int, action='append', dest='sequences',
+            help='Only recompute the results affected by this sequence (repeatable)')
+
+    def handle(self, *args, **options):
+        refresh_results(sequence_ids=options['sequences'])
+        self.stdout.write(self.style.SUCCESS('Results refreshed.'))
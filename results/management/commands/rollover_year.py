@@ -0,0 +1,54 @@
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from years.models import Year
+from results.rollover import RolloverError, rollover_year
+
+
+class Command(BaseCommand):
+    help = 'Clones the classes of a year into the next one and enrols its students there'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_year', type=int, help='Year id to roll over')
+        parser.add_argument('target_year', type=int, help='Id of the new year')
+        parser.add_argument(
+            '--promote', action='append', default=[], metavar='FROM:TO',
+            help='Class short names, e.g. F1:F2 (repeatable). '
+                 'Passing students of classes without one finish school')
+        parser.add_argument(
+            '--pass-mark', default='10', help='Annual average needed to be promoted')
+
+    def handle(self, *args, **options):
+        try:
+            source_year = Year.objects.get(pk=options['source_year'])
+            target_year = Year.objects.get(pk=options['target_year'])
+        except Year.DoesNotExist:
+            raise CommandError('Year not found.')
+
+        promotions = {}
+        for promotion in options['promote']:
+            from_class, _, to_class = promotion.partition(':')
+            if not from_class or not to_class:
+                raise CommandError(f'"{promotion}" should look like F1:F2.')
+            promotions[from_class] = to_class
+
+        try:
+            pass_mark = Decimal(options['pass_mark'])
+        except InvalidOperation:
+            raise CommandError(f'"{options["pass_mark"]}" is not a valid pass mark.')
+
+        started = time.monotonic()
+        try:
+            counts = rollover_year(
+                source_year, target_year, promotions=promotions,
+                pass_mark=pass_mark, progress=self.stdout.write)
+        except RolloverError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled {source_year.name} over to {target_year.name} in '
+            f'{time.monotonic() - started:.2f}s: {counts["promoted"]} promoted, '
+            f'{counts["repeating"]} repeating, {counts["graduated"]} finished school, '
+            f'{counts["already_enrolled"]} already enrolled.'))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('students', '0001_initial'),
+        ('sequences', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSequenceResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weighted_total', models.DecimalField(decimal_places=3, max_digits=9)),
+                ('coefficient_sum', models.PositiveIntegerField()),
+                ('average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subject_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sequence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_results', to='sequences.sequence')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sequence_results', to='students.student')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='studentsequenceresult',
+            constraint=models.UniqueConstraint(fields=('student', 'sequence'), name='unique_student_sequence_result'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, DecimalField, F, Sum
+
+
+def backfill_sequence_results(apps, schema_editor):
+    Mark = apps.get_model('marks', 'Mark')
+    StudentSequenceResult = apps.get_model('results', 'StudentSequenceResult')
+
+    totals = Mark.objects.values('student_id', 'sequence_id').annotate(
+        weighted_total=Sum(
+            F('score') * F('subject__coefficient'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        coefficient_sum=Sum('subject__coefficient'),
+        subject_count=Count('id')
+    ).order_by()
+
+    StudentSequenceResult.objects.bulk_create([
+        StudentSequenceResult(
+            student_id=total['student_id'],
+            sequence_id=total['sequence_id'],
+            weighted_total=total['weighted_total'],
+            coefficient_sum=total['coefficient_sum'],
+            average=round(
+                total['weighted_total'] / total['coefficient_sum'], 2),
+            subject_count=total['subject_count']
+        ) for total in totals
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marks', '0002_mark_unique_student_subject_sequence'),
+        ('results', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_sequence_results, migrations.RunPython.noop),
+    ]
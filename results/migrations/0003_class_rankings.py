@@ -0,0 +1,64 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('terms', '0001_initial'),
+        ('years', '0001_initial'),
+        ('students', '0001_initial'),
+        ('classes', '0002_schoolclass_level'),
+        ('sequences', '0001_initial'),
+        ('results', '0002_backfill_sequence_results'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_average', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('highest_average', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('lowest_average', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('students_ranked', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='classes.schoolclass')),
+                ('sequence', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='sequences.sequence')),
+                ('term', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='terms.term')),
+                ('year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='years.year')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('ranking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='results.classranking')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='students.student')),
+            ],
+            options={
+                'ordering': ['position', 'student__name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='studentranking',
+            constraint=models.UniqueConstraint(fields=('ranking', 'student'), name='unique_ranking_student'),
+        ),
+        migrations.AddConstraint(
+            model_name='classranking',
+            constraint=models.UniqueConstraint(condition=models.Q(('sequence__isnull', False)), fields=('school_class', 'sequence'), name='unique_class_sequence_ranking'),
+        ),
+        migrations.AddConstraint(
+            model_name='classranking',
+            constraint=models.UniqueConstraint(condition=models.Q(('term__isnull', False)), fields=('school_class', 'term'), name='unique_class_term_ranking'),
+        ),
+        migrations.AddConstraint(
+            model_name='classranking',
+            constraint=models.UniqueConstraint(condition=models.Q(('year__isnull', False)), fields=('school_class', 'year'), name='unique_class_year_ranking'),
+        ),
+    ]
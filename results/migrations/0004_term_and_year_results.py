@@ -0,0 +1,88 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+        ('subjects', '0002_remove_subject_code_remove_subject_subject_type'),
+        ('terms', '0001_initial'),
+        ('years', '0001_initial'),
+        ('results', '0003_class_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectYearResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('term_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_year_results', to='students.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='year_results', to='subjects.subject')),
+                ('year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_results', to='years.year')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubjectTermResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('sequence_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_term_results', to='students.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_results', to='subjects.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_results', to='terms.term')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentYearResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weighted_total', models.DecimalField(decimal_places=3, max_digits=9)),
+                ('coefficient_sum', models.PositiveIntegerField()),
+                ('average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subject_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='year_results', to='students.student')),
+                ('year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_results', to='years.year')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentTermResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weighted_total', models.DecimalField(decimal_places=3, max_digits=9)),
+                ('coefficient_sum', models.PositiveIntegerField()),
+                ('average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subject_count', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_results', to='students.student')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_results', to='terms.term')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='subjectyearresult',
+            constraint=models.UniqueConstraint(fields=('student', 'subject', 'year'), name='unique_student_subject_year_result'),
+        ),
+        migrations.AddConstraint(
+            model_name='subjecttermresult',
+            constraint=models.UniqueConstraint(fields=('student', 'subject', 'term'), name='unique_student_subject_term_result'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentyearresult',
+            constraint=models.UniqueConstraint(fields=('student', 'year'), name='unique_student_year_result'),
+        ),
+        migrations.AddConstraint(
+            model_name='studenttermresult',
+            constraint=models.UniqueConstraint(fields=('student', 'term'), name='unique_student_term_result'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+from django.db import migrations
+from django.db.models import Count, DecimalField, F, Sum
+
+
+def backfill_term_and_year_results(apps, schema_editor):
+    # Results already computed since 0004 are overwritten with the same values
+    Mark = apps.get_model('marks', 'Mark')
+    SubjectTermResult = apps.get_model('results', 'SubjectTermResult')
+    StudentTermResult = apps.get_model('results', 'StudentTermResult')
+    SubjectYearResult = apps.get_model('results', 'SubjectYearResult')
+    StudentYearResult = apps.get_model('results', 'StudentYearResult')
+
+    totals = Mark.objects.values('student_id', 'subject_id', 'sequence__term_id').annotate(
+        weighted_total=Sum(
+            F('score') * F('sequence__weight'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        weight_sum=Sum('sequence__weight'),
+        sequence_count=Count('id')
+    ).order_by()
+    SubjectTermResult.objects.bulk_create([
+        SubjectTermResult(
+            student_id=total['student_id'],
+            subject_id=total['subject_id'],
+            term_id=total['sequence__term_id'],
+            average=round(total['weighted_total'] / total['weight_sum'], 2),
+            sequence_count=total['sequence_count']
+        ) for total in totals
+    ], batch_size=500, update_conflicts=True,
+        unique_fields=['student', 'subject', 'term'], update_fields=['average', 'sequence_count'])
+
+    totals = SubjectTermResult.objects.values('student_id', 'term_id').annotate(
+        weighted_total=Sum(
+            F('average') * F('subject__coefficient'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        coefficient_sum=Sum('subject__coefficient'),
+        subject_count=Count('id')
+    ).order_by()
+    StudentTermResult.objects.bulk_create([
+        StudentTermResult(
+            student_id=total['student_id'],
+            term_id=total['term_id'],
+            weighted_total=total['weighted_total'],
+            coefficient_sum=total['coefficient_sum'],
+            average=round(total['weighted_total'] / total['coefficient_sum'], 2),
+            subject_count=total['subject_count']
+        ) for total in totals
+    ], batch_size=500, update_conflicts=True,
+        unique_fields=['student', 'term'], update_fields=['weighted_total', 'coefficient_sum', 'average', 'subject_count'])
+
+    totals = SubjectTermResult.objects.values('student_id', 'subject_id', 'term__year_id').annotate(
+        total=Sum('average'),
+        term_count=Count('id')
+    ).order_by()
+    SubjectYearResult.objects.bulk_create([
+        SubjectYearResult(
+            student_id=total['student_id'],
+            subject_id=total['subject_id'],
+            year_id=total['term__year_id'],
+            average=round(total['total'] / total['term_count'], 2),
+            term_count=total['term_count']
+        ) for total in totals
+    ], batch_size=500, update_conflicts=True,
+        unique_fields=['student', 'subject', 'year'], update_fields=['average', 'term_count'])
+
+    totals = SubjectYearResult.objects.values('student_id', 'year_id').annotate(
+        weighted_total=Sum(
+            F('average') * F('subject__coefficient'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        coefficient_sum=Sum('subject__coefficient'),
+        subject_count=Count('id')
+    ).order_by()
+    StudentYearResult.objects.bulk_create([
+        StudentYearResult(
+            student_id=total['student_id'],
+            year_id=total['year_id'],
+            weighted_total=total['weighted_total'],
+            coefficient_sum=total['coefficient_sum'],
+            average=round(total['weighted_total'] / total['coefficient_sum'], 2),
+            subject_count=total['subject_count']
+        ) for total in totals
+    ], batch_size=500, update_conflicts=True,
+        unique_fields=['student', 'year'], update_fields=['weighted_total', 'coefficient_sum', 'average', 'subject_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marks', '0002_mark_unique_student_subject_sequence'),
+        ('sequences', '0002_sequence_weight'),
+        ('results', '0004_term_and_year_results'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_term_and_year_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,194 @@
+from django.db import models
+from classes.models import SchoolClass
+from students.models import Student
+from sequences.models import Sequence
+from subjects.models import Subject
+from terms.models import Term
+from years.models import Year
+
+
+class StudentSequenceResult(models.Model):
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="sequence_results")
+    sequence = models.ForeignKey(
+        Sequence, on_delete=models.CASCADE, related_name="student_results")
+    weighted_total = models.DecimalField(max_digits=9, decimal_places=3)
+    coefficient_sum = models.PositiveIntegerField()
+    average = models.DecimalField(max_digits=5, decimal_places=2)
+    subject_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.student.name}: {self.average} in {self.sequence.name}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'sequence'],
+                name='unique_student_sequence_result'
+            )
+        ]
+
+
+class SubjectTermResult(models.Model):
+    '''Weighted average of a student's sequence marks for a subject in a term'''
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="subject_term_results")
+    subject = models.ForeignKey(
+        Subject, on_delete=models.CASCADE, related_name="term_results")
+    term = models.ForeignKey(
+        Term, on_delete=models.CASCADE, related_name="subject_results")
+    average = models.DecimalField(max_digits=5, decimal_places=2)
+    sequence_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.student.name}: {self.average} in {self.subject.name} ({self.term.name})'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'subject', 'term'],
+                name='unique_student_subject_term_result'
+            )
+        ]
+
+
+class StudentTermResult(models.Model):
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="term_results")
+    term = models.ForeignKey(
+        Term, on_delete=models.CASCADE, related_name="student_results")
+    weighted_total = models.DecimalField(max_digits=9, decimal_places=3)
+    coefficient_sum = models.PositiveIntegerField()
+    average = models.DecimalField(max_digits=5, decimal_places=2)
+    subject_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.student.name}: {self.average} in {self.term.name}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'term'],
+                name='unique_student_term_result'
+            )
+        ]
+
+
+class SubjectYearResult(models.Model):
+    '''Mean of a student's term averages for a subject in a year'''
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="subject_year_results")
+    subject = models.ForeignKey(
+        Subject, on_delete=models.CASCADE, related_name="year_results")
+    year = models.ForeignKey(
+        Year, on_delete=models.CASCADE, related_name="subject_results")
+    average = models.DecimalField(max_digits=5, decimal_places=2)
+    term_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.student.name}: {self.average} in {self.subject.name} ({self.year.name})'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'subject', 'year'],
+                name='unique_student_subject_year_result'
+            )
+        ]
+
+
+class StudentYearResult(models.Model):
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="year_results")
+    year = models.ForeignKey(
+        Year, on_delete=models.CASCADE, related_name="student_results")
+    weighted_total = models.DecimalField(max_digits=9, decimal_places=3)
+    coefficient_sum = models.PositiveIntegerField()
+    average = models.DecimalField(max_digits=5, decimal_places=2)
+    subject_count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.student.name}: {self.average} in {self.year.name}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'year'],
+                name='unique_student_year_result'
+            )
+        ]
+
+
+class ClassRanking(models.Model):
+    '''Class positions for one sequence, term or year'''
+    school_class = models.ForeignKey(
+        SchoolClass, on_delete=models.CASCADE, related_name="rankings")
+    sequence = models.ForeignKey(
+        Sequence, on_delete=models.CASCADE, null=True, blank=True, related_name="rankings")
+    term = models.ForeignKey(
+        Term, on_delete=models.CASCADE, null=True, blank=True, related_name="rankings")
+    year = models.ForeignKey(
+        Year, on_delete=models.CASCADE, null=True, blank=True, related_name="rankings")
+    class_average = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True)
+    highest_average = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True)
+    lowest_average = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True)
+    students_ranked = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        period = self.sequence or self.term or self.year
+        return f'{self.school_class.name} ranking for {period}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['school_class', 'sequence'],
+                condition=models.Q(sequence__isnull=False),
+                name='unique_class_sequence_ranking'
+            ),
+            models.UniqueConstraint(
+                fields=['school_class', 'term'],
+                condition=models.Q(term__isnull=False),
+                name='unique_class_term_ranking'
+            ),
+            models.UniqueConstraint(
+                fields=['school_class', 'year'],
+                condition=models.Q(year__isnull=False),
+                name='unique_class_year_ranking'
+            ),
+        ]
+
+
+class StudentRanking(models.Model):
+    ranking = models.ForeignKey(
+        ClassRanking, on_delete=models.CASCADE, related_name="positions")
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="rankings")
+    average = models.DecimalField(max_digits=5, decimal_places=2)
+    position = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f'{self.student.name}: position {self.position}'
+
+    class Meta:
+        ordering = ['position', 'student__name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ranking', 'student'],
+                name='unique_ranking_student'
+            )
+        ]
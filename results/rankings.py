@@ -0,0 +1,136 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from classes.models import SchoolClass
+from .models import (
+    ClassRanking,
+    StudentRanking,
+    StudentSequenceResult,
+    StudentTermResult,
+    StudentYearResult
+)
+
+
+def rank_averages(averages):
+    '''
+    Takes [(student_id, average)] and returns [(student_id, average, position)]
+    sorted by position. Equal averages share a position and the next
+    position is skipped, e.g 1, 2, 2, 4.
+    '''
+    ordered = sorted(averages, key=lambda item: item[1], reverse=True)
+    ranked = []
+    for index, (student_id, average) in enumerate(ordered):
+        if index and average == ranked[-1][1]:
+            position = ranked[-1][2]
+        else:
+            position = index + 1
+        ranked.append((student_id, average, position))
+    return ranked
+
+
+def get_student_averages(classes, sequence=None, term=None, year=None):
+    '''
+    Returns {class_id: [(student_id, average)]} for the students of the
+    given classes, read with one query from the stored results.
+    '''
+    if sequence is not None:
+        results = StudentSequenceResult.objects.filter(sequence=sequence)
+    elif term is not None:
+        results = StudentTermResult.objects.filter(term=term)
+    else:
+        results = StudentYearResult.objects.filter(year=year)
+
+    results = results.filter(student__student_class__in=classes).values_list(
+        'student_id', 'student__student_class_id', 'average')
+
+    averages = defaultdict(list)
+    for student_id, class_id, average in results:
+        averages[class_id].append((student_id, average))
+    return averages
+
+
+def compute_class_rankings(classes, sequence=None, term=None, year=None):
+    '''
+    Computes and stores the positions, class average, highest and lowest
+    averages of every given class for exactly one of sequence, term or
+    year. Returns the saved ClassRanking objects.
+    '''
+    scope = {'sequence': sequence, 'term': term, 'year': year}
+    scope = {key: value for key, value in scope.items() if value is not None}
+    if len(scope) != 1:
+        raise ValueError('Rank for exactly one sequence, term or year.')
+
+    now = timezone.now()
+    classes = list(classes)
+
+    with transaction.atomic():
+        # Rankings are also computed on read, concurrent requests for the
+        # same class wait here and then update the ranking the first made
+        list(SchoolClass.objects.select_for_update().filter(
+            pk__in=[school_class.pk for school_class in classes]).order_by('pk').values_list('pk'))
+        averages = get_student_averages(classes, **scope)
+
+        rankings = {
+            ranking.school_class_id: ranking for ranking in ClassRanking.objects.select_related(
+                'school_class').filter(
+                school_class__in=classes, **scope)
+        }
+        missing = [
+            ClassRanking(school_class=school_class, **scope)
+            for school_class in classes if school_class.pk not in rankings
+        ]
+        for ranking in ClassRanking.objects.bulk_create(missing):
+            rankings[ranking.school_class_id] = ranking
+
+        positions = []
+        for school_class in classes:
+            ranking = rankings[school_class.pk]
+            class_averages = [
+                average for _, average in averages[school_class.pk]]
+
+            if class_averages:
+                ranking.class_average = round(
+                    sum(class_averages) / len(class_averages), 2)
+                ranking.highest_average = max(class_averages)
+                ranking.lowest_average = min(class_averages)
+            else:
+                ranking.class_average = None
+                ranking.highest_average = None
+                ranking.lowest_average = None
+            ranking.students_ranked = len(class_averages)
+            ranking.updated_at = now
+
+            for student_id, average, position in rank_averages(averages[school_class.pk]):
+                positions.append(StudentRanking(
+                    ranking=ranking,
+                    student_id=student_id,
+                    average=average,
+                    position=position
+                ))
+
+        ClassRanking.objects.bulk_update(
+            rankings.values(),
+            ['class_average', 'highest_average',
+                'lowest_average', 'students_ranked', 'updated_at'],
+            batch_size=500
+        )
+        StudentRanking.objects.filter(
+            ranking__in=list(rankings.values())).delete()
+        StudentRanking.objects.bulk_create(positions, batch_size=500)
+
+    return [rankings[school_class.pk] for school_class in classes]
+
+
+def compute_school_rankings(sequence=None, term=None, year=None):
+    '''Ranks every class of the academic year the given period belongs to'''
+    if sequence is not None:
+        school_year_id = sequence.term.year_id
+    elif term is not None:
+        school_year_id = term.year_id
+    else:
+        school_year_id = year.pk
+
+    classes = SchoolClass.objects.filter(year_id=school_year_id)
+    return compute_class_rankings(classes, sequence=sequence, term=term, year=year)
@@ -0,0 +1,234 @@
+import os
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils.text import slugify
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from absences.models import StudentAbsence
+from marks.grading import get_grading_scheme
+from marks.models import Mark
+from .models import ClassRanking, StudentTermResult, SubjectTermResult
+from .rankings import compute_class_rankings
+
+
+def collect_class_report_cards(school_class, term):
+    '''
+    Loads everything the report cards of a class need for a term with a
+    handful of queries for the whole class, and returns one plain dict
+    per student. The dicts hold no model instances so they can be sent
+    to the rendering processes.
+    '''
+    sequences = list(term.sequence_set.order_by('pk').values_list('pk', 'short_name'))
+    students = list(school_class.student_set.values(
+        'pk', 'name', 'student_id', 'gender', 'date_of_birth'))
+
+    scores = defaultdict(dict)
+    for student_id, subject_id, sequence_id, score in Mark.objects.filter(
+            student__student_class=school_class, sequence__term=term).values_list(
+            'student_id', 'subject_id', 'sequence_id', 'score'):
+        scores[(student_id, subject_id)][sequence_id] = score
+
+    subject_results = defaultdict(list)
+    for result in SubjectTermResult.objects.filter(
+            student__student_class=school_class, term=term).select_related('subject').order_by('subject__name'):
+        subject_results[result.student_id].append(result)
+
+    term_results = {
+        result.student_id: result for result in StudentTermResult.objects.filter(
+            student__student_class=school_class, term=term)
+    }
+
+    # Printed positions must agree with the printed averages, rank the
+    # class again when the stored ranking was made from other averages
+    ranking = ClassRanking.objects.filter(school_class=school_class, term=term).first()
+    ranked_averages = {} if ranking is None else dict(
+        ranking.positions.values_list('student_id', 'average'))
+    if ranking is None or ranked_averages != {
+            student_id: result.average for student_id, result in term_results.items()}:
+        ranking = compute_class_rankings([school_class], term=term)[0]
+    positions = dict(ranking.positions.values_list('student_id', 'position'))
+
+    absences = dict(StudentAbsence.objects.filter(
+        student__student_class=school_class, sequence__term=term).values(
+        'student_id').annotate(total=Count('id')).values_list('student_id', 'total'))
+
+    scheme = get_grading_scheme(school_class.level)
+
+    cards = []
+    for student in students:
+        results = subject_results[student['pk']]
+        grades = scheme.grade_many(result.average for result in results)
+        term_result = term_results.get(student['pk'])
+
+        cards.append({
+            'filename': f"{slugify(school_class.name)}/{student['student_id']}-{slugify(student['name'])}.pdf",
+            'school_name': settings.SCHOOL_NAME,
+            'class_name': school_class.name,
+            'term': term.name,
+            'year': term.year.name,
+            'student': {
+                'name': student['name'],
+                'student_id': student['student_id'],
+                'gender': student['gender'],
+                'date_of_birth': student['date_of_birth'].strftime('%d/%m/%Y'),
+            },
+            'sequences': [short_name for _, short_name in sequences],
+            'subjects': [
+                {
+                    'name': result.subject.name,
+                    'coefficient': result.subject.coefficient,
+                    'scores': [
+                        scores[(student['pk'], result.subject_id)].get(sequence_id)
+                        for sequence_id, _ in sequences
+                    ],
+                    'average': result.average,
+                    'grade': grade,
+                    'remark': remark,
+                } for result, (grade, remark) in zip(results, grades)
+            ],
+            'average': term_result.average if term_result else None,
+            'position': positions.get(student['pk']),
+            'students_ranked': ranking.students_ranked,
+            'class_average': ranking.class_average,
+            'highest_average': ranking.highest_average,
+            'lowest_average': ranking.lowest_average,
+            'absences': absences.get(student['pk'], 0),
+        })
+    return cards
+
+
+def format_score(score):
+    return '' if score is None else f'{score:.2f}'
+
+
+def render_report_card(card):
+    '''Renders one report card dict to a PDF. Returns (filename, pdf bytes).'''
+    styles = getSampleStyleSheet()
+    student = card['student']
+    buffer = BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, leftMargin=1.5 * cm, rightMargin=1.5 * cm,
+        topMargin=1.5 * cm, bottomMargin=1.5 * cm, title=card['filename'])
+
+    header = [
+        'Subject', 'Coef', *card['sequences'], 'Average', 'Av x Coef', 'Grade', 'Remark']
+    rows = [header]
+    for subject in card['subjects']:
+        rows.append([
+            subject['name'],
+            subject['coefficient'],
+            *[format_score(score) for score in subject['scores']],
+            format_score(subject['average']),
+            format_score(subject['average'] * subject['coefficient']),
+            subject['grade'],
+            subject['remark'],
+        ])
+
+    marks_table = Table(rows, repeatRows=1)
+    marks_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ALIGN', (1, 1), (-3, -1), 'RIGHT'),
+    ]))
+
+    position = f"{card['position']} / {card['students_ranked']}" if card['position'] else '-'
+    summary_table = Table([
+        ['Term average', format_score(card['average']),
+         'Position', position],
+        ['Class average', format_score(card['class_average']),
+         'Absences', card['absences']],
+        ['Highest average', format_score(card['highest_average']),
+         'Lowest average', format_score(card['lowest_average'])],
+    ])
+    summary_table.setStyle(TableStyle([
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ]))
+
+    # Paragraph parses its text as markup, names may contain & or <
+    document.build([
+        Paragraph(escape(card['school_name']), styles['Title']),
+        Paragraph(
+            escape(f"Report card: {card['term']} ({card['year']})"), styles['Heading2']),
+        Paragraph(
+            escape(f"{student['name']} ({student['student_id']}), {student['gender']}, "
+                   f"born on {student['date_of_birth']}. Class: {card['class_name']}"),
+            styles['Normal']),
+        Spacer(1, 0.5 * cm),
+        marks_table,
+        Spacer(1, 0.5 * cm),
+        summary_table,
+    ])
+    return card['filename'], buffer.getvalue()
+
+
+def render_report_cards(cards, workers=None):
+    '''
+    Renders report cards in a process pool and yields (filename, pdf)
+    as soon as each one is ready. cards can be a lazy iterable; at most
+    a few cards per worker are queued at a time.
+    '''
+    workers = workers or settings.REPORT_CARD_WORKERS or os.cpu_count() or 1
+
+    if workers == 1:
+        for card in cards:
+            yield render_report_card(card)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for card in cards:
+            pending.add(pool.submit(render_report_card, card))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class ZipStream:
+    '''Write-only file object handing the written bytes back in chunks'''
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files):
+    '''Zips (filename, content) pairs and yields the archive chunk by chunk'''
+    stream = ZipStream()
+    # PDFs are already compressed by reportlab
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, content in files:
+            archive.writestr(filename, content)
+            yield stream.pop()
+    yield stream.pop()
@@ -0,0 +1,174 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from classes.models import SchoolClass
+from others.cache import bump_versions
+from others.dashboard import dashboard_changed
+from others.search import index_students, remove_documents
+from others.statistics import class_version_name
+from students.models import Student
+from subjects.models import Period
+from .models import StudentYearResult
+
+DEFAULT_PASS_MARK = Decimal(10)
+# Copied to the student's row in the new year, the picture files are shared
+ENROLMENT_FIELDS = [
+    'name', 'address', 'place_of_birth', 'date_of_birth', 'student_id', 'gender',
+    'image', 'thumbnail', 'phone', 'parent_name', 'parent_phone', 'phone_national',
+    'phone_digits', 'parent_phone_national', 'parent_phone_digits',
+]
+
+
+class RolloverError(Exception):
+    pass
+
+
+def clone_classes(source_year, target_year):
+    '''
+    Creates the classes of source_year in target_year, reusing the ones
+    that already exist there with the same short name. Periods are copied
+    to the newly created classes. Class masters are not copied since a
+    teacher can only be the master of one class.
+    Returns ({source class pk: target class}, number of classes created).
+    '''
+    source_classes = list(SchoolClass.objects.filter(year=source_year))
+    existing = {
+        school_class.short_name: school_class
+        for school_class in SchoolClass.objects.filter(year=target_year)
+    }
+
+    new_classes = [
+        SchoolClass(
+            name=school_class.name,
+            short_name=school_class.short_name,
+            level=school_class.level,
+            year=target_year
+        ) for school_class in source_classes if school_class.short_name not in existing
+    ]
+    # bulk_create skips the pre_save slug receiver, slugs need the new pks
+    SchoolClass.objects.bulk_create(new_classes, batch_size=500)
+    for school_class in new_classes:
+        school_class.slug = slugify(
+            f'{school_class.pk}-{school_class.name}-{target_year.name}')
+    SchoolClass.objects.bulk_update(new_classes, ['slug'], batch_size=500)
+
+    created = {school_class.short_name: school_class for school_class in new_classes}
+    class_map = {
+        school_class.pk: existing.get(school_class.short_name) or created[school_class.short_name]
+        for school_class in source_classes
+    }
+
+    cloned_from = {
+        school_class.pk: created[school_class.short_name].pk
+        for school_class in source_classes if school_class.short_name in created
+    }
+    Period.objects.bulk_create([
+        Period(
+            number_of_periods=period.number_of_periods,
+            subject_id=period.subject_id,
+            teacher_id=period.teacher_id,
+            school_class_id=cloned_from[period.school_class_id],
+            day=period.day,
+            start_time=period.start_time,
+            end_time=period.end_time
+        ) for period in Period.objects.filter(school_class_id__in=cloned_from.keys())
+    ], batch_size=500)
+
+    return class_map, len(new_classes)
+
+
+def rollover_year(source_year, target_year, promotions=None,
+                  pass_mark=DEFAULT_PASS_MARK, progress=None):
+    '''
+    Enrols the students of source_year in target_year in one transaction.
+    The classes and their periods are cloned into target_year. Students
+    whose annual average reaches pass_mark are enrolled in the class
+    given by promotions ({short name: next short name}); when a class
+    has no next class they have finished school and are not enrolled.
+    The other students, including those without annual results, repeat
+    their class in target_year and are flagged is_repeater.
+    Each enrolled student gets a new row in the target year's class,
+    linked to the old one by previous_enrolment. The source year's rows,
+    and the marks, results and rankings attached to them, are left as
+    they were. Students already enrolled from source_year are skipped.
+    Returns a dict of counts.
+    '''
+    promotions = promotions or {}
+    progress = progress or (lambda message: None)
+
+    if source_year.pk == target_year.pk:
+        raise RolloverError('The source and target years must be different.')
+
+    short_names = set(SchoolClass.objects.filter(
+        year=source_year).values_list('short_name', flat=True))
+    unknown = (set(promotions) | set(promotions.values())) - short_names
+    if unknown:
+        raise RolloverError(
+            f'Unknown classes in the promotions: {", ".join(sorted(unknown))}')
+
+    with transaction.atomic():
+        class_map, classes_created = clone_classes(source_year, target_year)
+        progress(
+            f'{classes_created} classes created, {len(class_map) - classes_created} reused')
+
+        next_classes = {
+            target.short_name: target for target in class_map.values()
+        }
+        averages = dict(StudentYearResult.objects.filter(
+            year=source_year).values_list('student_id', 'average'))
+
+        students = Student.objects.filter(student_class__year=source_year)
+        already_enrolled = students.filter(next_enrolment__isnull=False).count()
+
+        enrolments = []
+        promoted = repeating = graduated = 0
+        for student in students.filter(next_enrolment__isnull=True).select_related(
+                'student_class'):
+            average = averages.get(student.pk)
+
+            if average is not None and average >= pass_mark:
+                next_short_name = promotions.get(student.student_class.short_name)
+                if not next_short_name:
+                    graduated += 1
+                    continue
+                target_class, is_repeater = next_classes[next_short_name], False
+                promoted += 1
+            else:
+                target_class, is_repeater = class_map[student.student_class_id], True
+                repeating += 1
+
+            enrolment = Student(
+                student_class=target_class,
+                is_repeater=is_repeater,
+                previous_enrolment=student,
+                **{field: getattr(student, field) for field in ENROLMENT_FIELDS}
+            )
+            enrolment.slug = enrolment.get_slug()
+            enrolments.append(enrolment)
+
+        progress(f'{promoted + repeating + graduated} students: {promoted} promoted, '
+                 f'{repeating} repeating, {graduated} finished school, '
+                 f'{already_enrolled} already enrolled')
+
+        # bulk_create sends no post_save, so index and invalidate here
+        Student.objects.bulk_create(enrolments, batch_size=500)
+        # Search finds a student through their latest enrolment only
+        index_students(enrolments)
+        remove_documents('student', *[
+            enrolment.previous_enrolment_id for enrolment in enrolments])
+        bump_versions(*[
+            class_version_name(school_class.pk) for school_class in class_map.values()
+        ])
+        dashboard_changed()
+
+    return {
+        'classes_created': classes_created,
+        'classes_reused': len(class_map) - classes_created,
+        'students': promoted + repeating + graduated,
+        'promoted': promoted,
+        'repeating': repeating,
+        'graduated': graduated,
+        'already_enrolled': already_enrolled,
+    }
@@ -0,0 +1,96 @@
+from rest_framework import serializers
+from .models import (
+    ClassRanking,
+    StudentRanking,
+    SubjectTermResult,
+    SubjectYearResult
+)
+
+
+class GetStudentRankingSerializer(serializers.ModelSerializer):
+    student = serializers.SerializerMethodField('get_student')
+    average = serializers.FloatField()
+
+    def get_student(self, student_ranking):
+        student = student_ranking.student
+        return {
+            'id': student.pk,
+            'name': student.name,
+            'student_id': student.student_id,
+            'gender': student.gender,
+            'image': student.get_image_url()
+        }
+
+    class Meta:
+        model = StudentRanking
+        fields = ('student', 'average', 'position')
+
+
+class GetClassRankingSerializer(serializers.ModelSerializer):
+    school_class = serializers.SerializerMethodField('get_school_class')
+    period = serializers.SerializerMethodField('get_period')
+    class_average = serializers.FloatField()
+    highest_average = serializers.FloatField()
+    lowest_average = serializers.FloatField()
+    positions = serializers.SerializerMethodField('get_positions')
+
+    def get_school_class(self, ranking):
+        return {
+            'id': ranking.school_class.pk,
+            'name': ranking.school_class.name,
+            'short_name': ranking.school_class.short_name
+        }
+
+    def get_period(self, ranking):
+        period = ranking.sequence or ranking.term or ranking.year
+        return {'id': period.pk, 'name': period.name}
+
+    def get_positions(self, ranking):
+        positions = ranking.positions.select_related('student')
+        return GetStudentRankingSerializer(positions, many=True).data
+
+    class Meta:
+        model = ClassRanking
+        fields = (
+            'id',
+            'school_class',
+            'period',
+            'class_average',
+            'highest_average',
+            'lowest_average',
+            'students_ranked',
+            'updated_at',
+            'positions'
+        )
+
+
+class GetSubjectTermResultSerializer(serializers.ModelSerializer):
+    subject = serializers.SerializerMethodField('get_subject')
+    average = serializers.FloatField()
+
+    def get_subject(self, result):
+        return {
+            'id': result.subject.pk,
+            'name': result.subject.name,
+            'coefficient': result.subject.coefficient
+        }
+
+    class Meta:
+        model = SubjectTermResult
+        fields = ('subject', 'average', 'sequence_count')
+
+
+class GetSubjectYearResultSerializer(serializers.ModelSerializer):
+    subject = serializers.SerializerMethodField('get_subject')
+    average = serializers.FloatField()
+
+    def get_subject(self, result):
+        return {
+            'id': result.subject.pk,
+            'name': result.subject.name,
+            'coefficient': result.subject.coefficient
+        }
+
+    class Meta:
+        model = SubjectYearResult
+        fields = ('subject', 'average', 'term_count')
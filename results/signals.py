@@ -0,0 +1,81 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from marks.models import Mark
+from marks.signals import mark_sheet_saved
+from sequences.models import Sequence
+from students.models import Student
+from subjects.models import Subject
+from .models import ClassRanking
+from .utils import (
+    queue_results_refresh,
+    refresh_results,
+    refresh_term_results,
+    refresh_year_results
+)
+
+
+@receiver(post_save, sender=Mark)
+@receiver(post_delete, sender=Mark)
+def refresh_mark_results(sender, instance, **kwargs):
+    queue_results_refresh(instance.student_id, instance.sequence_id)
+
+
+@receiver(mark_sheet_saved, sender=Mark)
+def refresh_mark_sheet_results(sender, student_ids, subject, sequence, **kwargs):
+    refresh_results(
+        student_ids=student_ids,
+        sequence_ids=[sequence.pk]
+    )
+
+
+@receiver(post_save, sender=Student)
+def delete_moved_student_rankings(sender, instance, created, **kwargs):
+    if created:
+        return
+    # Rankings of another class the student appears in mean they were moved
+    moved = ClassRanking.objects.filter(positions__student=instance).exclude(
+        school_class_id=instance.student_class_id)
+    if moved.exists():
+        moved.delete()
+        ClassRanking.objects.filter(school_class_id=instance.student_class_id).delete()
+
+
+@receiver(post_delete, sender=Student)
+def delete_student_class_rankings(sender, instance, **kwargs):
+    ClassRanking.objects.filter(school_class_id=instance.student_class_id).delete()
+
+
+@receiver(pre_save, sender=Subject)
+def remember_subject_coefficient(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_coefficient = Subject.objects.filter(
+            pk=instance.pk).values_list('coefficient', flat=True).first()
+
+
+@receiver(post_save, sender=Subject)
+def refresh_subject_results(sender, instance, created, **kwargs):
+    old_coefficient = getattr(instance, '_old_coefficient', None)
+    if created or old_coefficient in (None, instance.coefficient):
+        return
+
+    student_ids = Mark.objects.filter(
+        subject=instance).values('student_id').distinct()
+    refresh_results(student_ids=student_ids)
+
+
+@receiver(pre_save, sender=Sequence)
+def remember_sequence_weight(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_weight = Sequence.objects.filter(
+            pk=instance.pk).values_list('weight', flat=True).first()
+
+
+@receiver(post_save, sender=Sequence)
+def refresh_sequence_weight_results(sender, instance, created, **kwargs):
+    old_weight = getattr(instance, '_old_weight', None)
+    if created or old_weight in (None, instance.weight):
+        return
+
+    refresh_term_results(term_ids=[instance.term_id])
+    refresh_year_results(year_ids=[instance.term.year_id])
@@ -0,0 +1,189 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+from classes.models import SchoolClass
+from marks.models import Mark
+from others.search import search_documents
+from sequences.models import Sequence
+from students.models import Student, find_student
+from subjects.models import Subject
+from terms.models import Term
+from years.models import Year
+from .models import ClassRanking
+from .rankings import compute_class_rankings
+from .rollover import rollover_year
+from .utils import refresh_results
+
+
+class RolloverTests(TestCase):
+
+    def setUp(self):
+        self.source_year = Year.objects.create(name='2024/2025')
+        self.target_year = Year.objects.create(name='2025/2026')
+        term = Term.objects.create(name='First Term', year=self.source_year)
+        self.sequence = Sequence.objects.create(
+            name='Sequence 1', short_name='Seq1', term=term)
+        subject = Subject.objects.create(
+            name='Mathematics', short_name='Maths', coefficient=4, level='Ordinary')
+
+        self.form_one = SchoolClass.objects.create(
+            name='Form 1', short_name='F1', year=self.source_year, level='Ordinary')
+        self.form_two = SchoolClass.objects.create(
+            name='Form 2', short_name='F2', year=self.source_year, level='Ordinary')
+
+        scores = {self.form_one: [15, 12, 8], self.form_two: [16, 9]}
+        for school_class, class_scores in scores.items():
+            for index, score in enumerate(class_scores):
+                student = Student.objects.create(
+                    name=f'{school_class.short_name} student {index}',
+                    student_class=school_class,
+                    date_of_birth=datetime.date(2012, 1, 1),
+                    student_id=f'FAS24{school_class.short_name}{index:03}',
+                    gender='Female',
+                    parent_phone='+237677000000'
+                )
+                Mark.objects.create(
+                    student=student, subject=subject, sequence=self.sequence,
+                    score=Decimal(score))
+        # Marks refresh the results once the transaction commits
+        refresh_results()
+
+    def class_snapshot(self, school_class):
+        compute_class_rankings([school_class], year=self.source_year)
+        compute_class_rankings([school_class], sequence=self.sequence)
+        return {
+            'roster': list(school_class.student_set.order_by('pk').values_list(
+                'pk', 'name', 'student_id', 'is_repeater')),
+            'rankings': list(ClassRanking.objects.filter(
+                school_class=school_class).order_by('sequence_id', 'year_id').values_list(
+                'sequence_id', 'year_id', 'class_average', 'students_ranked')),
+            'positions': list(ClassRanking.objects.filter(
+                school_class=school_class).order_by(
+                'sequence_id', 'year_id', 'positions__position', 'positions__student_id').values_list(
+                'positions__student_id', 'positions__average', 'positions__position')),
+        }
+
+    def test_rollover_leaves_the_source_year_unchanged(self):
+        before = [self.class_snapshot(self.form_one), self.class_snapshot(self.form_two)]
+
+        counts = rollover_year(
+            self.source_year, self.target_year, promotions={'F1': 'F2'})
+
+        self.assertEqual(
+            [self.class_snapshot(self.form_one), self.class_snapshot(self.form_two)], before)
+        self.assertEqual(counts['promoted'], 2)
+        self.assertEqual(counts['repeating'], 2)
+        self.assertEqual(counts['graduated'], 1)
+
+    def test_rollover_enrols_students_in_the_target_year(self):
+        rollover_year(self.source_year, self.target_year, promotions={'F1': 'F2'})
+
+        target_classes = {
+            school_class.short_name: school_class
+            for school_class in SchoolClass.objects.filter(year=self.target_year)
+        }
+        self.assertEqual(
+            sorted(target_classes['F2'].student_set.values_list('student_id', 'is_repeater')),
+            [('FAS24F1000', False), ('FAS24F1001', False), ('FAS24F2001', True)])
+        self.assertEqual(
+            list(target_classes['F1'].student_set.values_list('student_id', 'is_repeater')),
+            [('FAS24F1002', True)])
+
+        # The graduate keeps only the source year's row
+        self.assertFalse(Student.objects.filter(
+            student_id='FAS24F2000', student_class__year=self.target_year).exists())
+
+        enrolment = find_student('FAS24F1000')
+        self.assertEqual(enrolment.student_class, target_classes['F2'])
+        self.assertEqual(enrolment.previous_enrolment.student_class, self.form_one)
+        self.assertEqual(
+            find_student('FAS24F1000', year_id=self.source_year.pk), enrolment.previous_enrolment)
+
+    def test_rollover_keeps_one_search_document_per_student(self):
+        rollover_year(self.source_year, self.target_year, promotions={'F1': 'F2'})
+
+        enrolment = find_student('FAS24F1000')
+        self.assertEqual(search_documents('FAS24F1000'), [('student', enrolment.pk)])
+        # The graduate is still found through their last enrolment
+        graduate = find_student('FAS24F2000')
+        self.assertEqual(search_documents('FAS24F2000'), [('student', graduate.pk)])
+
+    def test_rollover_skips_students_already_enrolled(self):
+        rollover_year(self.source_year, self.target_year, promotions={'F1': 'F2'})
+        counts = rollover_year(self.source_year, self.target_year, promotions={'F1': 'F2'})
+
+        self.assertEqual(counts['already_enrolled'], 4)
+        self.assertEqual(counts['students'], 1)
+        self.assertEqual(
+            Student.objects.filter(student_class__year=self.target_year).count(), 4)
+
+
+class ClassRankingViewTests(TestCase):
+
+    def setUp(self):
+        year = Year.objects.create(name='2024/2025')
+        self.sequence = Sequence.objects.create(
+            name='Sequence 1', short_name='Seq1',
+            term=Term.objects.create(name='First Term', year=year))
+        self.school_class = SchoolClass.objects.create(
+            name='Form 1', short_name='F1', year=year, level='Ordinary')
+        subject = Subject.objects.create(
+            name='Mathematics', short_name='Maths', coefficient=4, level='Ordinary')
+
+        self.marks = []
+        for index, score in enumerate([15, 12, 8]):
+            student = Student.objects.create(
+                name=f'Student {index}', student_class=self.school_class,
+                date_of_birth=datetime.date(2012, 1, 1), student_id=f'FAS24A{index + 1:03}',
+                gender='Female', parent_phone='+237677000000')
+            self.marks.append(Mark.objects.create(
+                student=student, subject=subject, sequence=self.sequence, score=Decimal(score)))
+        refresh_results()
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            phone='+237699999999', email='admin@example.com', name='Admin',
+            gender='Male', username='admin', is_admin=True))
+        self.url = (
+            f'/api/v1/results/get_class_sequence_ranking/{self.school_class.pk}/{self.sequence.pk}/')
+
+    def get_positions(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(
+            (position['position'], position['student']['student_id'], position['average'])
+            for position in response.data['positions'])
+
+    def test_ranking_is_computed_again_after_marks_change(self):
+        self.assertFalse(ClassRanking.objects.exists())
+        self.assertEqual(self.get_positions(), [
+            (1, 'FAS24A001', 15.0), (2, 'FAS24A002', 12.0), (3, 'FAS24A003', 8.0)])
+
+        mark = self.marks[2]
+        mark.score = Decimal(18)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark.save()
+        self.assertFalse(ClassRanking.objects.exists())
+
+        self.assertEqual(self.get_positions(), [
+            (1, 'FAS24A003', 18.0), (2, 'FAS24A001', 15.0), (3, 'FAS24A002', 12.0)])
+        self.assertEqual(ClassRanking.objects.count(), 1)
+
+    def test_ranking_stored_by_a_concurrent_read(self):
+        compute_class_rankings([self.school_class], sequence=self.sequence)
+
+        # The stored ranking is missed, as when another request stores it
+        # between the read and the computation
+        with mock.patch.object(
+                ClassRanking.objects, 'get', side_effect=ClassRanking.DoesNotExist):
+            positions = self.get_positions()
+
+        self.assertEqual(positions, [
+            (1, 'FAS24A001', 15.0), (2, 'FAS24A002', 12.0), (3, 'FAS24A003', 8.0)])
+        self.assertEqual(ClassRanking.objects.count(), 1)
@@ -0,0 +1,24 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('get_class_sequence_ranking/<int:class_id>/<int:sequence_id>/',
+         views.get_class_sequence_ranking),
+    path('get_class_term_ranking/<int:class_id>/<int:term_id>/',
+         views.get_class_term_ranking),
+    path('get_class_year_ranking/<int:class_id>/<int:year_id>/',
+         views.get_class_year_ranking),
+    path('compute_sequence_rankings/<int:sequence_id>/',
+         views.compute_sequence_rankings),
+    path('compute_term_rankings/<int:term_id>/', views.compute_term_rankings),
+    path('compute_year_rankings/<int:year_id>/', views.compute_year_rankings),
+    path('get_student_term_results/<str:student_id>/<int:term_id>/',
+         views.get_student_term_results),
+    path('get_student_year_results/<str:student_id>/<int:year_id>/',
+         views.get_student_year_results),
+    path('get_class_report_cards/<int:class_id>/<int:term_id>/',
+         views.get_class_report_cards),
+    path('get_school_report_cards/<int:term_id>/',
+         views.get_school_report_cards),
+]
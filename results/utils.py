@@ -0,0 +1,291 @@
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+
+from marks.models import Mark
+from sequences.models import Sequence
+from .models import (
+    ClassRanking,
+    StudentSequenceResult,
+    StudentTermResult,
+    StudentYearResult,
+    SubjectTermResult,
+    SubjectYearResult
+)
+
+
+def replace_results(model, current_results, new_results, unique_fields, update_fields):
+    '''
+    Upserts new_results on unique_fields and deletes the rows of
+    current_results (the recomputed slice) that were not recomputed.
+    '''
+    computed = {
+        tuple(getattr(result, f'{field}_id') for field in unique_fields)
+        for result in new_results
+    }
+    values = [f'{field}_id' for field in unique_fields]
+
+    with transaction.atomic():
+        stale = [
+            pk for pk, *key in current_results.values_list('pk', *values)
+            if tuple(key) not in computed
+        ]
+        if stale:
+            model.objects.filter(pk__in=stale).delete()
+
+        model.objects.bulk_create(
+            new_results,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields + ['updated_at']
+        )
+
+
+def filter_slice(queryset, **filters):
+    '''Applies field__in filters, skipping the ones that are None (all)'''
+    return queryset.filter(**{
+        f'{field}__in': values for field, values in filters.items() if values is not None
+    })
+
+
+def delete_rankings(student_ids=None, period=None, period_ids=None):
+    '''
+    Deletes the class rankings of period ('sequence', 'term' or 'year')
+    in period_ids for the classes of the given students (None means all
+    of them). Rankings are computed again the next time they are read.
+    '''
+    rankings = filter_slice(
+        ClassRanking.objects.filter(**{f'{period}__isnull': False}),
+        **{f'{period}_id': period_ids})
+    if student_ids is not None:
+        rankings = rankings.filter(school_class__student__in=student_ids)
+    rankings.delete()
+
+
+def refresh_sequence_results(student_ids=None, sequence_ids=None):
+    '''
+    Recomputes the weighted sequence averages of the given students and
+    sequences (None means all of them) with one grouped query, then
+    upserts the results. Slices without marks lose their result row.
+    '''
+    marks = filter_slice(
+        Mark.objects.all(), student_id=student_ids, sequence_id=sequence_ids)
+    results = filter_slice(
+        StudentSequenceResult.objects.all(), student_id=student_ids, sequence_id=sequence_ids)
+
+    totals = marks.values('student_id', 'sequence_id').annotate(
+        weighted_total=Sum(
+            F('score') * F('subject__coefficient'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        coefficient_sum=Sum('subject__coefficient'),
+        subject_count=Count('id')
+    ).order_by()
+
+    new_results = []
+    for total in totals:
+        average = total['weighted_total'] / total['coefficient_sum']
+        new_results.append(StudentSequenceResult(
+            student_id=total['student_id'],
+            sequence_id=total['sequence_id'],
+            weighted_total=total['weighted_total'],
+            coefficient_sum=total['coefficient_sum'],
+            average=round(average, 2),
+            subject_count=total['subject_count']
+        ))
+
+    replace_results(
+        StudentSequenceResult,
+        results,
+        new_results,
+        ['student', 'sequence'],
+        ['weighted_total', 'coefficient_sum', 'average', 'subject_count']
+    )
+    delete_rankings(student_ids, 'sequence', sequence_ids)
+
+
+def refresh_term_results(student_ids=None, term_ids=None):
+    '''
+    Recomputes the subject term averages (sequence marks weighted by the
+    sequence weight), then the overall term averages (subject averages
+    weighted by the subject coefficient) of the given students and terms.
+    '''
+    marks = filter_slice(
+        Mark.objects.all(), student_id=student_ids, sequence__term_id=term_ids)
+    subject_results = filter_slice(
+        SubjectTermResult.objects.all(), student_id=student_ids, term_id=term_ids)
+
+    totals = marks.values('student_id', 'subject_id', 'sequence__term_id').annotate(
+        weighted_total=Sum(
+            F('score') * F('sequence__weight'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        weight_sum=Sum('sequence__weight'),
+        sequence_count=Count('id')
+    ).order_by()
+
+    replace_results(
+        SubjectTermResult,
+        subject_results,
+        [
+            SubjectTermResult(
+                student_id=total['student_id'],
+                subject_id=total['subject_id'],
+                term_id=total['sequence__term_id'],
+                average=round(
+                    total['weighted_total'] / total['weight_sum'], 2),
+                sequence_count=total['sequence_count']
+            ) for total in totals
+        ],
+        ['student', 'subject', 'term'],
+        ['average', 'sequence_count']
+    )
+
+    totals = subject_results.values('student_id', 'term_id').annotate(
+        weighted_total=Sum(
+            F('average') * F('subject__coefficient'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        coefficient_sum=Sum('subject__coefficient'),
+        subject_count=Count('id')
+    ).order_by()
+
+    replace_results(
+        StudentTermResult,
+        filter_slice(StudentTermResult.objects.all(),
+                     student_id=student_ids, term_id=term_ids),
+        [
+            StudentTermResult(
+                student_id=total['student_id'],
+                term_id=total['term_id'],
+                weighted_total=total['weighted_total'],
+                coefficient_sum=total['coefficient_sum'],
+                average=round(
+                    total['weighted_total'] / total['coefficient_sum'], 2),
+                subject_count=total['subject_count']
+            ) for total in totals
+        ],
+        ['student', 'term'],
+        ['weighted_total', 'coefficient_sum', 'average', 'subject_count']
+    )
+    delete_rankings(student_ids, 'term', term_ids)
+
+
+def refresh_year_results(student_ids=None, year_ids=None):
+    '''
+    Recomputes the subject year averages (mean of the subject's term
+    averages), then the overall year averages of the given students
+    and years.
+    '''
+    term_results = filter_slice(
+        SubjectTermResult.objects.all(), student_id=student_ids, term__year_id=year_ids)
+    subject_results = filter_slice(
+        SubjectYearResult.objects.all(), student_id=student_ids, year_id=year_ids)
+
+    totals = term_results.values('student_id', 'subject_id', 'term__year_id').annotate(
+        total=Sum('average'),
+        term_count=Count('id')
+    ).order_by()
+
+    replace_results(
+        SubjectYearResult,
+        subject_results,
+        [
+            SubjectYearResult(
+                student_id=total['student_id'],
+                subject_id=total['subject_id'],
+                year_id=total['term__year_id'],
+                average=round(total['total'] / total['term_count'], 2),
+                term_count=total['term_count']
+            ) for total in totals
+        ],
+        ['student', 'subject', 'year'],
+        ['average', 'term_count']
+    )
+
+    totals = subject_results.values('student_id', 'year_id').annotate(
+        weighted_total=Sum(
+            F('average') * F('subject__coefficient'),
+            output_field=DecimalField(max_digits=9, decimal_places=3)
+        ),
+        coefficient_sum=Sum('subject__coefficient'),
+        subject_count=Count('id')
+    ).order_by()
+
+    replace_results(
+        StudentYearResult,
+        filter_slice(StudentYearResult.objects.all(),
+                     student_id=student_ids, year_id=year_ids),
+        [
+            StudentYearResult(
+                student_id=total['student_id'],
+                year_id=total['year_id'],
+                weighted_total=total['weighted_total'],
+                coefficient_sum=total['coefficient_sum'],
+                average=round(
+                    total['weighted_total'] / total['coefficient_sum'], 2),
+                subject_count=total['subject_count']
+            ) for total in totals
+        ],
+        ['student', 'year'],
+        ['weighted_total', 'coefficient_sum', 'average', 'subject_count']
+    )
+    delete_rankings(student_ids, 'year', year_ids)
+
+
+def refresh_results(student_ids=None, sequence_ids=None):
+    '''
+    Recomputes the sequence, term and year results affected by marks of
+    the given students in the given sequences (None means all of them).
+    '''
+    refresh_sequence_results(student_ids, sequence_ids)
+
+    if sequence_ids is None:
+        term_ids = year_ids = None
+    else:
+        periods = Sequence.objects.filter(
+            pk__in=sequence_ids).values_list('term_id', 'term__year_id')
+        term_ids = {term_id for term_id, _ in periods}
+        year_ids = {year_id for _, year_id in periods}
+
+    refresh_term_results(student_ids, term_ids)
+    refresh_year_results(student_ids, year_ids)
+
+
+def queue_results_refresh(student_id, sequence_id):
+    '''
+    Refreshes the results of a student in a sequence once the current
+    transaction commits (right away outside of one). Deleting a student,
+    subject or sequence deletes its marks one by one, the students and
+    sequences of all of them are then refreshed together, once.
+    '''
+    connection = transaction.get_connection()
+    if not hasattr(connection, 'pending_result_refreshes'):
+        connection.pending_result_refreshes = {'student_ids': set(), 'sequences': {}}
+    pending = connection.pending_result_refreshes
+
+    pending['student_ids'].add(student_id)
+    if sequence_id not in pending['sequences']:
+        # Read now, a sequence being deleted is gone by the commit
+        period = Sequence.objects.filter(pk=sequence_id).values_list(
+            'term_id', 'term__year_id').first()
+        pending['sequences'][sequence_id] = period
+
+    # Registered on every call: callbacks of a rolled back transaction are
+    # dropped, and refreshing an empty queue does nothing
+    transaction.on_commit(refresh_queued_results)
+
+
+def refresh_queued_results():
+    '''Runs the refreshes gathered by queue_results_refresh'''
+    connection = transaction.get_connection()
+    pending = getattr(connection, 'pending_result_refreshes', None)
+    if not pending or not pending['student_ids']:
+        return
+    del connection.pending_result_refreshes
+
+    student_ids = pending['student_ids']
+    periods = [period for period in pending['sequences'].values() if period]
+    refresh_sequence_results(student_ids, list(pending['sequences']))
+    refresh_term_results(student_ids, {term_id for term_id, _ in periods})
+    refresh_year_results(student_ids, {year_id for _, year_id in periods})
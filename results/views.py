@@ -0,0 +1,262 @@
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+from rest_framework import status
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes
+)
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from knox.auth import TokenAuthentication
+from accounts.permissions import IsAdminUser
+from classes.models import SchoolClass
+from students.models import Student, find_student
+from sequences.models import Sequence
+from terms.models import Term
+from years.models import Year
+from .models import ClassRanking, StudentTermResult, StudentYearResult
+from .rankings import compute_class_rankings, compute_school_rankings
+from .report_cards import (
+    collect_class_report_cards,
+    render_report_cards,
+    stream_zip
+)
+from .serializers import (
+    GetClassRankingSerializer,
+    GetSubjectTermResultSerializer,
+    GetSubjectYearResultSerializer
+)
+
+
+def get_class_ranking_response(school_class, year_id, **scope):
+    if school_class.year_id != year_id:
+        msg = ['The class does not belong to that academic year.']
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        ranking = ClassRanking.objects.get(school_class=school_class, **scope)
+    except ClassRanking.DoesNotExist:
+        # Rankings are deleted when results change, rank the class again
+        ranking = compute_class_rankings([school_class], **scope)[0]
+
+    serializer = GetClassRankingSerializer(ranking)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def get_class_sequence_ranking(request, class_id, sequence_id):
+    try:
+        school_class = SchoolClass.objects.get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ['Class not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        sequence = Sequence.objects.select_related(
+            'term').get(pk=sequence_id)
+    except Sequence.DoesNotExist:
+        msg = ['Sequence not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    return get_class_ranking_response(
+        school_class, sequence.term.year_id, sequence=sequence)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def get_class_term_ranking(request, class_id, term_id):
+    try:
+        school_class = SchoolClass.objects.get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ['Class not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        term = Term.objects.get(pk=term_id)
+    except Term.DoesNotExist:
+        msg = ['Term not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    return get_class_ranking_response(school_class, term.year_id, term=term)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def get_class_year_ranking(request, class_id, year_id):
+    try:
+        school_class = SchoolClass.objects.get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ['Class not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        year = Year.objects.get(pk=year_id)
+    except Year.DoesNotExist:
+        msg = ['Year not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    return get_class_ranking_response(school_class, year.pk, year=year)
+
+
+@api_view(http_method_names=['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def compute_sequence_rankings(request, sequence_id):
+    try:
+        sequence = Sequence.objects.select_related(
+            'term').get(pk=sequence_id)
+    except Sequence.DoesNotExist:
+        msg = ['Sequence not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    rankings = compute_school_rankings(sequence=sequence)
+    return Response({'classes_ranked': len(rankings)}, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def compute_term_rankings(request, term_id):
+    try:
+        term = Term.objects.get(pk=term_id)
+    except Term.DoesNotExist:
+        msg = ['Term not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    rankings = compute_school_rankings(term=term)
+    return Response({'classes_ranked': len(rankings)}, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def compute_year_rankings(request, year_id):
+    try:
+        year = Year.objects.get(pk=year_id)
+    except Year.DoesNotExist:
+        msg = ['Year not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    rankings = compute_school_rankings(year=year)
+    return Response({'classes_ranked': len(rankings)}, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def get_student_term_results(request, student_id, term_id):
+    try:
+        term = Term.objects.get(pk=term_id)
+    except Term.DoesNotExist:
+        msg = ['Term not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        student = find_student(student_id, year_id=term.year_id)
+    except Student.DoesNotExist:
+        msg = ['Student not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    subject_results = student.subject_term_results.filter(
+        term=term).select_related('subject').order_by('subject__name')
+    overall = StudentTermResult.objects.filter(
+        student=student, term=term).first()
+
+    response_data = {
+        'student': student.name,
+        'student_id': student.student_id,
+        'term': term.name,
+        'subjects': GetSubjectTermResultSerializer(subject_results, many=True).data,
+        'average': float(overall.average) if overall else None,
+        'coefficient_sum': overall.coefficient_sum if overall else 0,
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def get_student_year_results(request, student_id, year_id):
+    try:
+        year = Year.objects.get(pk=year_id)
+    except Year.DoesNotExist:
+        msg = ['Year not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        student = find_student(student_id, year_id=year.pk)
+    except Student.DoesNotExist:
+        msg = ['Student not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    subject_results = student.subject_year_results.filter(
+        year=year).select_related('subject').order_by('subject__name')
+    overall = StudentYearResult.objects.filter(
+        student=student, year=year).first()
+
+    response_data = {
+        'student': student.name,
+        'student_id': student.student_id,
+        'year': year.name,
+        'subjects': GetSubjectYearResultSerializer(subject_results, many=True).data,
+        'average': float(overall.average) if overall else None,
+        'coefficient_sum': overall.coefficient_sum if overall else 0,
+    }
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+def report_cards_response(classes, term, filename):
+    def cards():
+        # Classes are loaded one at a time while earlier cards render
+        for school_class in classes:
+            yield from collect_class_report_cards(school_class, term)
+
+    response = StreamingHttpResponse(
+        stream_zip(render_report_cards(cards())), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+    return response
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def get_class_report_cards(request, class_id, term_id):
+    try:
+        school_class = SchoolClass.objects.select_related(
+            'year').get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ['Class not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        term = Term.objects.select_related('year').get(pk=term_id)
+    except Term.DoesNotExist:
+        msg = ['Term not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    if school_class.year_id != term.year_id:
+        msg = ['The class does not belong to that academic year.']
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    filename = slugify(f'{school_class.name}-{term.name}-{term.year.name}')
+    return report_cards_response([school_class], term, filename)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def get_school_report_cards(request, term_id):
+    try:
+        term = Term.objects.select_related('year').get(pk=term_id)
+    except Term.DoesNotExist:
+        msg = ['Term not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    classes = SchoolClass.objects.filter(year_id=term.year_id).order_by('name')
+    filename = slugify(f'report-cards-{term.name}-{term.year.name}')
+    return report_cards_response(classes, term, filename)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:34
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sequences', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sequence',
+            name='weight',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
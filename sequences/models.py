@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 
 from terms.models import Term
@@ -8,6 +9,9 @@ class Sequence(models.Model):
     short_name = models.CharField(max_length=50)
     term = models.ForeignKey(Term, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
+    # Weight of the sequence's marks in its term averages
+    weight = models.PositiveSmallIntegerField(
+        default=1, validators=[MinValueValidator(1)])
     slug = models.SlugField(null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -7,7 +7,15 @@ class CreateSequenceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Sequence
-        fields = ['name', 'short_name']
+        fields = ['name', 'short_name', 'weight']
+
+
+class UpdateSequenceWeightSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Sequence
+        fields = ['weight']
+        extra_kwargs = {'weight': {'required': True}}
 
 
 class GetSequenceSerializer(serializers.ModelSerializer):
@@ -7,7 +7,8 @@ from .views import (
     get_sequence,
     delete_sequence,
     update_sequence,
-    deactivate_sequence
+    deactivate_sequence,
+    update_sequence_weight
 )
 
 urlpatterns = [
@@ -18,4 +19,5 @@ urlpatterns = [
     path('update_sequence/', update_sequence),
     path('get_sequence/<int:sequence_id>/', get_sequence),
     path('get_sequences_term/<int:term_id>/', get_sequences_term),
+    path('update_sequence_weight/<int:sequence_id>/', update_sequence_weight),
 ]
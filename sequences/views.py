@@ -11,7 +11,11 @@ from rest_framework.response import Response
 from knox.auth import TokenAuthentication
 from accounts.permissions import IsSuperuser, IsAdminUser
 from terms.models import Term
-from .serializers import CreateSequenceSerializer, GetSequenceSerializer
+from .serializers import (
+    CreateSequenceSerializer,
+    GetSequenceSerializer,
+    UpdateSequenceWeightSerializer
+)
 from .models import Sequence
 
 
@@ -164,3 +168,25 @@ def deactivate_sequence(request):
     sequence.save()
 
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(http_method_names=['PUT'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsSuperuser])
+def update_sequence_weight(request, sequence_id):
+    try:
+        sequence = Sequence.objects.get(pk=sequence_id)
+    except Sequence.DoesNotExist:
+        msg = ['Sequence not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    if not sequence.term.year.is_active:
+        msg = ["You can only update sequences in the current active year."]
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = UpdateSequenceWeightSerializer(sequence, data=request.data)
+    if serializer.is_valid():
+        updated_sequence = serializer.save()
+        return Response(GetSequenceSerializer(updated_sequence).data, status=status.HTTP_200_OK)
+
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
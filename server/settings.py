@@ -49,6 +49,8 @@ INSTALLED_APPS = [
     'marks.apps.MarksConfig',
     'absences.apps.AbsencesConfig',
     'others.apps.OthersConfig',
+    'results.apps.ResultsConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -57,9 +59,28 @@ CLOUDINARY_STORAGE = {
     'API_KEY': env('API_KEY'),
     'API_SECRET': env('API_SECRET')
 }
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Set FILE_STORAGE=django.core.files.storage.FileSystemStorage to keep
+# media in MEDIA_ROOT instead of Cloudinary (tests, benchmarks, local work)
+DEFAULT_FILE_STORAGE = env(
+    'FILE_STORAGE', default='cloudinary_storage.storage.MediaCloudinaryStorage')
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
 PHONENUMBER_DEFAULT_REGION = 'CM'
 
+# Statistics, the dashboard and grading schemes are cached and invalidated
+# through version keys. Processes only see each other's invalidations through
+# a shared cache (e.g. CACHE_URL=redis://...); with the local memory default
+# entries are kept two minutes at most, and a warning is shown when DEBUG is off.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+SCHOOL_NAME = env('SCHOOL_NAME', default='')
+# First letters of every student ID
+SCHOOL_INITIALS = env('SCHOOL_INITIALS', default='FAS')
+# Processes used to render report cards, defaults to the number of CPUs
+REPORT_CARD_WORKERS = env.int('REPORT_CARD_WORKERS', default=0)
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
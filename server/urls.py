@@ -15,4 +15,5 @@ urlpatterns = [
     path('api/v1/marks/', include('marks.urls')),
     path('api/v1/absences/', include('absences.urls')),
     path('api/v1/others/', include('others.urls')),
+    path('api/v1/results/', include('results.urls')),
 ]
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Student
+from .models import Student, StudentIDCounter
 
 admin.site.register(Student)
+admin.site.register(StudentIDCounter)
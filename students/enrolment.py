@@ -0,0 +1,97 @@
+import codecs
+import csv
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from others.dashboard import dashboard_changed
+from others.search import index_students
+from .models import Student
+from .serializers import EnrolStudentSerializer
+from .student_id import allocate_student_ids
+
+
+def read_enrolment_csv(file):
+    '''
+    Yields the rows of an uploaded CSV file as dicts keyed by the header
+    (name, date_of_birth, gender, parent_phone, ...). Blank cells are left
+    out so they count as missing values.
+    Raises ValueError with the line number when the CSV is malformed.
+    '''
+    lines = codecs.iterdecode(file, 'utf-8-sig')
+    reader = csv.DictReader(lines)
+    try:
+        for values in reader:
+            yield {
+                key.strip().lower().replace(' ', '_'): value.strip()
+                for key, value in values.items()
+                if key and value and value.strip()
+            }
+    except csv.Error as error:
+        raise ValueError(f'Line {reader.line_num} of the file could not be read: {error}')
+
+
+def enrol_students(school_class, rows):
+    '''
+    Validates rows of student data for a class, then creates the valid
+    students together: names are checked against the class in one
+    query, IDs are allocated as a block and the students are written
+    with bulk_create in one transaction.
+    Returns one result dict per row, in the order of the rows.
+    '''
+    results = []
+    valid = []
+    for row, data in enumerate(rows, start=1):
+        serializer = EnrolStudentSerializer(data=data)
+        if serializer.is_valid():
+            valid.append((row, serializer.validated_data))
+            results.append(None)
+        else:
+            results.append({
+                'row': row,
+                'name': data.get('name'),
+                'status': 'error',
+                'errors': serializer.errors
+            })
+
+    names = {data['name'] for _, data in valid}
+    taken = set(school_class.student_set.filter(
+        name__in=names).values_list('name', flat=True))
+
+    students = []
+    for row, data in valid:
+        name = data['name']
+        if name in taken:
+            results[row - 1] = {
+                'row': row,
+                'name': name,
+                'status': 'error',
+                'errors': {'name': [f'A student with the name {name} already exists in this class.']}
+            }
+            continue
+        # The first row with a name wins, later ones are duplicates
+        taken.add(name)
+        students.append((row, Student(student_class=school_class, **data)))
+
+    with transaction.atomic():
+        student_ids = allocate_student_ids(len(students)) if students else []
+        for (_, student), student_id in zip(students, student_ids):
+            student.student_id = student_id
+            student.slug = slugify(f'{student_id}-{student.name}')
+            # bulk_create sends no pre_save
+            student.set_phone_columns()
+        Student.objects.bulk_create(
+            [student for _, student in students], batch_size=500)
+        # bulk_create sends no post_save
+        index_students([student for _, student in students])
+        dashboard_changed()
+
+    for row, student in students:
+        results[row - 1] = {
+            'row': row,
+            'name': student.name,
+            'status': 'created',
+            'id': student.pk,
+            'student_id': student.student_id
+        }
+    return results
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-17 12:53
+
+from django.db import migrations, models
+import students.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_id_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=students.models.upload_location),
+        ),
+    ]
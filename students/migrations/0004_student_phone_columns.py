@@ -0,0 +1,56 @@
+# Generated by Django 4.2.9 on 2026-10-17 13:02
+
+import re
+
+from django.db import migrations, models
+
+
+def national(phone):
+    if not phone:
+        return '', ''
+    number = phone.as_national
+    return number, re.sub(r'\D', '', number)
+
+
+def fill_phone_columns(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    students = []
+    for student in Student.objects.only('phone', 'parent_phone').iterator(chunk_size=2000):
+        student.phone_national, student.phone_digits = national(student.phone)
+        student.parent_phone_national, student.parent_phone_digits = national(
+            student.parent_phone)
+        students.append(student)
+    Student.objects.bulk_update(students, [
+        'phone_national', 'phone_digits', 'parent_phone_national', 'parent_phone_digits'
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='parent_phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='parent_phone_national',
+            field=models.CharField(blank=True, editable=False, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='phone_national',
+            field=models.CharField(blank=True, editable=False, max_length=30),
+        ),
+        migrations.RunPython(fill_phone_columns, migrations.RunPython.noop),
+    ]
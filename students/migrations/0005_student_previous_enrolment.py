@@ -0,0 +1,24 @@
+# Generated by Django 4.2.9 on 2026-10-17 13:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_student_phone_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='previous_enrolment',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='next_enrolment', to='students.student'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='student_id',
+            field=models.CharField(blank=True, db_index=True, max_length=25, null=True),
+        ),
+    ]
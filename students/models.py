@@ -1,9 +1,12 @@
 from datetime import datetime
 from django.db import models
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, pre_save
 from django.dispatch import receiver
+from django.utils.text import slugify
 from phonenumber_field.modelfields import PhoneNumberField
 from classes.models import SchoolClass
+from accounts.phones import phone_columns
+from jobs.media import queue_media_delete, unused_media_names
 GENDER = (
     ('Male', 'Male'),
     ('Female', 'Female')
@@ -20,19 +23,42 @@ class Student(models.Model):
     address = models.CharField(null=True, blank=True, max_length=100)
     place_of_birth = models.CharField(null=True, blank=True, max_length=100)
     date_of_birth = models.DateField()
+    # Repeated by the rows of the same student in later years
     student_id = models.CharField(
-        max_length=25, null=True, blank=True, unique=True)
+        max_length=25, null=True, blank=True, db_index=True)
     gender = models.CharField(max_length=20, choices=GENDER)
     image = models.ImageField(upload_to=upload_location, blank=True, null=True)
+    thumbnail = models.ImageField(upload_to=upload_location, blank=True, null=True)
     phone = PhoneNumberField(null=True, blank=True)
     parent_name = models.CharField(max_length=100, null=True, blank=True)
     parent_phone = PhoneNumberField()
+    # Kept in sync with the phone numbers by set_phone_columns
+    phone_national = models.CharField(max_length=30, blank=True, editable=False)
+    phone_digits = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    parent_phone_national = models.CharField(max_length=30, blank=True, editable=False)
+    parent_phone_digits = models.CharField(
+        max_length=20, blank=True, editable=False, db_index=True)
     is_prefect = models.BooleanField(default=False)
     is_repeater = models.BooleanField(default=False)
+    # The student's row in the year before, set by the year rollover
+    previous_enrolment = models.OneToOneField(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='next_enrolment')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     slug = models.SlugField(null=True, blank=True, unique=True)
 
+    def set_phone_columns(self):
+        self.phone_national, self.phone_digits = phone_columns(self.phone)
+        self.parent_phone_national, self.parent_phone_digits = phone_columns(
+            self.parent_phone)
+
+    def get_slug(self):
+        '''Rows of later years carry the year, the student ID repeats'''
+        if self.previous_enrolment_id:
+            return slugify(f'{self.student_id}-{self.name}-{self.student_class.year.name}')
+        return slugify(f'{self.student_id}-{self.name}')
+
     def get_age(self):
         year_of_birth = self.date_of_birth.year
         current_year = datetime.now().year
@@ -41,6 +67,12 @@ class Student(models.Model):
     def get_image_url(self):
         return self.image.url if self.image else None
 
+    def get_thumbnail_url(self):
+        '''Pictures stored before thumbnails existed fall back to the image'''
+        if self.thumbnail:
+            return self.thumbnail.url
+        return self.get_image_url()
+
     def __str__(self):
         return f'{self.name} ({self.student_id})'
 
@@ -48,7 +80,50 @@ class Student(models.Model):
         ordering = ['name']
 
 
+class StudentIDCounter(models.Model):
+    '''Last student ID number handed out for a prefix and year of admission'''
+    prefix = models.CharField(max_length=10)
+    year = models.PositiveSmallIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.prefix} {self.year}: {self.last_value}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['prefix', 'year'], name='unique_student_id_counter')
+        ]
+
+
+def find_student(student_id, year_id=None):
+    '''
+    Returns the row of a student ID in the year year_id, otherwise the
+    row of the active year, or of the latest year when the student is not
+    enrolled in it. A student has one row per year enrolled, so the
+    classes, marks and results of past years stay as they were.
+    Raises Student.DoesNotExist.
+    '''
+    students = Student.objects.filter(student_id=student_id)
+    if year_id is not None:
+        students = students.filter(student_class__year_id=year_id)
+    student = students.order_by(
+        '-student_class__year__is_active', '-student_class__year_id', '-pk').first()
+    if student is None:
+        raise Student.DoesNotExist(f'No student {student_id}')
+    return student
+
+
+@receiver(pre_save, sender=Student)
+def set_phone_columns(sender, instance, **kwargs):
+    # bulk_create sends no pre_save, bulk paths call set_phone_columns() themselves
+    instance.set_phone_columns()
+
+
 @receiver(post_delete, sender=Student)
 def delete_student_image(sender, instance, **kwargs):
-    if instance.image:
-        instance.image.delete()
+    # The rows of other years may still show the same picture
+    queue_media_delete(*unused_media_names(
+        Student, ['image', 'thumbnail'], [instance.image.name, instance.thumbnail.name]))
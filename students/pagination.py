@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class StudentCursorPagination(CursorPagination):
+    '''
+    Keyset pagination over students. Each page is fetched with a WHERE on
+    the ordering fields instead of an OFFSET, so every page costs the same
+    however far it is. Add count=true to also get the total.
+    '''
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-pk'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+    @staticmethod
+    def is_requested(request):
+        '''Pagination is opt-in so existing clients still get the full list'''
+        return 'cursor' in request.query_params or 'page_size' in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if request.query_params.get('count') in ('true', '1'):
+            self.total = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_first_page(self, queryset, base_url, page_size):
+        '''
+        The first page of queryset, whatever the query params of the
+        current request. get_next_link() then points into base_url.
+        '''
+        self.base_url = base_url
+        self.page_size = page_size
+        self.cursor = None
+        self.total = None
+
+        results = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.page = results[:page_size]
+        self.has_previous = False
+        self.has_next = len(results) > page_size
+        if self.has_next:
+            self.next_position = self._get_position_from_instance(results[-1], self.ordering)
+        return self.page
+
+    def get_paginated_response(self, data):
+        response_data = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('students', data)
+        ])
+        if self.total is not None:
+            response_data['count'] = self.total
+        return Response(response_data)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from rest_framework import serializers
 from .models import Student
 
@@ -6,12 +8,22 @@ class GetStudentSerializer(serializers.ModelSerializer):
     student_class = serializers.SerializerMethodField('get_student_class')
     age = serializers.SerializerMethodField('get_age')
     image = serializers.SerializerMethodField('get_image_url')
+    thumbnail = serializers.SerializerMethodField('get_thumbnail_url')
     phone = serializers.SerializerMethodField('get_phone')
     parent_phone = serializers.SerializerMethodField('get_parent_phone')
 
     class Meta:
         model = Student
-        fields = '__all__'
+        exclude = [
+            'phone_national', 'phone_digits', 'parent_phone_national', 'parent_phone_digits'
+        ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        '''fields limits the output to the given field names'''
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def get_student_class(self, student):
         return {
@@ -26,16 +38,110 @@ class GetStudentSerializer(serializers.ModelSerializer):
     def get_image_url(self, student):
         return student.get_image_url()
 
+    def get_thumbnail_url(self, student):
+        return student.get_thumbnail_url()
+
     def get_phone(self, student):
-        if student.phone:
-            return student.phone.as_national
-        return None
+        return student.phone_national or None
 
     def get_parent_phone(self, student):
-        if student.parent_phone:
-            return student.parent_phone.as_national
+        return student.parent_phone_national or None
+
+
+class StudentValuesSerializer:
+    '''
+    Produces the same output as GetStudentSerializer from values() rows,
+    without building model instances. Only used when fields are given.
+    '''
+    computed_columns = {
+        'student_class': ['student_class_id', 'student_class__name', 'student_class__slug'],
+        'age': ['date_of_birth'],
+        'image': ['image'],
+        'thumbnail': ['thumbnail', 'image'],
+        'phone': ['phone_national'],
+        'parent_phone': ['parent_phone_national'],
+    }
+
+    def __init__(self, fields=None):
+        self.model_fields = GetStudentSerializer().fields
+        self.fields = [
+            name for name in self.model_fields if fields is None or name in fields]
+        # values() gives the pk of a relation, which is what its field outputs
+        self.related_fields = {
+            name for name in self.fields
+            if isinstance(self.model_fields[name], serializers.RelatedField)}
+        self.image_storage = Student._meta.get_field('image').storage
+
+    @classmethod
+    def supports(cls, fields):
+        return fields is not None
+
+    def columns(self, *extra):
+        '''The values() columns needed for the fields, plus extra ones'''
+        columns = list(extra)
+        for name in self.fields:
+            if name in self.related_fields:
+                names = [f'{name}_id']
+            else:
+                names = self.computed_columns.get(name, [name])
+            for column in names:
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def to_representation(self, row):
+        data = {}
+        for name in self.fields:
+            if name == 'student_class':
+                data[name] = {
+                    'id': row['student_class_id'],
+                    'name': row['student_class__name'],
+                    'slug': row['student_class__slug']
+                }
+            elif name == 'age':
+                data[name] = datetime.now().year - row['date_of_birth'].year
+            elif name == 'image':
+                data[name] = self.image_storage.url(row['image']) if row['image'] else None
+            elif name in ('phone', 'parent_phone'):
+                data[name] = row[f'{name}_national'] or None
+            elif name == 'thumbnail':
+                picture = row['thumbnail'] or row['image']
+                data[name] = self.image_storage.url(picture) if picture else None
+            elif name in self.related_fields:
+                data[name] = row[f'{name}_id']
+            else:
+                value = row[name]
+                data[name] = None if value is None else self.model_fields[name].to_representation(value)
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+def parse_student_fields(fields):
+    '''
+    Parses the ?fields= query param (comma separated). Returns None when
+    it is missing and raises ValueError for unknown fields.
+    '''
+    if not fields:
         return None
 
+    fields = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = set(fields) - set(GetStudentSerializer().fields)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    return fields
+
+
+def serialize_students(students, fields=None):
+    '''Serializes a students queryset, through values() when the fields allow it'''
+    if StudentValuesSerializer.supports(fields):
+        serializer = StudentValuesSerializer(fields)
+        return serializer.serialize(students.values(*serializer.columns()))
+
+    return GetStudentSerializer(
+        students.select_related('student_class'), many=True, fields=fields).data
+
 
 class CreateStudentSerializer(serializers.ModelSerializer):
 
@@ -55,5 +161,32 @@ class CreateStudentSerializer(serializers.ModelSerializer):
         ]
 
 
+class EnrolStudentSerializer(CreateStudentSerializer):
+    '''One row of a bulk enrolment, images are added later'''
+
+    class Meta(CreateStudentSerializer.Meta):
+        fields = [
+            field for field in CreateStudentSerializer.Meta.fields if field != 'image'
+        ]
+
+
+class EnrolStudentsSerializer(serializers.Serializer):
+    '''Either a CSV file with a header row or a JSON list of students'''
+    file = serializers.FileField(required=False)
+    students = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_empty=False)
+
+    def validate_file(self, file):
+        if not file.name.lower().endswith('.csv'):
+            raise serializers.ValidationError('Only .csv files can be imported.')
+        return file
+
+    def validate(self, data):
+        if ('file' in data) == ('students' in data):
+            raise serializers.ValidationError(
+                'Send either a CSV file or a list of students.')
+        return data
+
+
 class ChangeStudentImageSerializer(serializers.Serializer):
     image = serializers.ImageField()
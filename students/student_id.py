@@ -1,32 +1,72 @@
 import string
 from datetime import date
-from random import randint
-
-
-class StudentIDGenerator:
-    def __init__(self, school_initials: str, query: list):
-        self.school_initials = school_initials
-        self.year_of_admission = str(date.today().year)
-        self.letter_index = randint(0, 25)
-        self.digit_index = randint(1, 999)
-        self.query = query
-        self.exhausted_index = 0
-
-    def student_id_in_db(self, student_id):
-        return student_id in self.query
-
-    def generate_student_id(self):
-        while True:
-            letter = string.ascii_uppercase[self.letter_index % 26]
-            number = str(self.digit_index).zfill(3)
-            student_id = f"{self.school_initials}{str(self.year_of_admission)[-2:]}{letter}{number}"
-
-            if self.student_id_in_db(student_id):
-                self.exhausted_index += 1
-                if self.exhausted_index == 20:
-                    return "Ids are exhausted"
-                continue
-            else:
-                break
-
-        return student_id
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Student, StudentIDCounter
+
+NUMBERS_PER_LETTER = 999
+# IDs look like FAS24A001: initials, year of admission, a letter and 3 digits
+CAPACITY = len(string.ascii_uppercase) * NUMBERS_PER_LETTER
+
+
+class StudentIDsExhausted(Exception):
+    pass
+
+
+def format_student_id(prefix, year, value):
+    '''Formats the value-th ID (0 based) of a prefix and year'''
+    letter = string.ascii_uppercase[value // NUMBERS_PER_LETTER]
+    number = str(value % NUMBERS_PER_LETTER + 1).zfill(3)
+    return f'{prefix}{str(year)[-2:]}{letter}{number}'
+
+
+def reserve_values(prefix, year, count):
+    '''
+    Moves the counter of a prefix and year forward by count with a single
+    UPDATE and returns the reserved range. The row stays locked until the
+    surrounding transaction ends, so concurrent callers get distinct ranges.
+    '''
+    try:
+        with transaction.atomic():
+            StudentIDCounter.objects.get_or_create(prefix=prefix, year=year)
+    except IntegrityError:
+        # Created by a concurrent request in the meantime
+        pass
+
+    counter = StudentIDCounter.objects.filter(prefix=prefix, year=year)
+    updated = counter.filter(last_value__lte=CAPACITY - count).update(
+        last_value=F('last_value') + count)
+    if not updated:
+        raise StudentIDsExhausted()
+
+    last_value = counter.values_list('last_value', flat=True).get()
+    return range(last_value - count, last_value)
+
+
+def allocate_student_ids(count=1, prefix=None, year=None):
+    '''
+    Returns count new student IDs. IDs are handed out in order from a
+    counter per prefix and year of admission. IDs already taken (e.g.
+    by the older random generator) are skipped with one indexed lookup
+    per block. Call it inside the transaction that saves the students.
+    Raises StudentIDsExhausted when the year has no IDs left.
+    '''
+    prefix = prefix or settings.SCHOOL_INITIALS
+    year = year or date.today().year
+
+    student_ids = []
+    with transaction.atomic():
+        while len(student_ids) < count:
+            candidates = [
+                format_student_id(prefix, year, value)
+                for value in reserve_values(prefix, year, count - len(student_ids))
+            ]
+            taken = set(Student.objects.filter(
+                student_id__in=candidates).values_list('student_id', flat=True))
+            student_ids += [
+                student_id for student_id in candidates if student_id not in taken]
+
+    return student_ids
@@ -1,3 +1,196 @@
+import datetime
+from decimal import Decimal
+
+from django.conf import settings
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from classes.models import SchoolClass
+from results.models import StudentSequenceResult
+from sequences.models import Sequence
+from terms.models import Term
+from years.models import Year
+from .models import Student, StudentIDCounter, find_student
+from .student_id import CAPACITY, StudentIDsExhausted, allocate_student_ids
+
+
+def create_student(school_class, student_id, **fields):
+    fields.setdefault('name', f'Student {student_id}')
+    return Student.objects.create(
+        student_class=school_class, student_id=student_id,
+        date_of_birth=datetime.date(2012, 1, 1), gender='Female',
+        parent_phone='+237677000000', **fields)
+
+
+def admin_client():
+    admin = User.objects.create(
+        phone='+237699999999', email='admin@example.com', name='Admin',
+        gender='Male', username='admin', is_admin=True, is_superuser=True)
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+class StudentFieldsTests(TestCase):
+
+    def test_relation_fields_are_listed_by_id(self):
+        source_year = Year.objects.create(name='2024/2025')
+        target_year = Year.objects.create(name='2025/2026')
+        form_one = SchoolClass.objects.create(
+            name='Form 1', short_name='F1', year=source_year, level='Ordinary')
+        form_two = SchoolClass.objects.create(
+            name='Form 2', short_name='F2', year=target_year, level='Ordinary')
+        previous = create_student(form_one, 'FAS24A001')
+        student = create_student(
+            form_two, 'FAS24A001', previous_enrolment=previous, slug='fas24a001-2025')
+
+        response = admin_client().get(
+            f'/api/v1/students/get_all_students_in_given_year/{target_year.pk}/',
+            {'fields': 'name,previous_enrolment'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['students'], [
+            {'name': student.name, 'previous_enrolment': previous.pk}])
+
+
+class FindStudentTests(TestCase):
+
+    def setUp(self):
+        self.active_year = Year.objects.create(name='2024/2025')
+        self.next_year = Year.objects.create(name='2025/2026', is_active=False)
+        self.previous = create_student(SchoolClass.objects.create(
+            name='Form 1', short_name='F1', year=self.active_year, level='Ordinary'), 'FAS24A001')
+        self.enrolment = create_student(
+            SchoolClass.objects.create(
+                name='Form 2', short_name='F2', year=self.next_year, level='Ordinary'),
+            'FAS24A001', previous_enrolment=self.previous, slug='fas24a001-2025')
+
+    def test_the_active_year_comes_before_a_later_year(self):
+        self.assertEqual(find_student('FAS24A001'), self.previous)
+
+        Year.objects.filter(pk=self.active_year.pk).update(is_active=False)
+        Year.objects.filter(pk=self.next_year.pk).update(is_active=True)
+        self.assertEqual(find_student('FAS24A001'), self.enrolment)
+
+    def test_the_latest_year_without_an_active_enrolment(self):
+        Year.objects.filter(pk=self.active_year.pk).update(is_active=False)
+        self.assertEqual(find_student('FAS24A001'), self.enrolment)
+
+    def test_a_given_year(self):
+        self.assertEqual(
+            find_student('FAS24A001', year_id=self.next_year.pk), self.enrolment)
+        with self.assertRaises(Student.DoesNotExist):
+            find_student('FAS24A002')
+
+
+class GetStudentTests(TestCase):
+
+    def test_performance_keeps_the_averages_of_past_years(self):
+        sequences = []
+        for name in ('2024/2025', '2025/2026'):
+            year = Year.objects.create(name=name)
+            sequences.append(Sequence.objects.create(
+                name=f'Sequence 1 {name}', short_name=f'Seq1 {name}',
+                term=Term.objects.create(name='First Term', year=year)))
+            SchoolClass.objects.create(
+                name='Form 1', short_name='F1', year=year, level='Ordinary')
+        first_class, next_class = SchoolClass.objects.order_by('pk')
+        previous = create_student(first_class, 'FAS24A001')
+        create_student(next_class, 'FAS24A001', previous_enrolment=previous, slug='fas24a001-2025')
+        StudentSequenceResult.objects.create(
+            student=previous, sequence=sequences[0], weighted_total=48,
+            coefficient_sum=4, average=Decimal('12.00'), subject_count=1)
+
+        response = admin_client().get('/api/v1/students/get_student/FAS24A001/')
+
+        self.assertEqual(response.status_code, 200)
+        performance = {item['name']: item['average'] for item in response.data['performance']}
+        self.assertEqual(performance, {'Seq1 2024/2025': Decimal('12.00'), 'Seq1 2025/2026': 0})
+
+
+class ClassMatesTests(TestCase):
+
+    def setUp(self):
+        school_class = SchoolClass.objects.create(
+            name='Form 1', short_name='F1',
+            year=Year.objects.create(name='2024/2025'), level='Ordinary')
+        for index in range(23):
+            create_student(school_class, f'FAS24A{index + 1:03}', slug=f'fas24a{index + 1:03}')
+        self.client = admin_client()
+
+    def test_profile_query_params_do_not_change_the_embedded_page(self):
+        response = self.client.get(
+            '/api/v1/students/get_student/FAS24A001/',
+            {'page_size': 500, 'cursor': 'not-a-cursor', 'count': 'true'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [mate['student_id'] for mate in response.data['class_mates']],
+            [f'FAS24A{index:03}' for index in range(1, 21)])
+
+        rest = self.client.get(response.data['class_mates_next'])
+        self.assertEqual(
+            [mate['student_id'] for mate in rest.data['students']],
+            ['FAS24A021', 'FAS24A022', 'FAS24A023'])
+
+
+class StudentIDTests(TestCase):
+
+    def setUp(self):
+        self.school_class = SchoolClass.objects.create(
+            name='Form 1', short_name='F1',
+            year=Year.objects.create(name='2024/2025'), level='Ordinary')
+
+    def test_ids_are_handed_out_in_order(self):
+        self.assertEqual(
+            allocate_student_ids(3, prefix='FAS', year=2024),
+            ['FAS24A001', 'FAS24A002', 'FAS24A003'])
+        self.assertEqual(allocate_student_ids(prefix='FAS', year=2024), ['FAS24A004'])
+        # Each prefix and year has its own counter
+        self.assertEqual(allocate_student_ids(prefix='FAS', year=2025), ['FAS25A001'])
+
+    def test_ids_taken_by_the_random_generator_are_skipped(self):
+        for student_id in ('FAS24A002', 'FAS24A003', 'FAS24A006'):
+            create_student(self.school_class, student_id, slug=student_id.lower())
+
+        self.assertEqual(
+            allocate_student_ids(4, prefix='FAS', year=2024),
+            ['FAS24A001', 'FAS24A004', 'FAS24A005', 'FAS24A007'])
+
+    def test_ids_continue_with_the_next_letter(self):
+        StudentIDCounter.objects.create(prefix='FAS', year=2024, last_value=998)
+        self.assertEqual(
+            allocate_student_ids(2, prefix='FAS', year=2024), ['FAS24A999', 'FAS24B001'])
+
+    def test_a_full_year_raises(self):
+        StudentIDCounter.objects.create(prefix='FAS', year=2024, last_value=CAPACITY - 1)
+        with self.assertRaises(StudentIDsExhausted):
+            allocate_student_ids(2, prefix='FAS', year=2024)
+        self.assertEqual(allocate_student_ids(prefix='FAS', year=2024), ['FAS24Z999'])
+        with self.assertRaises(StudentIDsExhausted):
+            allocate_student_ids(prefix='FAS', year=2024)
+
+    def test_create_student_answers_507_when_the_year_runs_out(self):
+        StudentIDCounter.objects.create(
+            prefix=settings.SCHOOL_INITIALS, year=datetime.date.today().year,
+            last_value=CAPACITY)
+        client = admin_client()
+
+        response = client.post(
+            f'/api/v1/students/create_student/{self.school_class.pk}/', {
+                'name': 'Ngono Marie', 'date_of_birth': '2012-01-01',
+                'gender': 'Female', 'parent_phone': '+237677000000'})
+
+        self.assertEqual(response.status_code, 507)
+        self.assertFalse(Student.objects.exists())
+
+        response = client.post(
+            f'/api/v1/students/enrol_students_in_class/{self.school_class.pk}/', {
+                'students': [{
+                    'name': 'Ngono Marie', 'date_of_birth': '2012-01-01',
+                    'gender': 'Female', 'parent_phone': '+237677000000'}]
+            }, format='json')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 507)
+        self.assertFalse(Student.objects.exists())
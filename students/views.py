@@ -1,4 +1,6 @@
 # from django.db.models import Sum, F, FloatField, ExpressionWrapper
+from django.db import transaction
+from django.urls import reverse
 from django.utils.text import slugify
 from rest_framework import status
 from rest_framework.decorators import (
@@ -6,23 +8,46 @@ from rest_framework.decorators import (
     authentication_classes,
     permission_classes
 )
-from cloudinary import api as cloudinary_api
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from knox.auth import TokenAuthentication
 from accounts.permissions import IsAdminUser, IsSuperuser
 from classes.models import SchoolClass
 from classes.serializers import GetSchoolClassSerializer
+from jobs.media import queue_media_upload
+from others.exports import CHUNK_SIZE, export_response, parse_file_type
+from results.models import StudentSequenceResult
 from years.models import Year
 from sequences.models import Sequence
-from .models import Student
-from .student_id import StudentIDGenerator
+from .models import Student, find_student
+from .pagination import StudentCursorPagination
+from .enrolment import enrol_students, read_enrolment_csv
+from .student_id import StudentIDsExhausted, allocate_student_ids
 from .serializers import (
     CreateStudentSerializer,
+    EnrolStudentsSerializer,
     GetStudentSerializer,
-    ChangeStudentImageSerializer
+    ChangeStudentImageSerializer,
+    StudentValuesSerializer,
+    parse_student_fields,
+    serialize_students
 )
 
+# Columns of the student exports, read with values_list()
+EXPORT_HEADER = [
+    'Student ID', 'Name', 'Class', 'Gender', 'Date of birth', 'Place of birth',
+    'Address', 'Phone', 'Parent name', 'Parent phone', 'Repeater', 'Prefect'
+]
+EXPORT_COLUMNS = [
+    'student_id', 'name', 'student_class__name', 'gender', 'date_of_birth',
+    'place_of_birth', 'address', 'phone_national', 'parent_name', 'parent_phone_national',
+    'is_repeater', 'is_prefect'
+]
+
+# Fields of the classmates listed on a student's profile
+CLASS_MATE_FIELDS = ['id', 'name', 'student_id', 'gender', 'image', 'thumbnail', 'slug']
+CLASS_MATES_EMBEDDED = 20
+
 
 @api_view(http_method_names=['GET'])
 @authentication_classes([TokenAuthentication])
@@ -34,9 +59,13 @@ def get_all_students_in_class(request, class_id):
         msg = ['Class not found.']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
-    serializer = GetStudentSerializer(
-        school_class.student_set.all(), many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        fields = parse_student_fields(request.query_params.get('fields'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serialize_students(school_class.student_set.all(), fields)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @api_view(http_method_names=['POST'])
@@ -66,53 +95,96 @@ def create_student(request, class_id):
             return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
 
         else:
-            school_initials = "FAS"  # Change with actual school initials or save in db
-            query = Student.objects.all().values_list('student_id', flat=True)
-            student_id_gen = StudentIDGenerator(school_initials, query=query)
-            student_id = student_id_gen.generate_student_id()
-
-            if student_id == "Ids are exhausted":
+            # Pictures are normalised and stored by the media worker
+            image = serializer.validated_data.pop('image', None)
+            try:
+                with transaction.atomic():
+                    student_id = allocate_student_ids()[0]
+                    student = Student(**serializer.validated_data)
+                    student.student_class = student_class
+                    student.student_id = student_id
+                    student.slug = slugify(f'{student_id}-{student.name}')
+                    student.save()
+                    if image:
+                        queue_media_upload(student, 'image', image)
+            except StudentIDsExhausted:
                 msg = [
                     "Ids are exhausted. Please contact the developer (EGBE Victor Junior)."]
                 return Response({'error': msg}, status=status.HTTP_507_INSUFFICIENT_STORAGE)
 
-            student = Student(**serializer.validated_data)
-            student.student_class = student_class
-            student.student_id = student_id
-            student.slug = slugify(f'{student_id}-{student.name}')
-            student.save()
             data = GetStudentSerializer(student).data
+            if image:
+                data['image_pending'] = True
             return Response(data, status=status.HTTP_200_OK)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(http_method_names=['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsSuperuser])
+def enrol_students_in_class(request, class_id):
+    # For super administrator only
+    try:
+        student_class = SchoolClass.objects.get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ["Class not found. You can't assign a student to an unknown class."]
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    if not student_class.year.is_active:
+        msg = [
+            "You can only assign students to a class in the current active academic year."]
+        return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = EnrolStudentsSerializer(data=request.data)
+
+    if serializer.is_valid():
+        if 'file' in serializer.validated_data:
+            rows = read_enrolment_csv(serializer.validated_data['file'])
+        else:
+            rows = serializer.validated_data['students']
+
+        try:
+            results = enrol_students(student_class, rows)
+        except UnicodeDecodeError:
+            msg = ['The file could not be read. Please save it as UTF-8 CSV.']
+            return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        except StudentIDsExhausted:
+            msg = [
+                "Ids are exhausted. Please contact the developer (EGBE Victor Junior)."]
+            return Response({'error': msg}, status=status.HTTP_507_INSUFFICIENT_STORAGE)
+
+        response_data = {
+            'created': sum(1 for result in results if result['status'] == 'created'),
+            'failed': sum(1 for result in results if result['status'] == 'error'),
+            'results': results
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+    else:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(http_method_names=['GET'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def get_student(request, student_id):
     # For administrators only
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id)
     except Student.DoesNotExist:
         msg = ['Student not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
-    # Calculate averages
-    sequences = Sequence.objects.all()
-    averages = []
-    for sequence in sequences:
-        total_score = 0
-        total_coefficient = 0
-        marks = student.marks.filter(sequence=sequence)
-        for mark in marks:
-            score_coefficient = mark.score * mark.subject.coefficient
-            total_score += score_coefficient
-            total_coefficient += mark.subject.coefficient
-
-        average = total_score / total_coefficient if total_coefficient > 0 else 0
-        averages.append({'name': sequence.short_name,
-                        'average': round(average, 2)})
+    # Averages are kept up to date in the results app whenever marks change.
+    # Those of past years belong to the student's rows of those years.
+    results = dict(StudentSequenceResult.objects.filter(
+        student__student_id=student.student_id).values_list('sequence_id', 'average'))
+    averages = [
+        {'name': sequence.short_name, 'average': results.get(sequence.pk, 0)}
+        for sequence in Sequence.objects.all()
+    ]
 
     if len(averages) == 1:
         if averages[0]['average'] == 0:
@@ -121,32 +193,53 @@ def get_student(request, student_id):
     # Student absences
     absences_count = student.absences.all().filter(sequence__is_active=True).count()
 
-    class_mates = student.student_class.student_set.all()
+    # Only the first page of classmates is embedded, next links to the rest
+    class_mates_serializer = StudentValuesSerializer(CLASS_MATE_FIELDS)
+    # The query params of this request are the profile's, not the list's
+    paginator = StudentCursorPagination(ordering=('name', 'pk'))
+    class_mates = paginator.paginate_first_page(
+        student.student_class.student_set.values(
+            *class_mates_serializer.columns('pk', 'name')),
+        request.build_absolute_uri(
+            reverse(get_student_class_mates, args=[student.student_id])),
+        CLASS_MATES_EMBEDDED)
+
     serializer = GetStudentSerializer(student)
-    class_mates_serializer = GetStudentSerializer(class_mates, many=True)
     response_data = {
         'student': serializer.data,
-        'class_mates': class_mates_serializer.data,
+        'class_mates': class_mates_serializer.serialize(class_mates),
+        'class_mates_next': paginator.get_next_link(),
         'performance': averages,
         'absences': absences_count,
     }
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def get_student_class_mates(request, student_id):
+    '''Pages through the students of a student's class, slim fields by default'''
+    try:
+        student = find_student(student_id)
+    except Student.DoesNotExist:
+        msg = ['Student not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    class_mates = Student.objects.filter(student_class_id=student.student_class_id)
+    return students_list_response(
+        request, class_mates, ordering=('name', 'pk'),
+        default_fields=CLASS_MATE_FIELDS, paginate=True)
+
+
 @api_view(http_method_names=['GET'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def get_all_students_in_school(request):
     '''Returns students of the current active year'''
     students = Student.objects.filter(
-        student_class__year__is_active=True).order_by('-pk')
-    serializer = GetStudentSerializer(students, many=True)
-    data = {
-        'count': students.count(),
-        'students': serializer.data
-    }
-
-    return Response(data, status=status.HTTP_200_OK)
+        student_class__year__is_active=True).select_related('student_class').order_by('-pk')
+    return students_list_response(request, students, ordering='-pk')
 
 
 @api_view(http_method_names=['GET'])
@@ -160,14 +253,93 @@ def get_all_students_in_given_year(request, year_id):
         msg = ['Year not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
-    students = Student.objects.filter(student_class__year_id=year_id)
-    serializer = GetStudentSerializer(students, many=True)
-    data = {
-        'count': students.count(),
-        'students': serializer.data
+    students = Student.objects.filter(
+        student_class__year_id=year_id).select_related('student_class')
+    return students_list_response(request, students, ordering=('name', 'pk'))
+
+
+def students_list_response(request, students, ordering, default_fields=None, paginate=False):
+    '''
+    Serializes a students list. With paginate, or a cursor or page_size
+    query param, the list is returned one keyset page at a time, and
+    ?fields= limits the fields of each student (default_fields otherwise).
+    '''
+    try:
+        fields = parse_student_fields(
+            request.query_params.get('fields')) or default_fields
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    if paginate or StudentCursorPagination.is_requested(request):
+        paginator = StudentCursorPagination(ordering=ordering)
+        if StudentValuesSerializer.supports(fields):
+            serializer = StudentValuesSerializer(fields)
+            # The cursor is read from the ordering columns of each row
+            rows = students.values(*serializer.columns('pk', 'name'))
+            data = serializer.serialize(paginator.paginate_queryset(rows, request))
+        else:
+            page = paginator.paginate_queryset(students, request)
+            data = GetStudentSerializer(page, many=True, fields=fields).data
+        return paginator.get_paginated_response(data)
+
+    data = serialize_students(students, fields)
+    response_data = {
+        'count': len(data),
+        'students': data
     }
 
-    return Response(data, status=status.HTTP_200_OK)
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+def students_export_response(request, students, filename):
+    '''Streams students as CSV or XLSX, chosen with ?file_type='''
+    try:
+        file_type = parse_file_type(request.query_params.get('file_type'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = students.values_list(*EXPORT_COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    return export_response(file_type, filename, EXPORT_HEADER, rows)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_students_in_class(request, class_id):
+    try:
+        school_class = SchoolClass.objects.select_related('year').get(pk=class_id)
+    except SchoolClass.DoesNotExist:
+        msg = ['Class not found.']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    students = school_class.student_set.order_by('name', 'pk')
+    filename = slugify(f'{school_class.name}-{school_class.year.name}-students')
+    return students_export_response(request, students, filename)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_students_in_given_year(request, year_id):
+    try:
+        year = Year.objects.get(id=year_id)
+    except Year.DoesNotExist:
+        msg = ['Year not found']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    students = Student.objects.filter(student_class__year=year).order_by(
+        'student_class__name', 'name', 'pk')
+    return students_export_response(request, students, slugify(f'{year.name}-students'))
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_students_in_school(request):
+    '''Exports students of the current active year'''
+    students = Student.objects.filter(student_class__year__is_active=True).order_by(
+        'student_class__name', 'name', 'pk')
+    return students_export_response(request, students, 'students')
 
 
 @api_view(http_method_names=['DELETE'])
@@ -176,7 +348,7 @@ def get_all_students_in_given_year(request, year_id):
 def delete_student(request, student_id):
     # For super administrator only
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id)
     except Student.DoesNotExist:
         msg = ['Student not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
@@ -195,7 +367,7 @@ def delete_student(request, student_id):
 def update_student(request, student_id, class_id):
     # For super administrator only
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id)
     except Student.DoesNotExist:
         msg = ['Student not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
@@ -215,9 +387,8 @@ def update_student(request, student_id, class_id):
         serializer.save(student_class=student_class)
 
         # Setting new student slug
-        updated_student = Student.objects.get(student_id=student_id)
-        updated_student.slug = slugify(
-            f'{updated_student.student_id}-{updated_student.name}')
+        updated_student = Student.objects.get(pk=student.pk)
+        updated_student.slug = updated_student.get_slug()
         updated_student.save()
 
         response_serializer = GetStudentSerializer(updated_student)
@@ -231,27 +402,19 @@ def update_student(request, student_id, class_id):
 @permission_classes([IsAuthenticated, IsSuperuser])
 def change_student_image(request, student_id):
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id)
     except Student.DoesNotExist:
         msg = ['Student not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = ChangeStudentImageSerializer(data=request.data)
     if serializer.is_valid():
-        old_image = student.image
-        student.image = serializer.validated_data['image']
-        student.save()
-
-        if old_image:
-            # Delete old picture from server if exists
-            cloudinary_api.delete_resources(
-                [old_image.name],
-                resource_type="image",
-                type="upload"
-            )
+        # Uploaded by the media worker, which then deletes the old picture
+        queue_media_upload(student, 'image', serializer.validated_data['image'])
 
-        success_message = {'image_url': student.get_image_url()}
-        return Response(success_message, status=status.HTTP_200_OK)
+        success_message = {
+            'image_url': student.get_image_url(), 'image_pending': True}
+        return Response(success_message, status=status.HTTP_202_ACCEPTED)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -261,7 +424,7 @@ def change_student_image(request, student_id):
 @permission_classes([IsAuthenticated, IsAdminUser])
 def get_student_for_update(request, student_id):
     try:
-        student = Student.objects.get(student_id=student_id)
+        student = find_student(student_id)
     except Student.DoesNotExist:
         msg = ['Student not found']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
 from accounts.models import User
 from departments.models import Department
 
@@ -15,3 +17,8 @@ class Teacher(User):
 
     class Meta:
         ordering = ('-pk', )
+
+
+@receiver(pre_save, sender=Teacher)
+def set_phone_columns(sender, instance, **kwargs):
+    instance.set_phone_columns()
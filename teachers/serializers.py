@@ -14,6 +14,7 @@ class GetTeacherSerializer(serializers.ModelSerializer):
     department = serializers.SerializerMethodField('get_department')
     age = serializers.SerializerMethodField('get_age')
     image = serializers.SerializerMethodField('get_image_url')
+    thumbnail = serializers.SerializerMethodField('get_thumbnail_url')
 
     def get_department(self, teacher):
         return {
@@ -28,8 +29,11 @@ class GetTeacherSerializer(serializers.ModelSerializer):
     def get_image_url(self, teacher):
         return teacher.get_image_url
 
+    def get_thumbnail_url(self, teacher):
+        return teacher.get_thumbnail_url
+
     def get_phone(self, teacher):
-        return str(teacher.phone.as_national)
+        return teacher.phone_national
 
     class Meta:
         model = Teacher
@@ -40,6 +44,7 @@ class GetTeacherSerializer(serializers.ModelSerializer):
             'gender',
             'email',
             'image',
+            'thumbnail',
             'address',
             'date_of_birth',
             'department',
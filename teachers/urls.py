@@ -4,6 +4,8 @@ from .views import (
     create_teacher,
     delete_teacher,
     get_all_teachers,
+    export_all_teachers,
+    export_teachers_in_department,
     get_teacher,
     update_teacher,
     teacher_password_change,
@@ -19,6 +21,9 @@ from .views import (
 
 urlpatterns = [
     path('get_all_teachers/', get_all_teachers),
+    path('export_all_teachers/', export_all_teachers),
+    path('export_teachers_in_department/<int:department_id>/',
+         export_teachers_in_department),
     path('create_teacher/<int:department_id>/', create_teacher),
     path('get_teacher/<int:teacher_id>/', get_teacher),
     path('get_just_teacher_info/<int:teacher_id>/', get_just_teacher_info),
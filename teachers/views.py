@@ -13,7 +13,6 @@ from rest_framework.decorators import (
 )
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from cloudinary import api as cloudinary_api
 from knox.auth import TokenAuthentication
 from knox.views import (
     LogoutView as KnoxLogoutView,
@@ -21,6 +20,8 @@ from knox.views import (
 )
 from accounts.permissions import IsAdminUser, IsSuperuser
 from departments.models import Department
+from jobs.media import queue_media_delete, queue_media_upload
+from others.exports import CHUNK_SIZE, export_response, parse_file_type
 from subjects.serializers import GetTeacherPeriodSerializer
 from knox.models import AuthToken
 from .serializers import (
@@ -36,6 +37,16 @@ from .models import Teacher
 from .permissions import IsTeacher
 from subjects.utils import get_ordered_periods
 
+# Columns of the teacher exports, read with values_list()
+EXPORT_HEADER = [
+    'Name', 'Title', 'Department', 'Head of department', 'Gender', 'Phone',
+    'Email', 'Username', 'Date of birth', 'Address', 'Marital status'
+]
+EXPORT_COLUMNS = [
+    'name', 'title_name', 'department__name', 'is_hod', 'gender', 'phone_national',
+    'email', 'username', 'date_of_birth', 'address', 'marital_status'
+]
+
 
 @api_view(http_method_names=['POST'])
 @authentication_classes([TokenAuthentication])
@@ -59,10 +70,16 @@ def create_teacher(request, department_id):
                 f"A teacher with the name {name} already exists in {department.name} department"]
             return Response({'error': msg}, status=status.HTTP_403_FORBIDDEN)
 
+        # Pictures are normalised and stored by the media worker
+        image = serializer.validated_data.pop('image', None)
         teacher = serializer.save(department=department)
         teacher.slug = slugify(f'{teacher.pk}-{teacher.name}')
         teacher.save()
+        if image:
+            queue_media_upload(teacher, 'image', image)
         data = GetTeacherSerializer(teacher).data
+        if image:
+            data['image_pending'] = True
         return Response(data, status=status.HTTP_201_CREATED)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -99,6 +116,40 @@ def get_all_teachers(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def teachers_export_response(request, teachers, filename):
+    '''Streams teachers as CSV or XLSX, chosen with ?file_type='''
+    try:
+        file_type = parse_file_type(request.query_params.get('file_type'))
+    except ValueError as e:
+        return Response({'error': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = teachers.values_list(*EXPORT_COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    return export_response(file_type, filename, EXPORT_HEADER, rows)
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_all_teachers(request):
+    teachers = Teacher.objects.order_by('department__name', 'name', 'pk')
+    return teachers_export_response(request, teachers, 'teachers')
+
+
+@api_view(http_method_names=['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_teachers_in_department(request, department_id):
+    try:
+        department = Department.objects.get(pk=department_id)
+    except Department.DoesNotExist:
+        msg = ['Department not found.']
+        return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
+
+    teachers = department.teachers.order_by('name', 'pk')
+    return teachers_export_response(
+        request, teachers, slugify(f'{department.name}-teachers'))
+
+
 @api_view(http_method_names=['GET'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated, IsAdminUser])
@@ -168,14 +219,9 @@ def delete_teacher(request, teacher_id):
     except Teacher.DoesNotExist:
         msg = ['Teacher not found.']
         return Response({'error': msg}, status=status.HTTP_404_NOT_FOUND)
-    image = teacher.image
+    images = (teacher.image.name, teacher.thumbnail.name)
     teacher.delete()
-    if image:
-        cloudinary_api.delete_resources(
-            [image.name],
-            resource_type="image",
-            type="upload"
-        )
+    queue_media_delete(*images)
 
     success_message = {'message': _('Teacher deleted successfully.')}
     return Response(success_message, status=status.HTTP_200_OK)
@@ -272,23 +318,16 @@ def change_teacher_image(request, teacher_id):
     else:
         serializer = ChangeTeacherImageSerializer(data=request.data)
         if serializer.is_valid():
-            old_image = teacher.image
-            teacher.image = serializer.validated_data['image']
-            teacher.save()
-
-            if old_image:
-                # Delete old picture from server if exists
-                cloudinary_api.delete_resources(
-                    [old_image.name],
-                    resource_type="image",
-                    type="upload"
-                )
+            # Uploaded by the media worker, which then deletes the old picture
+            queue_media_upload(teacher, 'image', serializer.validated_data['image'])
+
             if request.user.id == teacher.id:
                 success_message = GetTeacherSerializer(teacher).data
             else:
                 success_message = {'image_url': teacher.get_image_url}
+            success_message['image_pending'] = True
 
-            return Response(success_message, status=status.HTTP_200_OK)
+            return Response(success_message, status=status.HTTP_202_ACCEPTED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 